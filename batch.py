@@ -0,0 +1,186 @@
+"""
+Batch compilation driver: compiles many .jl files across a process pool.
+
+Each worker imports the compiler once, so the lexer and parser tables are
+loaded once per worker rather than once per file. Directories are searched
+recursively for .jl files. Outputs are written next to each input, or
+under ``--out-dir`` mirroring the input layout. Files given by name go
+straight under ``--out-dir``, so two of them with the same name would
+overwrite each other's outputs: the batch fails before compiling instead.
+
+Usage: python batch.py [-j N] [--out-dir DIR] <input> [<input> ...]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from main import (
+    add_compiler_options,
+    compile_cached,
+    compile_source,
+    compiler_options,
+    write_outputs,
+)
+from utils.compile_cache import CompileCache
+
+# Compile cache of the worker process, by (directory, size limit)
+_caches = {}
+
+
+def find_sources(inputs):
+    """Expands files and directories into ``(path, relative path)`` pairs."""
+    sources = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(".jl"):
+                        full_path = os.path.join(root, name)
+                        sources.append((full_path, os.path.relpath(full_path, path)))
+        else:
+            sources.append((path, os.path.basename(path)))
+    return sources
+
+
+def output_prefix(path, relative_path, out_dir):
+    if out_dir is None:
+        return os.path.splitext(path)[0]
+    return os.path.join(out_dir, os.path.splitext(relative_path)[0])
+
+
+def clashing_prefixes(jobs):
+    """Returns ``(prefix, path, other path)`` for each output prefix two jobs share."""
+    paths = {}
+    clashes = []
+    for path, prefix, _, _ in jobs:
+        key = os.path.normpath(prefix)
+        if key in paths:
+            clashes.append((prefix, paths[key], path))
+        else:
+            paths[key] = path
+    return clashes
+
+
+def compile_job(job):
+    """
+    Compiles one file in a worker. Returns ``(path, error, log, size,
+    seconds, cached)``; ``error`` is None on success and ``log`` holds
+    everything the compiler printed, so diagnostics of different files do
+    not mix. ``cached`` tells whether the outputs came from the cache.
+    """
+    path, prefix, options, cache_settings = job
+    start = time.perf_counter()
+    log = io.StringIO()
+    error = None
+    size = 0
+    cached = False
+    with contextlib.redirect_stdout(log):
+        try:
+            with open(path, "r") as f:
+                code = f.read()
+            size = len(code)
+            if cache_settings is None:
+                outputs = compile_source(code, **options)
+            else:
+                cache = _caches.get(cache_settings)
+                if cache is None:
+                    cache = _caches[cache_settings] = CompileCache(*cache_settings)
+                hits = cache.hits
+                outputs = compile_cached(code, cache, **options)
+                cached = cache.hits > hits
+            directory = os.path.dirname(prefix)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if not write_outputs(prefix, outputs):
+                error = "parsing failed"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    return path, error, log.getvalue(), size, time.perf_counter() - start, cached
+
+
+def run_batch(jobs, workers):
+    """Runs ``compile_job`` over ``jobs``, in-process if ``workers`` is 1."""
+    if workers == 1:
+        return [compile_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        return list(pool.map(compile_job, jobs, chunksize=chunksize))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        usage="python batch.py [-j N] [--out-dir DIR] <input> [<input> ...]"
+    )
+    arg_parser.add_argument("inputs", nargs="+", help=".jl files or directories")
+    arg_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes (default: one per CPU)",
+    )
+    arg_parser.add_argument(
+        "--out-dir", help="directory for the outputs (default: next to each input)"
+    )
+    arg_parser.add_argument(
+        "-v", "--verbose", action="store_true", help="print each file's compiler output"
+    )
+    add_compiler_options(arg_parser)
+    args = arg_parser.parse_args()
+
+    options = compiler_options(args)
+    cache_settings = None
+    if args.cache_dir is not None:
+        cache_settings = (args.cache_dir, args.cache_size * 1024 * 1024)
+    sources = find_sources(args.inputs)
+    if not sources:
+        print("Error: No .jl files found.")
+        sys.exit(1)
+    jobs = [
+        (
+            path,
+            output_prefix(path, relative_path, args.out_dir),
+            options,
+            cache_settings,
+        )
+        for path, relative_path in sources
+    ]
+    clashes = clashing_prefixes(jobs)
+    for prefix, other, path in clashes:
+        print(f"Error: '{other}' and '{path}' would both write to '{prefix}*'.")
+    if clashes:
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = run_batch(jobs, max(1, min(args.jobs, len(jobs))))
+    elapsed = time.perf_counter() - start
+
+    failures = [result for result in results if result[1] is not None]
+    if args.verbose:
+        for path, error, log, size, seconds, cached in results:
+            source = "cached" if cached else f"{seconds * 1000:.1f} ms"
+            print(f"--- {path} ({source})")
+            print(log, end="")
+
+    total_size = sum(result[3] for result in results)
+    print(
+        f"Compiled {len(results) - len(failures)}/{len(results)} files "
+        f"({total_size / 1024:.1f} KiB) in {elapsed:.2f}s: "
+        f"{len(results) / elapsed:.1f} files/sec, "
+        f"{total_size / 1024 / elapsed:.1f} KiB/sec"
+    )
+    if cache_settings is not None:
+        hits = sum(result[5] for result in results)
+        print(f"Compile cache: {hits} hits, {len(results) - hits} misses")
+    for path, error, log, size, seconds, cached in failures:
+        print(f"FAILED {path}: {error}")
+        if not args.verbose:
+            print(log, end="")
+    sys.exit(1 if failures else 0)
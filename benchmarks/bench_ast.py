@@ -0,0 +1,72 @@
+"""
+Measures the memory of the slotted AST against the previous dict-based nodes.
+
+Usage: python benchmarks/bench_ast.py [lines]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.dfa_lexer import DFALexer
+from lexer.token_stream import TokenStream
+from syntactic.ast_nodes import Node
+from syntactic.parser import parser
+from bench_lexer import make_source
+
+
+class DictNode:
+    """Layout of the AST nodes before slotting: per-instance dict, list children."""
+
+    def __init__(self, type, children=None, leaf=None, lexpos=None):
+        self.type = type
+        if children:
+            self.children = children
+        else:
+            self.children = []
+        self.leaf = leaf
+        self.lexpos = lexpos
+
+
+def to_dict_nodes(node):
+    return DictNode(
+        node.type, [to_dict_nodes(c) for c in node.children], node.leaf, node.lexpos
+    )
+
+
+def to_slotted_nodes(node):
+    children = type(node.children)(to_slotted_nodes(c) for c in node.children)
+    return Node(node.type, children, node.leaf, node.lexpos)
+
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(c) for c in node.children)
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+if __name__ == "__main__":
+    sys.setrecursionlimit(100000)
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    code = make_source(lines)
+    stream = TokenStream(DFALexer(), code)
+
+    # Both layouts are rebuilt from the parsed tree so leaf values are shared
+    # and only the node structure itself is measured.
+    ast = parser.parse(lexer=stream)
+    nodes = count_nodes(ast)
+    _, slotted_bytes = measure(lambda: to_slotted_nodes(ast))
+    _, dict_bytes = measure(lambda: to_dict_nodes(ast))
+
+    print(f"Source: {code.count(chr(10))} lines, {nodes} AST nodes")
+    print(f"Dict nodes:    {dict_bytes:>12,} bytes ({dict_bytes / nodes:.1f} per node)")
+    print(f"Slotted nodes: {slotted_bytes:>12,} bytes ({slotted_bytes / nodes:.1f} per node)")
+    print(f"Reduction: {dict_bytes / slotted_bytes:.1f}x")
@@ -0,0 +1,88 @@
+"""
+Compares the .tac text and the .tacb bytecode (main.py --bytecode) of
+generated programs: file sizes, and the time to load each file into the
+VM. Loading bytecode maps the file and decodes nothing but its constants,
+while text is read, split and parsed line by line. Both must run to the
+same variables, or stop with the same error: generated programs may
+divide by zero, and their loops are cut at MAX_STEPS instructions.
+
+Usage: python benchmarks/bench_bytecode.py [size]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from main import format_tac
+from tac.allocator import allocate_temps
+from tac.bytecode import TACRuntimeError, assemble, load
+from tac.vm import TACMachine, read_tac_file
+from bench_optimize import MAX_NESTING, visit
+from generate_program import SHAPES, generate
+
+MAX_STEPS = 1000000
+
+
+def load_text(path):
+    var_size, temp_size, tac_code = read_tac_file(path)
+    return TACMachine(tac_code, var_size, temp_size)
+
+
+def load_bytecode(path):
+    return TACMachine.from_bytecode(load(path))
+
+
+def outcome(machine):
+    try:
+        machine.run(MAX_STEPS)
+    except TACRuntimeError as e:
+        return str(e)
+    return machine.variables()
+
+
+def best_time(load_file, path, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        machine = load_file(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, machine
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print(
+        f"{'shape':<13} {'instrs':>7} {'.tac':>9} {'.tacb':>9} "
+        f"{'text load':>10} {'bytecode load':>14}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "program.tac")
+        bytecode_path = os.path.join(directory, "program.tacb")
+        for shape in SHAPES:
+            nesting = shape.startswith("nested")
+            tac_code = allocate_temps(
+                visit(generate(shape, min(size, MAX_NESTING) if nesting else size))
+            )[0]
+            # Frame sizes derived from the offsets used, as the VM does
+            bytecode = assemble(tac_code)
+            with open(text_path, "w") as f:
+                f.write(
+                    format_tac(bytecode.var_size, bytecode.temp_size // 8, tac_code)
+                )
+            with open(bytecode_path, "wb") as f:
+                f.write(bytecode.to_bytes())
+
+            text_time, text_machine = best_time(load_text, text_path)
+            bytecode_time, bytecode_machine = best_time(load_bytecode, bytecode_path)
+            if outcome(bytecode_machine) != outcome(text_machine):
+                raise AssertionError(f"{shape}: bytecode computes other values")
+            print(
+                f"{shape:<13} {len(tac_code):>7} {os.path.getsize(text_path):>9} "
+                f"{os.path.getsize(bytecode_path):>9} {text_time * 1000:>8.1f}ms "
+                f"{bytecode_time * 1000:>12.1f}ms"
+            )
@@ -0,0 +1,90 @@
+"""
+Times the .dot emitter against the previous recursive, write-per-line
+version on a large program and a deep expression, and shows the output
+size with the collapsing limits.
+
+Usage: python benchmarks/bench_dot.py [lines] [depth]
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.dfa_lexer import DFALexer
+from lexer.token_stream import TokenStream
+from syntactic.parser import parser
+from utils.dot_generator import COLOR_MAP, generate_dot
+from bench_lexer import make_source
+
+
+def recursive_generate_dot(node, dot_file):
+    """The previous emitter: one recursive call and write per node and edge."""
+    ids = {}
+
+    def get_id(n):
+        key = id(n)
+        if key not in ids:
+            ids[key] = len(ids)
+        return ids[key]
+
+    def traverse(n):
+        if n is None:
+            return
+        node_id = get_id(n)
+        label = str(n.type)
+        if n.leaf is not None:
+            leaf_str = str(n.leaf).replace("\\", "\\\\").replace('"', '\\"')
+            label += f"\\n{leaf_str}"
+        color = COLOR_MAP.get(n.type, "lightgrey")
+        dot_file.write(f'  {node_id} [label="{label}", fillcolor="{color}"];\n')
+        for child in n.children:
+            dot_file.write(f"  {node_id} -> {get_id(child)};\n")
+            traverse(child)
+
+    dot_file.write("digraph AST {\n")
+    dot_file.write('  node [shape=box, style="rounded,filled"];\n')
+    traverse(node)
+    dot_file.write("}\n")
+
+
+def bench(name, emit, ast, repeat=5):
+    best = None
+    for _ in range(repeat):
+        # A real file, so the cost of many small writes is measured
+        with open(os.devnull, "w") as f:
+            start = time.perf_counter()
+            try:
+                emit(ast, f)
+            except RecursionError:
+                print(f"{name:<28}: RecursionError")
+                return
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<28}: {best:.3f}s")
+
+
+def size(ast, **limits):
+    output = io.StringIO()
+    generate_dot(ast, output, **limits)
+    return len(output.getvalue().splitlines())
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    programs = {
+        "large program": make_source(lines),
+        "deep expression": "a = 1\nb = " + " + ".join(["a"] * depth) + "\n",
+    }
+    for name, code in programs.items():
+        ast = parser.parse(lexer=TokenStream(DFALexer(), code))
+        bench(f"{name} (recursive)", recursive_generate_dot, ast)
+        bench(f"{name} (iterative)", generate_dot, ast)
+        print(
+            f"{name:<28}: {size(ast)} lines, "
+            f"{size(ast, max_depth=8, max_children=50)} with depth 8 / 50 children, "
+            f"{size(ast, max_nodes=1000)} with 1000 nodes"
+        )
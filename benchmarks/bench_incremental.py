@@ -0,0 +1,120 @@
+"""
+Measures edit-to-result latency of IncrementalCompiler on a large program
+against a full compile of the edited source (lex, parse, visit, temp
+allocation and TAC formatting). Each edit is made near the start, middle
+and end of the file, timed, and undone. "latency" is the edit alone and
+"+ outputs" includes formatting the symbol table and TAC files, which is
+checked against the full compile.
+
+Usage: python benchmarks/bench_incremental.py [size] [repeat] [shape]
+"""
+import contextlib
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from incremental import IncrementalCompiler
+from lexer.token_stream import TokenStream
+from main import LEXERS, format_tac
+from syntactic.parser import parser
+from semantic.visitor import ASTVisitor
+from tac.allocator import allocate_temps
+from generate_program import generate
+
+
+def full_compile(code):
+    stream = TokenStream(LEXERS["ply"], code)
+    visitor = ASTVisitor(stream.line_index)
+    visitor.visit(parser.parse(lexer=stream))
+    tac_code, temp_count = allocate_temps(visitor.tac_code)
+    symbols = visitor.symbol_table
+    return {
+        "_symbol_table.txt": symbols.to_string(),
+        ".tac": format_tac(symbols.total_var_size, temp_count, tac_code),
+    }
+
+
+def line_at(code, fraction):
+    """Returns the start and end of the first unindented line past ``fraction``."""
+    start = code.find("\nv", int(len(code) * fraction)) + 1
+    return start, code.find("\n", start)
+
+
+def append_term(code, fraction):
+    _, end = line_at(code, fraction)
+    return (end, end, " + 1"), (end, end + 4, "")
+
+
+def insert_assignment(code, fraction):
+    start, _ = line_at(code, fraction)
+    return (start, start, "w = 1\n"), (start, start + 6, "")
+
+
+def insert_variable_use(code, fraction):
+    start, _ = line_at(code, fraction)
+    return (start, start, "v0 = v1\n"), (start, start + 8, "")
+
+
+EDITS = (
+    ("append term", append_term),
+    ("new variable", insert_assignment),
+    ("new statement", insert_variable_use),
+)
+WHERE = (("start", 0.05), ("middle", 0.5), ("end", 0.95))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    shape = sys.argv[3] if len(sys.argv) > 3 else "statements"
+
+    code = generate(shape, size)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        full = min(timed(full_compile, code) for _ in range(repeat))
+        start = time.perf_counter()
+        compiler = IncrementalCompiler(code)
+        initial = time.perf_counter() - start
+
+    print(
+        f"{shape} program: {len(code.splitlines())} lines, "
+        f"{len(compiler.nodes)} top-level statements"
+    )
+    print(f"full compile:              {full * 1000:8.1f} ms")
+    print(f"initial incremental build: {initial * 1000:8.1f} ms")
+    print()
+    print(
+        f"{'edit':<14} {'where':<7} {'latency':>10} {'+ outputs':>10} "
+        f"{'reparsed':>9} {'revisited':>10} {'speedup':>8}"
+    )
+    for name, make_edit in EDITS:
+        for where, fraction in WHERE:
+            edit, undo = make_edit(compiler.code, fraction)
+            latency = with_outputs = None
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                for _ in range(repeat):
+                    elapsed = timed(compiler.edit, *edit)
+                    latency = elapsed if latency is None else min(latency, elapsed)
+                    reparsed, revisited = compiler.reparsed, compiler.revisited
+                    compiler.edit(*undo)
+                    start = time.perf_counter()
+                    compiler.edit(*edit)
+                    outputs = compiler.outputs()
+                    elapsed = time.perf_counter() - start
+                    if with_outputs is None or elapsed < with_outputs:
+                        with_outputs = elapsed
+                    if outputs != full_compile(compiler.code):
+                        raise AssertionError(f"{name} at {where}: outputs differ")
+                    compiler.edit(*undo)
+            print(
+                f"{name:<14} {where:<7} {latency * 1000:8.2f}ms "
+                f"{with_outputs * 1000:8.2f}ms {reparsed:>9} {revisited:>10} "
+                f"{full / with_outputs:7.0f}x"
+            )
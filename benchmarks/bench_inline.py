@@ -0,0 +1,93 @@
+"""
+Measures the inlining done by -O: VM instructions executed by a loop
+calling small functions, optimized with and without inlining, and the
+time the optimizations take. The programs must end with the same global
+variables; those of the functions are left as the last inlined copy set
+them. ``latest`` may read ``y`` before setting it, where a call reads 0,
+so it must not be inlined.
+
+Usage: python benchmarks/bench_inline.py [iterations]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from lexer.dfa_lexer import DFALexer
+from lexer.token_stream import TokenStream
+from syntactic.parser import parser
+from semantic.visitor import ASTVisitor
+from tac.allocator import allocate_temps
+from tac.inline import Inliner
+from tac.optimize import optimize
+from tac.vm import TACMachine
+
+CALLS = """\
+function square(x)
+    return x * x
+end
+function clamp(v, low, high)
+    if v < low
+        return low
+    end
+    if v > high
+        return high
+    end
+    return v
+end
+function latest(x)
+    if x > 0
+        y = x
+    end
+    return y
+end
+function fact(n)
+    if n <= 1
+        return 1
+    end
+    return n * fact(n - 1)
+end
+i = 0
+s = 0
+while i < {n}
+    s = s + square(i) + clamp(i, 10, 100) + latest(i % 3)
+    i += 1
+end
+f = fact(10)
+"""
+
+
+def visit(code):
+    visitor = ASTVisitor()
+    with contextlib.redirect_stdout(io.StringIO()):
+        visitor.visit(parser.parse(lexer=TokenStream(DFALexer(), code)))
+    symbols = visitor.symbol_table.symbols["global"].values()
+    return visitor.tac_code, [symbol["location"] for symbol in symbols]
+
+
+def run(tac_code, globals_):
+    machine = TACMachine(allocate_temps(tac_code)[0])
+    steps = machine.run()
+    variables = machine.variables()
+    return steps, {location: variables[location] for location in globals_}
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    tac_code, globals_ = visit(CALLS.format(n=iterations))
+    steps, variables = run(tac_code, globals_)
+    print(f"{'':<16} {'executed':>10} {'optimize':>10}")
+    print(f"{'unoptimized':<16} {steps:>10}")
+    for name, inliner in (("-O no inlining", Inliner(0)), ("-O", Inliner())):
+        start = time.perf_counter()
+        optimized = optimize(tac_code, inliner)[0]
+        elapsed = time.perf_counter() - start
+        optimized_steps, optimized_variables = run(optimized, globals_)
+        if optimized_variables != variables:
+            raise AssertionError(f"{name}: program computes other values")
+        print(f"{name:<16} {optimized_steps:>10} {elapsed * 1000:>8.1f}ms")
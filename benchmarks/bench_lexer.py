@@ -0,0 +1,78 @@
+"""
+Compares the PLY lexer against the hand-written DFA lexer.
+
+Usage: python benchmarks/bench_lexer.py [lines]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.lexer import lexer as ply_lexer
+from lexer.dfa_lexer import DFALexer
+
+SAMPLE = """# generated sample
+function scale(x, factor)
+    y = x * factor
+    y /= 2.5
+end
+count = 0
+total = 0.0
+message = "count is \\"ready\\""
+while count < 100
+    count += 1
+    if count % 3 == 0
+        total = total + count * 1.5
+    elseif count >= 50
+        total -= (count - 7) / 2
+    else
+        total *= -1
+    end
+    flag = count != 42
+    small = count <= 10
+end
+"""
+
+
+def make_source(lines):
+    block = SAMPLE.count("\n")
+    return SAMPLE * max(1, lines // block)
+
+
+def collect(lex, code):
+    lex.input(code)
+    lex.lineno = 1
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in iter(lex.token, None)]
+
+
+def bench(name, lex, code, repeat=3):
+    best = None
+    count = 0
+    for _ in range(repeat):
+        lex.input(code)
+        lex.lineno = 1
+        start = time.perf_counter()
+        count = 0
+        token = lex.token
+        while token():
+            count += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<4}: {count} tokens in {best:.3f}s ({count / best:,.0f} tokens/sec)")
+    return best
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    code = make_source(lines)
+    print(f"Source: {code.count(chr(10))} lines, {len(code)} characters")
+
+    dfa_lexer = DFALexer()
+    if collect(ply_lexer, code) != collect(dfa_lexer, code):
+        print("Error: token streams differ between PLY and DFA lexers.")
+        sys.exit(1)
+
+    ply_time = bench("ply", ply_lexer, code)
+    dfa_time = bench("dfa", dfa_lexer, code)
+    print(f"Speedup: {ply_time / dfa_time:.2f}x")
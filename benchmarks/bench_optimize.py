@@ -0,0 +1,98 @@
+"""
+Measures the TAC optimizations (main.py -O): instruction counts before and
+after, instructions removed by each pass and optimization time for
+generated programs, then VM instructions executed per loop iteration for
+input.jl, the arithmetic loop of bench_vm.py and a loop with invariant
+operands and a multiplied counter. The optimized programs must end with
+the same variables.
+
+Nesting shapes are capped at MAX_NESTING levels: the dataflow analyses
+take one more sweep per level of loop nesting.
+
+Usage: python benchmarks/bench_optimize.py [size] [iterations]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from lexer.dfa_lexer import DFALexer
+from lexer.token_stream import TokenStream
+from syntactic.parser import parser
+from semantic.visitor import ASTVisitor
+from tac.allocator import allocate_temps
+from tac.optimize import PASSES, optimize
+from tac.vm import TACMachine
+from bench_vm import ARITHMETIC
+from generate_program import SHAPES, generate
+
+MAX_NESTING = 100
+
+INVARIANT = """i = 0
+n = {n}
+k = 7
+total = 0
+while i < n * 2
+    total = total + k * 3 + i * 4
+    i += 1
+end
+"""
+
+
+def visit(code):
+    visitor = ASTVisitor()
+    # Generated programs print type mismatch warnings
+    with contextlib.redirect_stdout(io.StringIO()):
+        visitor.visit(parser.parse(lexer=TokenStream(DFALexer(), code)))
+    return visitor.tac_code
+
+
+def run(tac_code):
+    machine = TACMachine(allocate_temps(tac_code)[0])
+    return machine.run(), machine.variables()
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    print(
+        f"{'shape':<13} {'before':>7} {'after':>7} "
+        + " ".join(f"{name:>16}" for name in PASSES)
+        + f" {'time':>8}"
+    )
+    for shape in SHAPES:
+        nesting = shape.startswith("nested")
+        tac_code = visit(generate(shape, min(size, MAX_NESTING) if nesting else size))
+        start = time.perf_counter()
+        optimized, removed = optimize(tac_code)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{shape:<13} {len(tac_code):>7} {len(optimized):>7} "
+            + " ".join(f"{removed[name]:>16}" for name in PASSES)
+            + f" {elapsed * 1000:>6.1f}ms"
+        )
+
+    with open(os.path.join(ROOT, "input.jl")) as f:
+        source = f.read().replace("a = 5", f"a = {iterations}", 1)
+    loops = (
+        ("input.jl", source),
+        ("arithmetic loop", ARITHMETIC.format(n=iterations)),
+        ("invariant loop", INVARIANT.format(n=iterations // 2)),
+    )
+    print()
+    print(f"{'loop':<16} {'executed':>10} {'optimized':>10} {'per iteration':>16}")
+    for name, code in loops:
+        tac_code = visit(code)
+        steps, variables = run(tac_code)
+        optimized_steps, optimized_variables = run(optimize(tac_code)[0])
+        if optimized_variables != variables:
+            raise AssertionError(f"{name}: optimized program computes other values")
+        print(
+            f"{name:<16} {steps:>10} {optimized_steps:>10} "
+            f"{steps / iterations:>7.2f} -> {optimized_steps / iterations:<6.2f}"
+        )
@@ -0,0 +1,61 @@
+"""
+Measures the peephole pass (main.py --peephole): instruction counts before
+and after, instructions removed by each pattern and peephole time for
+generated programs, then VM instructions executed per loop iteration for
+input.jl and the arithmetic loop of bench_vm.py, with the peephole pass
+alone and followed by -O. The programs must end with the same variables.
+
+Usage: python benchmarks/bench_peephole.py [size] [iterations]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from tac.optimize import optimize
+from tac.peephole import PATTERNS, peephole
+from bench_optimize import run, visit
+from bench_vm import ARITHMETIC
+from generate_program import SHAPES, generate
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    print(
+        f"{'shape':<13} {'before':>7} {'after':>7} "
+        + " ".join(f"{name:>14}" for name in PATTERNS)
+        + f" {'time':>8}"
+    )
+    for shape in SHAPES:
+        tac_code = visit(generate(shape, size))
+        start = time.perf_counter()
+        collapsed, removed = peephole(tac_code)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{shape:<13} {len(tac_code):>7} {len(collapsed):>7} "
+            + " ".join(f"{removed[name]:>14}" for name in PATTERNS)
+            + f" {elapsed * 1000:>6.1f}ms"
+        )
+
+    with open(os.path.join(ROOT, "input.jl")) as f:
+        source = f.read().replace("a = 5", f"a = {iterations}", 1)
+    loops = (
+        ("input.jl", source),
+        ("arithmetic loop", ARITHMETIC.format(n=iterations)),
+    )
+    print()
+    print(f"{'loop':<16} {'executed':>10} {'peephole':>10} {'peephole -O':>12}")
+    for name, code in loops:
+        tac_code = visit(code)
+        steps, variables = run(tac_code)
+        collapsed = peephole(tac_code)[0]
+        collapsed_steps, collapsed_variables = run(collapsed)
+        optimized_steps, optimized_variables = run(optimize(collapsed)[0])
+        if not variables == collapsed_variables == optimized_variables:
+            raise AssertionError(f"{name}: peephole program computes other values")
+        print(
+            f"{name:<16} {steps:>10} {collapsed_steps:>10} {optimized_steps:>12}"
+        )
@@ -0,0 +1,62 @@
+"""
+Compares compile turnaround through the compile server against a fresh
+main.py process per compile: raw socket round trips (as an editor
+integration would make), client.py invocations and main.py invocations.
+
+Usage: python benchmarks/bench_server.py [runs]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from client import send
+from bench_startup import best_of
+
+
+def run(script, socket_path, prefix):
+    args = [sys.executable, os.path.join(ROOT, script)]
+    if script == "client.py":
+        args += ["--socket", socket_path]
+    subprocess.run(
+        args + [os.path.join(ROOT, "input.jl"), prefix],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "server.sock")
+        prefix = os.path.join(tmp, "out")
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "server.py"), "--socket", socket_path],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            while send(socket_path, {"command": "ping"}) is None:
+                time.sleep(0.01)
+            request = {
+                "command": "compile",
+                "cwd": tmp,
+                "input_file": os.path.join(ROOT, "input.jl"),
+                "output_file_prefix": prefix,
+                "options": {},
+                "cache": None,
+            }
+            socket_time = best_of(runs, lambda: send(socket_path, request))
+            client_time = best_of(runs, lambda: run("client.py", socket_path, prefix))
+            main_time = best_of(runs, lambda: run("main.py", socket_path, prefix))
+        finally:
+            send(socket_path, {"command": "stop"})
+            server.wait()
+
+    print(f"socket request:          {socket_time * 1000:6.1f} ms")
+    print(f"python client.py:        {client_time * 1000:6.1f} ms")
+    print(f"python main.py:          {main_time * 1000:6.1f} ms")
@@ -0,0 +1,64 @@
+"""
+Measures startup cost of the compiler driver and of parser table loading.
+
+Usage: python benchmarks/bench_startup.py [runs]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import ply.yacc as yacc
+
+from syntactic import parser as grammar
+from syntactic.tables import read_tables, load_parser
+
+
+def best_of(runs, func):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_main(prefix):
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "main.py"), os.path.join(ROOT, "input.jl"), prefix],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    if read_tables(grammar) is None:
+        print("Warning: prebuilt tables are missing or stale; run 'python -m syntactic.tables'.")
+
+    load_time = best_of(runs, lambda: load_parser(grammar))
+    generate_time = best_of(
+        runs,
+        lambda: yacc.yacc(
+            module=grammar, debug=False, write_tables=False, errorlog=yacc.NullLogger()
+        ),
+    )
+    print(f"Prebuilt table load:   {load_time * 1000:8.2f} ms")
+    print(f"In-memory generation:  {generate_time * 1000:8.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, "out")
+        run_main(prefix)
+        main_time = best_of(runs, lambda: run_main(prefix))
+        interpreter_time = best_of(
+            runs, lambda: subprocess.run([sys.executable, "-c", "pass"], check=True)
+        )
+    print(f"python main.py input.jl: {main_time * 1000:6.1f} ms")
+    print(f"bare interpreter:        {interpreter_time * 1000:6.1f} ms")
@@ -0,0 +1,60 @@
+"""
+Compares peak memory (tracemalloc) and time of the regular compile, which
+builds the whole AST and TAC before writing, with the streaming compile
+(main.py --stream) on generated programs of growing size. The streaming
+peak should stay roughly flat; the regular one grows with the source.
+
+Usage: python benchmarks/bench_stream.py [sizes...] [--shape SHAPE] [--dot]
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import compile_file
+from streaming import compile_stream
+from generate_program import SHAPES, generate
+
+
+def measure(func, *args, **kwargs):
+    """Returns the peak traced memory in bytes and the wall time of a call."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return peak, elapsed
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("sizes", nargs="*", type=int, default=[2000, 8000, 32000])
+    arg_parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    arg_parser.add_argument("--dot", action="store_true", help="also write .dot")
+    args = arg_parser.parse_args()
+
+    print(
+        f"{'statements':>10} {'source':>10} {'regular peak':>13} {'time':>8} "
+        f"{'stream peak':>12} {'time':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "program.jl")
+        prefix = os.path.join(tmp, "out")
+        for size in args.sizes:
+            with open(source, "w") as f:
+                f.write(generate(args.shape, size))
+            dot_limits = None if args.dot else {"max_nodes": 1}
+            regular = measure(compile_file, source, prefix, dot_limits=dot_limits)
+            stream = measure(compile_stream, source, prefix, write_dot=args.dot)
+            print(
+                f"{size:>10} {os.path.getsize(source) / 1024:>8.0f}KB "
+                f"{regular[0] / 1024 / 1024:>11.1f}MB {regular[1]:>7.2f}s "
+                f"{stream[0] / 1024 / 1024:>10.1f}MB {stream[1]:>7.2f}s"
+            )
@@ -0,0 +1,187 @@
+"""
+Per-phase benchmark suite over synthetic programs.
+
+Generates programs of each shape (see generate_program.py) and times every
+compiler phase separately: lexing, token dump, parsing, .dot generation,
+semantic analysis/TAC generation, temp allocation, and the symbol table
+and TAC writing. Reports the best time of each phase, its throughput in
+source KiB/sec and its peak memory (measured in a separate tracemalloc
+run, so tracing does not skew the timings).
+
+Results can be saved as JSON and compared against a previous run to catch
+regressions:
+
+    python benchmarks/bench_suite.py --save baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json
+
+Usage: python benchmarks/bench_suite.py [--shapes a,b] [--size N] [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.token_stream import TokenStream
+from main import LEXERS, format_tac, format_tokens
+from syntactic.parser import parser
+from semantic.visitor import ASTVisitor
+from tac.allocator import allocate_temps
+from utils.dot_generator import generate_dot
+from generate_program import SHAPES, generate
+
+# Default size per shape, in the units of generate_program
+SIZES = {
+    "statements": 20000,
+    "if_chain": 2000,
+    "nested_if": 2000,
+    "nested_while": 1000,
+    "functions": 2000,
+    "deep_expr": 5000,
+    "mixed": 20000,
+}
+
+
+def run_pipeline(code, lexer, record):
+    """Runs every phase on ``code``; ``record(phase, func, *args)`` runs each."""
+    stream = record("lex", TokenStream, LEXERS[lexer], code)
+    record("token dump", format_tokens, stream, stream.line_index)
+    ast = record("parse", parser.parse, lexer=stream)
+    record("dot", generate_dot, ast, io.StringIO())
+    visitor = ASTVisitor(stream.line_index)
+    record("semantic/TAC", visitor.visit, ast)
+    visitor.tac_code, visitor.symbol_table.temp_var_count = record(
+        "temp alloc", allocate_temps, visitor.tac_code
+    )
+    record("symbol table", visitor.symbol_table.to_string)
+    symbols = visitor.symbol_table
+    record(
+        "TAC write",
+        format_tac,
+        symbols.total_var_size,
+        symbols.temp_var_count,
+        visitor.tac_code,
+    )
+    return len(stream), len(visitor.tac_code)
+
+
+def time_phases(code, lexer, repeat):
+    best = {}
+
+    def record(phase, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best[phase] = min(best.get(phase, elapsed), elapsed)
+        return result
+
+    for _ in range(repeat):
+        counts = run_pipeline(code, lexer, record)
+    return best, counts
+
+
+def peak_memory(code, lexer):
+    peaks = {}
+
+    def record(phase, func, *args, **kwargs):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = func(*args, **kwargs)
+        peaks[phase] = tracemalloc.get_traced_memory()[1] - current
+        return result
+
+    tracemalloc.start()
+    try:
+        run_pipeline(code, lexer, record)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def bench(shape, size, lexer, repeat):
+    code = generate(shape, size)
+    kib = len(code.encode()) / 1024
+    # Diagnostics are discarded so terminal output is not what gets timed
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        times, (tokens, instructions) = time_phases(code, lexer, repeat)
+        peaks = peak_memory(code, lexer)
+
+    print(
+        f"== {shape} (size {size}): {code.count(chr(10))} lines, {kib:.1f} KiB, "
+        f"{tokens} tokens, {instructions} TAC instructions"
+    )
+    for phase, seconds in times.items():
+        print(
+            f"  {phase:<14} {seconds * 1000:9.2f} ms {kib / seconds:12,.0f} KiB/sec"
+            f" {peaks[phase] / 1024:10,.0f} KiB peak"
+        )
+    total = sum(times.values())
+    print(f"  {'total':<14} {total * 1000:9.2f} ms {kib / total:12,.0f} KiB/sec")
+    return {"seconds": times, "peak_bytes": peaks}
+
+
+def compare(results, baseline, threshold):
+    """Prints the phases slower than the baseline by more than ``threshold``."""
+    regressions = 0
+    for shape, result in results.items():
+        for phase, seconds in result["seconds"].items():
+            before = baseline.get(shape, {}).get("seconds", {}).get(phase)
+            # Sub-millisecond differences are timer noise, not regressions
+            slower = seconds - before > 0.001 if before else False
+            if slower and seconds > before * (1 + threshold):
+                regressions += 1
+                print(
+                    f"REGRESSION {shape}/{phase}: {before * 1000:.2f} ms -> "
+                    f"{seconds * 1000:.2f} ms (+{seconds / before - 1:.0%})"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        usage="python benchmarks/bench_suite.py [--shapes a,b] [--size N] [--repeat N]"
+    )
+    arg_parser.add_argument(
+        "--shapes", default=",".join(SHAPES), help="comma-separated program shapes"
+    )
+    arg_parser.add_argument(
+        "--size", type=int, help="size for every shape (default: per shape)"
+    )
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--lexer", choices=sorted(LEXERS), default="dfa")
+    arg_parser.add_argument("--save", metavar="FILE", help="write results as JSON")
+    arg_parser.add_argument(
+        "--compare", metavar="FILE", help="compare against results saved earlier"
+    )
+    arg_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="slowdown reported as a regression (default: 0.25 = 25%%)",
+    )
+    args = arg_parser.parse_args()
+
+    results = {}
+    for shape in args.shapes.split(","):
+        if shape not in SHAPES:
+            print(f"Error: Unknown shape '{shape}'.")
+            sys.exit(1)
+        results[shape] = bench(
+            shape, args.size or SIZES[shape], args.lexer, args.repeat
+        )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+        print("No regressions.")
@@ -0,0 +1,45 @@
+"""
+Measures the memory of the compact TokenStream against a list of LexTokens.
+
+Usage: python benchmarks/bench_token_buffer.py [lines]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.dfa_lexer import DFALexer
+from lexer.token_stream import TokenStream
+from bench_lexer import make_source
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def lex_objects(code):
+    lex = DFALexer()
+    lex.input(code)
+    return list(iter(lex.token, None))
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    code = make_source(lines)
+    print(f"Source: {code.count(chr(10))} lines, {len(code):,} bytes of text")
+
+    objects, object_bytes = measure(lambda: lex_objects(code))
+    count = len(objects)
+    del objects
+    stream, stream_bytes = measure(lambda: TokenStream(DFALexer(), code))
+
+    print(f"LexToken list: {object_bytes:>12,} bytes ({object_bytes / count:.1f} per token)")
+    print(f"TokenStream:   {stream_bytes:>12,} bytes ({stream_bytes / count:.1f} per token)")
+    print(f"Token arrays:  {stream.nbytes():>12,} bytes")
+    print(f"Reduction: {object_bytes / stream_bytes:.1f}x")
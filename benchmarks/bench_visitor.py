@@ -0,0 +1,61 @@
+"""
+Times ASTVisitor (semantic analysis and TAC generation) on a large program,
+on a single very deep expression, on deeply nested if statements and on
+function definitions nested a tenth as deep, each assigning a variable.
+
+Usage: python benchmarks/bench_visitor.py [lines] [depth]
+"""
+import contextlib
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.dfa_lexer import DFALexer
+from lexer.token_stream import TokenStream
+from syntactic.parser import parser
+from semantic.visitor import ASTVisitor
+from bench_lexer import make_source
+
+
+def parse(code):
+    return parser.parse(lexer=TokenStream(DFALexer(), code))
+
+
+def bench(name, ast, repeat=7):
+    best = None
+    for _ in range(repeat):
+        visitor = ASTVisitor()
+        # Diagnostics are discarded so terminal output is not what gets timed
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            try:
+                visitor.visit(ast)
+            except RecursionError:
+                elapsed = None
+            else:
+                elapsed = time.perf_counter() - start
+        if elapsed is None:
+            print(f"{name:<16}: RecursionError")
+            return
+        best = elapsed if best is None else min(best, elapsed)
+    count = len(visitor.tac_code)
+    print(f"{name:<16}: {count} instructions in {best:.3f}s ({count / best:,.0f} instructions/sec)")
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    bench("large program", parse(make_source(lines)))
+    bench("deep expression", parse("a = 1\nb = " + " + ".join(["a"] * depth) + "\n"))
+    nested = "a = 1\n" + "if a > 0\n" * depth + "a += 1\n" + "end\n" * depth
+    bench("deep nesting", parse(nested))
+    functions = depth // 10
+    nested = (
+        "".join(f"function f{i}(a)\nx{i % 7} = a + {i}\n" for i in range(functions))
+        + "return 1\n"
+        + "end\n" * functions
+    )
+    bench("nested functions", parse(nested))
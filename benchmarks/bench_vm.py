@@ -0,0 +1,61 @@
+"""
+Runs compiled TAC on the VM and reports instructions per second, for
+input.jl with a larger loop count and for a loop with arithmetic-heavy
+conditionals.
+
+Usage: python benchmarks/bench_vm.py [iterations]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from lexer.dfa_lexer import DFALexer
+from lexer.token_stream import TokenStream
+from syntactic.parser import parser
+from semantic.visitor import ASTVisitor
+from tac.allocator import allocate_temps
+from tac.vm import TACMachine
+
+ARITHMETIC = """i = 0
+total = 0
+acc = 1.5
+while i < {n}
+    i += 1
+    if i % 3 == 0
+        total = total + i * 2 - 1
+    elseif i % 5 == 1
+        acc = acc * 1.0001 + i / 7
+    else
+        total -= i % 4
+    end
+end
+"""
+
+
+def compile_tac(code):
+    visitor = ASTVisitor()
+    visitor.visit(parser.parse(lexer=TokenStream(DFALexer(), code)))
+    return allocate_temps(visitor.tac_code)[0]
+
+
+def bench(name, tac_code, repeat=5):
+    best = None
+    for _ in range(repeat):
+        machine = TACMachine(tac_code)
+        start = time.perf_counter()
+        steps = machine.run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<16}: {steps} instructions in {best:.3f}s ({steps / best:,.0f} instructions/sec)")
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    with open(os.path.join(ROOT, "input.jl")) as f:
+        source = f.read().replace("a = 5", f"a = {iterations}", 1)
+    bench("input.jl", compile_tac(source))
+    bench("arithmetic loop", compile_tac(ARITHMETIC.format(n=iterations)))
@@ -0,0 +1,154 @@
+"""
+Generates synthetic programs in the compiler's Julia subset.
+
+Shapes:
+  statements  long flat list of assignments and compound assignments
+  if_chain    one if with a long elseif chain
+  nested_if   if statements nested inside each other
+  nested_while  while loops nested inside each other
+  functions   many function definitions
+  deep_expr   a single expression with many operands and parentheses
+  mixed       a realistic blend of the above
+
+``size`` is roughly the number of statements (clauses, nesting levels or
+operands for the other shapes). Every variable is assigned before it is
+read, so the only diagnostics are type mismatch warnings.
+
+Usage: python benchmarks/generate_program.py <shape> <size> [seed] > prog.jl
+"""
+import random
+import sys
+
+VARIABLES = [f"v{i}" for i in range(10)]
+MAX_INDENT = 8  # Deeper levels are not indented further, to keep files small
+OPERATORS = ["+", "-", "*", "/", "%"]
+RELATIONS = ["<", "<=", ">", ">=", "==", "!="]
+ASSIGN_OPS = ["+=", "-=", "*=", "/="]
+
+
+def prelude():
+    return [f"{name} = {i + 1}" for i, name in enumerate(VARIABLES)]
+
+
+def operand(rng):
+    choice = rng.random()
+    if choice < 0.6:
+        return rng.choice(VARIABLES)
+    if choice < 0.9:
+        return str(rng.randint(1, 100))
+    return f"{rng.randint(1, 100)}.{rng.randint(0, 99)}"
+
+
+def expression(rng, operands):
+    parts = [operand(rng)]
+    for _ in range(operands - 1):
+        term = operand(rng)
+        if rng.random() < 0.2:
+            term = f"({term} {rng.choice(OPERATORS)} {operand(rng)})"
+        parts.append(f"{rng.choice(OPERATORS)} {term}")
+    return " ".join(parts)
+
+
+def condition(rng):
+    return f"{rng.choice(VARIABLES)} {rng.choice(RELATIONS)} {operand(rng)}"
+
+
+def statement(rng, indent=""):
+    target = rng.choice(VARIABLES)
+    if rng.random() < 0.3:
+        return f"{indent}{target} {rng.choice(ASSIGN_OPS)} {operand(rng)}"
+    return f"{indent}{target} = {expression(rng, rng.randint(1, 4))}"
+
+
+def statements(rng, size):
+    return [statement(rng) for _ in range(size)]
+
+
+def if_chain(rng, size):
+    lines = [f"if {condition(rng)}", statement(rng, "    ")]
+    for _ in range(size - 1):
+        lines += [f"elseif {condition(rng)}", statement(rng, "    ")]
+    lines += ["else", statement(rng, "    "), "end"]
+    return lines
+
+
+def indent(level):
+    return "    " * min(level, MAX_INDENT)
+
+
+def nested_if(rng, size):
+    lines = []
+    for level in range(size):
+        lines.append(f"{indent(level)}if {condition(rng)}")
+    lines.append(statement(rng, indent(size)))
+    for level in reversed(range(size)):
+        lines.append(f"{indent(level)}end")
+    return lines
+
+
+def nested_while(rng, size):
+    lines = []
+    for level in range(size):
+        lines += [f"{indent(level)}c{level} = 0", f"{indent(level)}while c{level} < 3"]
+    lines.append(statement(rng, indent(size)))
+    for level in reversed(range(size)):
+        lines += [f"{indent(level + 1)}c{level} += 1", f"{indent(level)}end"]
+    return lines
+
+
+def functions(rng, size):
+    lines = []
+    for i in range(size):
+        lines += [
+            f"function f{i}(a, b)",
+            f"    r = a * b + {expression(rng, 3)}",
+            "    if r > a",
+            "        r -= b",
+            "    end",
+            "end",
+        ]
+    return lines
+
+
+def deep_expr(rng, size):
+    return [f"result = {expression(rng, size)}"]
+
+
+def mixed(rng, size):
+    lines = []
+    while len(lines) < size:
+        kind = rng.random()
+        if kind < 0.6:
+            lines.append(statement(rng))
+        elif kind < 0.8:
+            lines += if_chain(rng, rng.randint(1, 4))
+        elif kind < 0.9:
+            lines += nested_while(rng, rng.randint(1, 3))
+        else:
+            lines += functions(rng, 1)
+    return lines
+
+
+SHAPES = {
+    "statements": statements,
+    "if_chain": if_chain,
+    "nested_if": nested_if,
+    "nested_while": nested_while,
+    "functions": functions,
+    "deep_expr": deep_expr,
+    "mixed": mixed,
+}
+
+
+def generate(shape, size, seed=0):
+    """Returns the source of a ``shape`` program of the given size."""
+    rng = random.Random(seed)
+    return "\n".join(prelude() + SHAPES[shape](rng, size)) + "\n"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in SHAPES:
+        print(f"Usage: python {sys.argv[0]} <{'|'.join(SHAPES)}> <size> [seed]")
+        sys.exit(1)
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    sys.stdout.write(generate(sys.argv[1], int(sys.argv[2]), seed))
@@ -0,0 +1,155 @@
+"""
+Command line options shared by main.py, batch.py and the compile client.
+The run options (``add_run_options``) are those of main.py and the client
+only.
+
+Kept free of compiler imports so the client starts without loading the
+lexer and parser.
+"""
+import argparse
+
+from utils.compile_cache import DEFAULT_MAX_BYTES
+
+# Keys of main.LEXERS
+LEXER_NAMES = ("dfa", "ply")
+# Names of tac.peephole.PATTERNS
+PEEPHOLE_PATTERNS = ("direct-store", "jump-to-next", "redundant-copy")
+
+
+def peephole_patterns(value):
+    """Parses the comma-separated pattern names of --peephole-patterns."""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    for name in names:
+        if name not in PEEPHOLE_PATTERNS:
+            choices = ", ".join(PEEPHOLE_PATTERNS)
+            raise argparse.ArgumentTypeError(
+                f"unknown pattern '{name}' (choose from {choices})"
+            )
+    return names
+
+
+def add_compiler_options(arg_parser):
+    """Adds the options shared by main.py, the batch driver and the client."""
+    arg_parser.add_argument(
+        "--lexer",
+        choices=LEXER_NAMES,
+        default="ply",
+        help="lexer engine to use (default: ply)",
+    )
+    arg_parser.add_argument(
+        "--no-fold",
+        dest="fold_constants",
+        action="store_false",
+        help="disable constant folding and dead branch elimination",
+    )
+    arg_parser.add_argument(
+        "--no-temp-reuse",
+        dest="reuse_temps",
+        action="store_false",
+        help="give every temp its own slot instead of reusing dead ones",
+    )
+    arg_parser.add_argument(
+        "-O",
+        "--optimize",
+        action="store_true",
+        help="run the TAC optimizations (inlining, jump threading, unreachable "
+        "code, copy propagation, dead stores, loop invariants, strength "
+        "reduction)",
+    )
+    # A flag and a separate option with the list: an optional value would
+    # take the input file that follows --peephole
+    arg_parser.add_argument(
+        "--peephole",
+        action="store_const",
+        const=list(PEEPHOLE_PATTERNS),
+        default=[],
+        help="run all the peephole patterns over the TAC",
+    )
+    arg_parser.add_argument(
+        "--peephole-patterns",
+        dest="peephole",
+        type=peephole_patterns,
+        metavar="LIST",
+        help="run only the listed peephole patterns, comma-separated "
+        f"({', '.join(PEEPHOLE_PATTERNS)})",
+    )
+    arg_parser.add_argument(
+        "--bytecode",
+        action="store_true",
+        help="also write the TAC as binary bytecode to <output_file_prefix>.tacb",
+    )
+    for limit, description in (
+        ("max-depth", "collapse .dot nodes at this depth"),
+        ("max-nodes", "stop drawing .dot nodes after this many"),
+        ("max-children", "draw at most this many children per .dot node"),
+    ):
+        arg_parser.add_argument(
+            f"--dot-{limit}", type=int, metavar="N", help=description
+        )
+    arg_parser.add_argument(
+        "--cache-dir",
+        help="reuse outputs of unchanged sources from this compile cache directory",
+    )
+    arg_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="compile cache size limit in MiB (default: %(default)s)",
+    )
+
+
+def add_run_options(arg_parser):
+    """Adds the options of main.py and the client on how the compile runs."""
+    arg_parser.add_argument(
+        "--stats",
+        metavar="FILE",
+        help="write per-phase time, peak memory and counters to FILE as JSON",
+    )
+    arg_parser.add_argument(
+        "--stats-no-memory",
+        dest="stats_memory",
+        action="store_false",
+        help="skip the tracemalloc peaks, which slow down every phase",
+    )
+    arg_parser.add_argument(
+        "--profile", metavar="FILE", help="write cProfile stats of the compile to FILE"
+    )
+    arg_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="compile one top-level statement at a time in bounded memory "
+        "(no compile cache; the .dot file only with --stream-dot)",
+    )
+    arg_parser.add_argument(
+        "--stream-dot",
+        action="store_true",
+        help="also write the .dot file in --stream mode",
+    )
+
+
+def run_options(args):
+    """Extracts the ``main.run_compile`` keyword arguments from parsed options."""
+    return {
+        "stream": args.stream,
+        "write_dot": args.stream_dot,
+        "stats_file": args.stats,
+        "stats_memory": args.stats_memory,
+        "profile_file": args.profile,
+    }
+
+
+def compiler_options(args):
+    """Extracts the ``compile_source`` keyword arguments from parsed options."""
+    return {
+        "lexer": args.lexer,
+        "fold_constants": args.fold_constants,
+        "reuse_temps": args.reuse_temps,
+        "optimize": args.optimize,
+        "peephole": args.peephole,
+        "bytecode": args.bytecode,
+        "dot_limits": {
+            "max_depth": args.dot_max_depth,
+            "max_nodes": args.dot_max_nodes,
+            "max_children": args.dot_max_children,
+        },
+    }
@@ -0,0 +1,94 @@
+"""
+Thin client for the compile server (server.py).
+
+Takes the same arguments as main.py and prints the same output, but sends
+the compile to a running server instead of loading the compiler. If no
+server is listening, it compiles in-process like main.py. With a server,
+--stats and --profile measure the compile done in the server process.
+
+Usage: python client.py [--socket PATH] [main.py options] <input> <output_prefix>
+       python client.py --stop-server
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cli_options import (
+    add_compiler_options,
+    add_run_options,
+    compiler_options,
+    run_options,
+)
+
+# Same default as server.DEFAULT_SOCKET, without importing the compiler
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"jlc-{os.getuid()}.sock")
+
+
+def send(path, request):
+    """Sends one request to the server; returns its response, or None if down."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        usage="python client.py [--socket PATH] [main.py options] "
+        "<input_file> <output_file_prefix>"
+    )
+    arg_parser.add_argument("input_file", nargs="?")
+    arg_parser.add_argument("output_file_prefix", nargs="?")
+    arg_parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    arg_parser.add_argument(
+        "--stop-server", action="store_true", help="ask the server to exit"
+    )
+    add_compiler_options(arg_parser)
+    add_run_options(arg_parser)
+    args = arg_parser.parse_args()
+
+    if args.stop_server:
+        if send(args.socket, {"command": "stop"}) is None:
+            print(f"Error: No compile server on {args.socket}.")
+            sys.exit(1)
+        sys.exit(0)
+    if args.output_file_prefix is None:
+        arg_parser.error("input_file and output_file_prefix are required")
+
+    cache = None
+    if args.cache_dir is not None:
+        cache = [os.path.abspath(args.cache_dir), args.cache_size * 1024 * 1024]
+    request = {
+        "command": "compile",
+        "cwd": os.getcwd(),
+        "input_file": args.input_file,
+        "output_file_prefix": args.output_file_prefix,
+        "options": compiler_options(args),
+        "cache": cache,
+        "run": run_options(args),
+    }
+    response = send(args.socket, request)
+    if response is None:
+        # No server: fall back to compiling in this process
+        import main
+
+        status = main.run_compile(
+            args.input_file,
+            args.output_file_prefix,
+            cache=main.open_cache(args),
+            **run_options(args),
+            **compiler_options(args),
+        )
+        sys.exit(status)
+
+    print(response["log"], end="")
+    sys.exit(response["status"])
@@ -0,0 +1,326 @@
+"""
+Incremental recompilation of an edited source.
+
+``IncrementalCompiler`` keeps the top-level statements of the last version
+of a source, with the source span of each and a snapshot of the visitor
+state (symbols, label and temp counters, code length) taken before it was
+visited. ``edit`` then:
+
+* re-lexes and re-parses only the statements the edit overlaps, together
+  with the unchanged statement on each side. Expressions may run on across
+  lines, so an edit can join or split statements; a neighbour that parses
+  back to its old span shows that no boundary moved. Otherwise the region
+  grows and is parsed again, up to the whole source;
+* revisits the new statements from the snapshot taken before them, then
+  the following ones only until the state matches their old snapshot.
+  From there on the old TAC is reused as is.
+
+The AST, TAC and symbol table are the same as those of a full compile of
+the edited source. Diagnostics are printed for revisited statements only.
+"""
+import contextlib
+import io
+from bisect import bisect_left, bisect_right
+
+from lexer.line_index import LineIndex
+from lexer.token_stream import TokenStream
+from main import LEXERS, format_tac
+from semantic.visitor import ASTVisitor
+from syntactic import parser as grammar
+from syntactic.ast_nodes import Node
+from syntactic.tables import load_parser
+from tac.allocator import allocate_temps
+
+
+def shift_positions(node, delta):
+    """Moves the ``lexpos`` of every node in a subtree by ``delta``."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        if node.lexpos is not None:
+            node.lexpos += delta
+        stack.extend(node.children)
+
+
+class IncrementalCompiler:
+    """
+    Compiles ``code`` once, then recompiles it after each ``edit``. The
+    results are ``ast``, ``tac_code`` and ``symbol_table``, or ``outputs()``
+    for the files ``main`` writes. ``reparsed`` and ``revisited`` count the
+    statements the last edit parsed and visited again.
+
+    With ``reuse_temps``, temp slots are allocated per statement: temps
+    never live across top-level statements, so this gives the same code as
+    allocating the whole program, and the code of a statement no longer
+    depends on how many temps the statements before it used.
+    """
+
+    def __init__(self, code, lexer="ply", fold_constants=True, reuse_temps=True):
+        self.lexer = lexer
+        self.fold_constants = fold_constants
+        self.reuse_temps = reuse_temps
+        # The main parser, except that top-level statements record their span
+        self._parser = load_parser(grammar)
+        for production in self._parser.productions:
+            if production.func == "p_statement_list":
+                production.callable = self._statement_list
+        self._parser.errorfunc = self._syntax_error
+        self._spans = {}
+        self._errors = 0
+        self.errors = 0  # Syntax errors in the current source
+        self.code = ""
+        self._reset()
+        self.ok = self.edit(0, 0, code)
+
+    def _reset(self):
+        """Forgets every statement, so that the next edit compiles from scratch."""
+        self.nodes = []
+        self.starts = []
+        self.ends = []
+        self.shifts = []  # Pending lexpos shift of each statement's nodes
+        self.slots = []  # Temp slots each statement needs, with reuse_temps
+        self.visitor = ASTVisitor(fold_constants=self.fold_constants)
+        self.tac_starts = [0]  # Code length before each statement, and at the end
+        self.states = [self._snapshot()]
+
+    @property
+    def tac_code(self):
+        return self.visitor.tac_code
+
+    @property
+    def symbol_table(self):
+        return self.visitor.symbol_table
+
+    @property
+    def ast(self):
+        for i, delta in enumerate(self.shifts):
+            if delta:
+                shift_positions(self.nodes[i], delta)
+                self.shifts[i] = 0
+        return Node("program", (Node("statement_list", list(self.nodes)),))
+
+    def temp_count(self):
+        """Returns the number of temps (or temp slots) the code uses."""
+        if self.reuse_temps:
+            return max(self.slots, default=0)
+        return self.visitor.symbol_table.temp_var_count
+
+    def outputs(self):
+        """Returns the symbol table and TAC file contents, keyed by suffix."""
+        symbols = self.visitor.symbol_table
+        return {
+            "_symbol_table.txt": symbols.to_string(),
+            ".tac": format_tac(
+                symbols.total_var_size, self.temp_count(), self.visitor.tac_code
+            ),
+        }
+
+    def _statement_list(self, p):
+        grammar.p_statement_list(p)
+        statement = p[len(p) - 1]
+        if statement is not None:
+            start, last = p.lexspan(len(p) - 1)
+            stream = p.lexer
+            end = stream.ends[bisect_left(stream.starts, last)]
+            self._spans[id(statement)] = (start, end)
+
+    def _syntax_error(self, p):
+        self._errors += 1
+        grammar.p_error(p)
+
+    def _parse(self, start, end):
+        """
+        Parses ``code[start:end]``. Returns its top-level statements (None
+        if no AST was built) and their spans, the number of syntax errors
+        and the diagnostics printed.
+        """
+        self._spans = {}
+        self._errors = 0
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            stream = TokenStream(
+                LEXERS[self.lexer], self.code, start, end, self.line_index.line(start)
+            )
+            stream.line_index = self.line_index
+            ast = self._parser.parse(lexer=stream, tracking=True)
+        statements = spans = None
+        if ast:
+            statements = ast.children[0].children
+            spans = [self._spans[id(statement)] for statement in statements]
+        self._spans = {}
+        return statements, spans, self._errors, log.getvalue()
+
+    def edit(self, start, end, text):
+        """
+        Replaces ``code[start:end]`` with ``text`` and recompiles. Returns
+        False if parsing failed, like ``main`` does; the syntax errors are
+        printed. While the source has syntax errors, PLY's error recovery
+        decides the statements, so edits parse the whole source again.
+        """
+        old_length = len(self.code)
+        self.code = self.code[:start] + text + self.code[end:]
+        self.line_index = LineIndex.from_text(self.code)
+        delta = len(self.code) - old_length
+        starts, ends = self.starts, self.ends
+        count = len(starts)
+
+        # Statements [first, last) overlap the edit
+        first = bisect_left(ends, start)
+        last = bisect_right(starts, end)
+        if self.errors:
+            first, last = 0, count
+        step = 1
+        while True:
+            left, right = first > 0, last < count
+            lo = starts[first - 1] if left else 0
+            hi = ends[last] + delta if right else len(self.code)
+            statements, spans, errors, log = self._parse(lo, hi)
+            if not (left or right):
+                break  # The whole source: the result stands, errors or not
+            if not errors and statements is not None and len(spans) >= left + right:
+                grow_left = left and spans[0] != (starts[first - 1], ends[first - 1])
+                grow_right = right and spans[-1] != (
+                    starts[last] + delta,
+                    ends[last] + delta,
+                )
+                if not (grow_left or grow_right):
+                    break
+            else:
+                grow_left, grow_right = left, right
+            if grow_left:
+                first = max(first - step, 0)
+            if grow_right:
+                last = min(last + step, count)
+            step *= 2
+
+        print(log, end="")
+        self.errors = errors
+        if statements is None:
+            self._reset()
+            self.reparsed = self.revisited = 0
+            return False
+        stop = len(statements) - right
+        self.reparsed = len(statements)
+        self._replace(first, last, statements[left:stop], spans[left:stop], delta)
+        return True
+
+    def _replace(self, first, last, nodes, spans, delta):
+        """Splices in ``nodes`` for the old statements [first, last) and revisits."""
+        if delta:
+            self.starts[last:] = [start + delta for start in self.starts[last:]]
+            self.ends[last:] = [end + delta for end in self.ends[last:]]
+            self.shifts[last:] = [shift + delta for shift in self.shifts[last:]]
+        self.nodes[first:last] = nodes
+        self.starts[first:last] = [span[0] for span in spans]
+        self.ends[first:last] = [span[1] for span in spans]
+        self.shifts[first:last] = [0] * len(nodes)
+        self.slots[first:last] = [0] * len(nodes)
+
+        old_states, old_tac_starts = self.states, self.tac_starts
+        visitor = self.visitor
+        visitor.line_index = self.line_index
+        tac_code = visitor.tac_code
+        tail = tac_code[old_tac_starts[last] :]
+        self._restore(old_states[first])
+        del tac_code[old_tac_starts[first] :]
+
+        states = old_states[:first]
+        tac_starts = old_tac_starts[:first]
+        index = first
+        for _ in nodes:
+            states.append(self._snapshot(states[-1] if states else None))
+            tac_starts.append(len(tac_code))
+            self._visit(index)
+            index += 1
+
+        # Old statements are revisited until the state before one of them is
+        # unchanged: everything from there on would come out the same.
+        old = last
+        while True:
+            state = self._snapshot(states[-1] if states else None)
+            if state == old_states[old]:
+                shift = len(tac_code) - old_tac_starts[old]
+                tac_code.extend(tail[old_tac_starts[old] - old_tac_starts[last] :])
+                states.extend(old_states[old:])
+                tac_starts.extend(start + shift for start in old_tac_starts[old:])
+                self._restore(states[-1])
+                break
+            states.append(state)
+            tac_starts.append(len(tac_code))
+            if old == len(old_states) - 1:
+                break  # Revisited up to the end of the source
+            if self.shifts[index]:
+                shift_positions(self.nodes[index], self.shifts[index])
+                self.shifts[index] = 0
+            self._visit(index)
+            index += 1
+            old += 1
+
+        self.revisited = len(nodes) + old - last
+        self.states, self.tac_starts = states, tac_starts
+
+    def _visit(self, index):
+        visitor = self.visitor
+        start = len(visitor.tac_code)
+        visitor.visit(self.nodes[index])
+        if self.reuse_temps:
+            code, self.slots[index] = allocate_temps(visitor.tac_code[start:])
+            visitor.tac_code[start:] = code
+            visitor.symbol_table.temp_var_count = 0
+
+    def _snapshot(self, previous=None):
+        """
+        The visitor state between two top-level statements, as a tuple. Most
+        statements add no symbol, so the symbols are shared with ``previous``
+        (the snapshot before) when they are equal.
+        """
+        table = self.visitor.symbol_table
+        symbols = tuple(
+            (
+                scope,
+                tuple(
+                    (
+                        name,
+                        info["type"],
+                        info["offset"],
+                        info["pinned"],
+                        info.get("params"),
+                    )
+                    for name, info in names.items()
+                ),
+            )
+            for scope, names in table.symbols.items()
+        )
+        if previous is not None and symbols == previous[3]:
+            symbols = previous[3]
+        return (
+            self.visitor.label_count,
+            table.temp_var_count,
+            table.total_var_size,
+            symbols,
+        )
+
+    def _restore(self, state):
+        label_count, temp_count, var_size, symbols = state
+        table = self.visitor.symbol_table
+        self.visitor.label_count = label_count
+        table.temp_var_count = temp_count
+        table.total_var_size = var_size
+        table.symbols = {
+            scope: {
+                name: {
+                    "type": type,
+                    "size": 8,
+                    "offset": offset,
+                    "location": f"{offset:03d}(SP)",
+                    "pinned": pinned,
+                    "params": params,  # None but for functions
+                }
+                for name, type, offset, pinned, params in names
+            }
+            for scope, names in symbols
+        }
+        table.scope_stack = ["global"]
+        table.reindex()
@@ -0,0 +1,193 @@
+import copy
+import re
+
+from ply.lex import LexToken
+
+from .lexer import reserved, starts_line
+from .line_index import LineIndex
+
+# Character classes used by the first-character dispatch table.
+_IGNORE = 0
+_NEWLINE = 1
+_DIGIT = 2
+_ALPHA = 3
+_QUOTE = 4
+_COMMENT = 5
+_OPERATOR = 6
+
+_CHAR_CLASS = {}
+for _c in " \t":
+    _CHAR_CLASS[_c] = _IGNORE
+_CHAR_CLASS["\n"] = _NEWLINE
+for _c in "0123456789":
+    _CHAR_CLASS[_c] = _DIGIT
+for _c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_":
+    _CHAR_CLASS[_c] = _ALPHA
+_CHAR_CLASS['"'] = _QUOTE
+_CHAR_CLASS["#"] = _COMMENT
+
+# Operator DFA: start character -> (accepting type or None, {next char: type}).
+# Every operator is at most two characters long, so one transition is enough
+# to implement maximal munch.
+_OPERATORS = {
+    "+": ("PLUS", {"=": "PLUS_ASSIGN"}),
+    "-": ("MINUS", {"=": "MINUS_ASSIGN"}),
+    "*": ("TIMES", {"=": "TIMES_ASSIGN"}),
+    "/": ("DIVIDE", {"=": "DIVIDE_ASSIGN"}),
+    "%": ("MOD", {}),
+    "=": ("ASSIGN", {"=": "EQ"}),
+    "!": (None, {"=": "NE"}),
+    "<": ("LT", {"=": "LE"}),
+    ">": ("GT", {"=": "GE"}),
+    "(": ("LPAREN", {}),
+    ")": ("RPAREN", {}),
+    "{": ("LBRACE", {}),
+    "}": ("RBRACE", {}),
+    ",": ("COMMA", {}),
+    ";": ("SEMICOLON", {}),
+}
+for _c in _OPERATORS:
+    _CHAR_CLASS[_c] = _OPERATOR
+
+# Run scanners for the multi-character token bodies, anchored at a position.
+_IGNORE_RUN = re.compile(r"[ \t]+")
+_NEWLINE_RUN = re.compile(r"\n+")
+_NUMBER = re.compile(r"\d+(\.\d+)?")
+_IDENT = re.compile(r"[a-zA-Z_][a-zA-Z_0-9]*")
+_STRING = re.compile(r"\"(?:[^\\\n\"]|\\.)*\"")
+_COMMENT_RUN = re.compile(r"#.*")
+
+
+class DFALexer:
+    """
+    Hand-written scanner that is a drop-in replacement for the PLY lexer.
+
+    Each token is recognised by dispatching on its first character through
+    a class table; operators are resolved by a small transition table and
+    identifier, number and string bodies by anchored run matches. Token
+    types, values, ``lineno`` and ``lexpos`` match those of ``lexer.lexer``,
+    and line starts are recorded in ``line_index`` while scanning.
+    """
+
+    def __init__(self):
+        self.lexdata = None
+        self.lexpos = 0
+        self.lexlen = 0
+        self.lineno = 1
+        self.line_index = LineIndex()
+
+    def input(self, data):
+        self.lexdata = data
+        self.lexpos = 0
+        self.lexlen = len(data)
+        self.line_index = LineIndex()
+
+    def clone(self):
+        return copy.copy(self)
+
+    def skip(self, n):
+        self.lexpos += n
+
+    def token(self):
+        data = self.lexdata
+        pos = self.lexpos
+        end = self.lexlen
+        char_class = _CHAR_CLASS
+
+        while pos < end:
+            ch = data[pos]
+            cls = char_class.get(ch)
+
+            if cls == _IGNORE:
+                pos += 1
+                if pos < end and data[pos] in " \t":
+                    pos = _IGNORE_RUN.match(data, pos).end()
+                continue
+
+            if cls == _NEWLINE:
+                run_end = _NEWLINE_RUN.match(data, pos).end()
+                self.lineno += run_end - pos
+                self.line_index.add_newlines(pos, run_end - pos)
+                pos = run_end
+                continue
+
+            if cls == _ALPHA:
+                m = _IDENT.match(data, pos)
+                value = m.group()
+                tok = LexToken()
+                tok.type = reserved.get(value, "ID")
+                tok.value = value
+                tok.lineno = self.lineno
+                tok.lexpos = pos
+                self.lexpos = m.end()
+                return tok
+
+            if cls == _OPERATOR:
+                accept, transitions = _OPERATORS[ch]
+                if pos + 1 < end:
+                    longer = transitions.get(data[pos + 1])
+                    if longer is not None:
+                        tok = LexToken()
+                        tok.type = longer
+                        tok.value = data[pos : pos + 2]
+                        tok.lineno = self.lineno
+                        tok.lexpos = pos
+                        self.lexpos = pos + 2
+                        return tok
+                if accept is not None:
+                    if accept == "LPAREN" and starts_line(data, pos):
+                        accept = "LINE_LPAREN"
+                    tok = LexToken()
+                    tok.type = accept
+                    tok.value = ch
+                    tok.lineno = self.lineno
+                    tok.lexpos = pos
+                    self.lexpos = pos + 1
+                    return tok
+
+            elif cls == _DIGIT or (cls is None and ch.isdecimal()):
+                m = _NUMBER.match(data, pos)
+                tok = LexToken()
+                if m.group(1):
+                    tok.type = "FLOAT"
+                    tok.value = float(m.group())
+                else:
+                    tok.type = "INTEGER"
+                    tok.value = int(m.group())
+                tok.lineno = self.lineno
+                tok.lexpos = pos
+                self.lexpos = m.end()
+                return tok
+
+            elif cls == _QUOTE:
+                m = _STRING.match(data, pos)
+                if m:
+                    tok = LexToken()
+                    tok.type = "STRING"
+                    tok.value = m.group()
+                    tok.lineno = self.lineno
+                    tok.lexpos = pos
+                    self.lexpos = m.end()
+                    return tok
+
+            elif cls == _COMMENT:
+                pos = _COMMENT_RUN.match(data, pos).end()
+                continue
+
+            print(f"Illegal character '{ch}' at line {self.lineno}")
+            pos += 1
+
+        self.lexpos = pos
+        return None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        t = self.token()
+        if t is None:
+            raise StopIteration
+        return t
+
+
+lexer = DFALexer()
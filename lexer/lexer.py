@@ -1,5 +1,7 @@
 import ply.lex as lex
 
+from .line_index import LineIndex
+
 reserved = {
     "if": "IF",
     "elseif": "ELSEIF",
@@ -32,6 +34,7 @@ tokens = [
     "GT",
     "GE",
     "LPAREN",
+    "LINE_LPAREN",
     "RPAREN",
     "LBRACE",
     "RBRACE",
@@ -56,7 +59,6 @@ t_LT = r"<"
 t_LE = r"<="
 t_GT = r">"
 t_GE = r">="
-t_LPAREN = r"\("
 t_RPAREN = r"\)"
 t_LBRACE = r"\{"
 t_RBRACE = r"\}"
@@ -88,9 +90,26 @@ def t_ID(t):
     return t
 
 
+def starts_line(data, pos):
+    """True if only blanks come before ``pos`` on its line."""
+    while pos and data[pos - 1] in " \t":
+        pos -= 1
+    return not pos or data[pos - 1] == "\n"
+
+
+def t_LPAREN(t):
+    r"\("
+    # A "(" starting a line starts an expression; it cannot continue a call
+    # of the name that ends the line before
+    if starts_line(t.lexer.lexdata, t.lexpos):
+        t.type = "LINE_LPAREN"
+    return t
+
+
 def t_NEWLINE(t):
     r"\n+"
     t.lexer.lineno += len(t.value)
+    t.lexer.line_index.add_newlines(t.lexpos, len(t.value))
     pass
 
 
@@ -108,3 +127,4 @@ def t_error(t):
 
 
 lexer = lex.lex()
+lexer.line_index = LineIndex()
@@ -0,0 +1,40 @@
+import bisect
+import re
+from array import array
+
+_NEWLINE = re.compile("\n")
+
+
+class LineIndex:
+    """
+    Offsets at which each source line starts, filled in by the lexer while
+    scanning. Lookups bisect the offsets, so mapping a ``lexpos`` to its
+    line and column is O(log n) regardless of line length.
+    """
+
+    def __init__(self):
+        self.line_starts = array("I", [0])
+
+    @classmethod
+    def from_text(cls, text):
+        """Builds the index of a whole source without lexing it."""
+        index = cls()
+        index.line_starts.extend(m.end() for m in _NEWLINE.finditer(text))
+        return index
+
+    def add_newlines(self, lexpos, count):
+        """Records ``count`` consecutive newlines starting at ``lexpos``."""
+        self.line_starts.extend(range(lexpos + 1, lexpos + count + 1))
+
+    def line(self, lexpos):
+        """Returns the 1-based line containing ``lexpos``."""
+        return bisect.bisect_right(self.line_starts, lexpos)
+
+    def column(self, lexpos):
+        """Returns the 1-based column of ``lexpos`` within its line."""
+        return self.position(lexpos)[1]
+
+    def position(self, lexpos):
+        """Returns the ``(line, column)`` pair for ``lexpos``, both 1-based."""
+        line = bisect.bisect_right(self.line_starts, lexpos)
+        return line, lexpos - self.line_starts[line - 1] + 1
@@ -0,0 +1,193 @@
+import sys
+from array import array
+
+from ply.lex import LexToken
+
+from .lexer import tokens
+from .line_index import LineIndex
+
+# Token type <-> kind code used in the compact buffer.
+TOKEN_TYPES = tuple(tokens)
+TOKEN_KINDS = {name: code for code, name in enumerate(TOKEN_TYPES)}
+
+
+class TokenStream:
+    """
+    Lexes a source once and replays the buffered tokens to every consumer.
+
+    Tokens are stored as a struct of arrays: a kind code, start/end offsets
+    into the source and a line number per token. ``LexToken`` objects are
+    only materialized on demand, with values sliced lazily from the source,
+    so the buffer costs a few bytes per token instead of a full object.
+
+    The stream can be iterated directly (e.g. for the token dump) and also
+    exposes the ``token()`` interface, so it can be handed to
+    ``parser.parse(lexer=stream)`` without lexing the source a second time.
+    ``line_index`` maps any ``lexpos`` of the source to its line and column.
+
+    ``start``/``end`` restrict lexing to ``data[start:end]`` (``lineno`` is
+    the line ``start`` is on); token positions stay offsets into ``data``.
+    """
+
+    def __init__(self, lexer, data, start=0, end=None, lineno=1):
+        lexer.lineno = lineno
+        lexer.line_index = LineIndex()
+        lexer.input(data)
+        if start or end is not None:
+            lexer.lexpos = start
+            lexer.lexlen = len(data) if end is None else end
+        self.lexdata = data
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.lines = array("I")
+
+        kinds_append = self.kinds.append
+        starts_append = self.starts.append
+        ends_append = self.ends.append
+        lines_append = self.lines.append
+        token_kinds = TOKEN_KINDS
+        next_token = lexer.token
+        while True:
+            tok = next_token()
+            if tok is None:
+                break
+            kinds_append(token_kinds[tok.type])
+            starts_append(tok.lexpos)
+            ends_append(lexer.lexpos)
+            lines_append(tok.lineno)
+
+        self.line_index = lexer.line_index
+        self.lineno = lineno  # Read by PLY's position tracking on empty rules
+        self.lexpos = 0
+        self._index = 0
+
+    def input(self, data):
+        if data != self.lexdata:
+            raise ValueError("TokenStream can only replay the source it was built from")
+        self.rewind()
+
+    def rewind(self):
+        self._index = 0
+        self.lexpos = 0
+
+    def type(self, index):
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def value(self, index):
+        text = self.lexdata[self.starts[index] : self.ends[index]]
+        kind = TOKEN_TYPES[self.kinds[index]]
+        if kind == "INTEGER":
+            return int(text)
+        if kind == "FLOAT":
+            return float(text)
+        if kind == "ID":
+            # Identifiers repeat heavily; interning shares one string per name.
+            return sys.intern(text)
+        return text
+
+    def make_token(self, index):
+        """Materializes the token at ``index`` as a PLY ``LexToken``."""
+        tok = LexToken()
+        tok.type = TOKEN_TYPES[self.kinds[index]]
+        tok.value = self.value(index)
+        tok.lineno = self.lines[index]
+        tok.lexpos = self.starts[index]
+        return tok
+
+    def token(self):
+        index = self._index
+        if index >= len(self.kinds):
+            return None
+        self._index = index + 1
+        self.lexpos = self.starts[index]
+        return self.make_token(index)
+
+    def nbytes(self):
+        """Returns the memory held by the token arrays, in bytes."""
+        return sum(
+            buf.itemsize * len(buf)
+            for buf in (self.kinds, self.starts, self.ends, self.lines)
+        )
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __bool__(self):
+        # PLY falls back to its default lexer when handed a falsy one
+        return True
+
+    def __iter__(self):
+        return map(self.make_token, range(len(self.kinds)))
+
+
+class TokenReader:
+    """
+    Lexes a source file a chunk at a time and hands its tokens to the parser
+    through the ``token()`` interface, for compiling in bounded memory.
+
+    Chunks end after a newline (no token spans lines), so only the tokens
+    of the current chunk are held. Token positions are offsets into the
+    whole file, and ``line_index`` grows by one entry per line. Each chunk
+    of tokens is passed to ``on_chunk``, if given, as soon as it is lexed.
+    """
+
+    CHUNK_SIZE = 1 << 14
+
+    def __init__(self, lexer, file, on_chunk=None, chunk_size=CHUNK_SIZE):
+        self.lexer = lexer
+        self.file = file
+        self.on_chunk = on_chunk
+        self.chunk_size = chunk_size
+        self.line_index = LineIndex()
+        self.lineno = 1
+        self.lexpos = 0
+        self.count = 0  # Tokens lexed so far
+        self.size = 0  # Characters lexed so far
+        self._rest = ""  # Start of a line read past the current chunk
+        self._tokens = []
+        self._index = 0
+
+    def _next_chunk(self):
+        """Lexes the next run of whole lines; returns False at the end of file."""
+        data = self._rest
+        while True:
+            block = self.file.read(self.chunk_size)
+            data += block
+            cut = data.rfind("\n") + 1
+            if cut or not block:
+                break
+        if not block:
+            cut = len(data)
+        chunk, self._rest = data[:cut], data[cut:]
+        if not chunk:
+            return False
+
+        offset = self.size
+        self.size += len(chunk)
+        lexer = self.lexer
+        lexer.lineno = self.line_index.line(offset)
+        lexer.line_index = LineIndex()
+        lexer.input(chunk)
+        tokens = list(iter(lexer.token, None))
+        for tok in tokens:
+            tok.lexpos += offset
+        self.line_index.line_starts.extend(
+            start + offset for start in lexer.line_index.line_starts[1:]
+        )
+        self.count += len(tokens)
+        self._tokens = tokens
+        self._index = 0
+        if self.on_chunk is not None:
+            self.on_chunk(tokens)
+        return True
+
+    def token(self):
+        while self._index >= len(self._tokens):
+            if not self._next_chunk():
+                return None
+        tok = self._tokens[self._index]
+        self._index += 1
+        self.lexpos = tok.lexpos
+        self.lineno = tok.lineno
+        return tok
@@ -1,73 +1,321 @@
+import argparse
+import contextlib
+import cProfile
+import io
 import sys
 import os
 
 # Adjust path to import from subdirectories
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from lexer.lexer import lexer
+from cli_options import (
+    add_compiler_options,
+    add_run_options,
+    compiler_options,
+    run_options,
+)
+from lexer.lexer import lexer as ply_lexer
+from lexer.dfa_lexer import lexer as dfa_lexer
+from lexer.token_stream import TokenStream
 from syntactic.parser import parser
 from semantic.visitor import ASTVisitor
-from utils.dot_generator import generate_dot
+from tac.allocator import allocate_temps
+from tac.bytecode import TACRuntimeError, assemble
+from tac.optimize import optimize as optimize_tac, temp_slots
+from tac.peephole import peephole as peephole_tac, report as peephole_report
+from utils.compile_cache import CompileCache
+from utils.dot_generator import generate_dot, subtree_size
+from utils.instrumentation import Instrumentation, no_phase
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python main.py <input_file> <output_file_prefix>")
-        sys.exit(1)
+LEXERS = {"ply": ply_lexer, "dfa": dfa_lexer}
+
+# Output file suffix and description, in the order the files are written
+OUTPUTS = (
+    ("_tokens.txt", "Tokens"),
+    (".dot", "AST .dot file"),
+    ("_symbol_table.txt", "Symbol table"),
+    (".tac", "TAC code"),
+    (".tacb", "Bytecode"),
+)
+
+
+def format_tokens(tokens, line_index):
+    """Formats the token dump; ``line_index`` gives the token columns."""
+    lines = []
+    for tok in tokens:
+        col = line_index.column(tok.lexpos)
+        lines.append(
+            f"{tok.type:<10}: {tok.value:<20} line {tok.lineno:<5} column {col}\n"
+        )
+    return "".join(lines)
+
+
+def format_tac_header(var_size, temp_count):
+    """Formats the two frame sizes that start the .tac file."""
+    return f"{var_size}\n{temp_count * 8}\n"  # Assuming 8 bytes per temp
 
-    input_file_path = sys.argv[1]
-    output_prefix = sys.argv[2]
 
+def format_instructions(tac_code, start=0):
+    """Formats TAC instructions as numbered lines, counting from ``start``."""
+    return "".join(f"{i:03d}: {line}\n" for i, line in enumerate(tac_code, start))
+
+
+def format_tac(var_size, temp_count, tac_code):
+    """Formats the .tac file: the two frame sizes, then numbered instructions."""
+    return format_tac_header(var_size, temp_count) + format_instructions(tac_code)
+
+
+def format_bytecode(var_size, temp_count, tac_code):
+    """
+    Assembles the .tacb file (see ``tac.bytecode``). Returns None, after
+    printing why, if the TAC cannot be assembled.
+    """
+    try:
+        return assemble(tac_code, var_size, temp_count * 8).to_bytes()
+    except TACRuntimeError as e:
+        print(f"Error: {e}. No bytecode generated.")
+        return None
+
+
+def compile_source(
+    code,
+    lexer="ply",
+    fold_constants=True,
+    reuse_temps=True,
+    optimize=False,
+    peephole=(),
+    dot_limits=None,
+    bytecode=False,
+    stats=None,
+):
+    """
+    Runs every phase of the compiler on ``code`` and returns the contents of
+    the output files keyed by suffix (see ``OUTPUTS``). Only the token dump
+    is produced when parsing fails. ``peephole`` lists the patterns of
+    ``tac.peephole`` to run over the TAC, and ``optimize`` runs the passes
+    of ``tac.optimize`` after them, before temp allocation. ``dot_limits``
+    holds the ``max_depth``, ``max_nodes`` and ``max_children`` options of
+    ``generate_dot``. ``bytecode`` adds the .tacb file, as bytes. Phases
+    and counters are recorded in ``stats``, an ``Instrumentation``, if
+    given.
+    """
+    phase = stats.phase if stats is not None else no_phase
+    outputs = {}
+
+    # Lex once; the token dump and the parser both replay the buffered stream
+    with phase("lex"):
+        stream = TokenStream(LEXERS[lexer], code)
+    with phase("token dump"):
+        outputs["_tokens.txt"] = format_tokens(stream, stream.line_index)
+
+    with phase("parse"):
+        ast = parser.parse(lexer=stream)
+    if stats is not None:
+        stats.count("tokens", len(stream))
+    if not ast:
+        return outputs
+
+    with phase("dot"):
+        dot_output = io.StringIO()
+        generate_dot(ast, dot_output, **(dot_limits or {}))
+        outputs[".dot"] = dot_output.getvalue()
+
+    with phase("semantic/TAC"):
+        visitor = ASTVisitor(stream.line_index, fold_constants)
+        visitor.visit(ast)
+    temp_count = visitor.symbol_table.temp_var_count
+    collapsed = {}
+    if peephole:
+        with phase("peephole"):
+            visitor.tac_code, collapsed = peephole_tac(visitor.tac_code, peephole)
+        print(peephole_report(collapsed))
+    removed = {}
+    if optimize:
+        with phase("optimize"):
+            visitor.tac_code, removed = optimize_tac(visitor.tac_code)
+            # Strength reduction adds temps
+            temp_count = max(temp_count, temp_slots(visitor.tac_code))
+            visitor.symbol_table.temp_var_count = temp_count
+    if reuse_temps:
+        with phase("temp alloc"):
+            visitor.tac_code, visitor.symbol_table.temp_var_count = allocate_temps(
+                visitor.tac_code
+            )
+
+    with phase("symbol table"):
+        outputs["_symbol_table.txt"] = visitor.symbol_table.to_string()
+    with phase("TAC format"):
+        outputs[".tac"] = format_tac(
+            visitor.symbol_table.total_var_size,
+            visitor.symbol_table.temp_var_count,
+            visitor.tac_code,
+        )
+    if bytecode:
+        with phase("bytecode"):
+            data = format_bytecode(
+                visitor.symbol_table.total_var_size,
+                visitor.symbol_table.temp_var_count,
+                visitor.tac_code,
+            )
+        if data is not None:
+            outputs[".tacb"] = data
+
+    if stats is not None:
+        symbols = visitor.symbol_table.symbols
+        stats.count("ast_nodes", subtree_size(ast) + 1)
+        stats.count("symbols", sum(len(scope) for scope in symbols.values()))
+        stats.count("temps", temp_count)
+        stats.count("temp_slots", visitor.symbol_table.temp_var_count)
+        stats.count("labels", visitor.label_count)
+        stats.count("tac_instructions", len(visitor.tac_code))
+        for name, count in collapsed.items():
+            stats.count(f"peephole_{name.replace('-', '_')}", count)
+        for name, count in removed.items():
+            stats.count(f"optimized_{name.replace(' ', '_')}", count)
+    return outputs
+
+
+def compile_cached(code, cache, stats=None, **options):
+    """
+    ``compile_source`` through a ``CompileCache``. On a hit the outputs are
+    read from disk without lexing, parsing or visiting, and the diagnostics
+    printed by the original compile are replayed.
+    """
+    phase = stats.phase if stats is not None else no_phase
+    with phase("cache lookup"):
+        key = cache.key(code, options)
+        entry = cache.get(key)
+    if stats is not None:
+        stats.count("cache_hits", cache.hits)
+    if entry is not None:
+        outputs, log = entry
+        print(log, end="")
+        return outputs
+
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        outputs = compile_source(code, stats=stats, **options)
+    print(log.getvalue(), end="")
+    with phase("cache store"):
+        cache.put(key, outputs, log.getvalue())
+    return outputs
+
+
+def write_outputs(output_prefix, outputs):
+    """Writes the output files; returns False if parsing failed."""
+    for suffix, description in OUTPUTS:
+        if suffix in outputs:
+            output_path = f"{output_prefix}{suffix}"
+            mode = "wb" if isinstance(outputs[suffix], bytes) else "w"
+            with open(output_path, mode) as f:
+                f.write(outputs[suffix])
+            print(f"{description} saved to {output_path}")
+    if ".tac" not in outputs:
+        print("Parsing failed. No output files generated.")
+        return False
+    return True
+
+
+def compile_file(input_file_path, output_prefix, cache=None, stats=None, **options):
+    """
+    Compiles a source file and writes its outputs, as the command line does.
+    Returns the exit status: 1 if the file cannot be read, 0 otherwise.
+    """
     try:
         with open(input_file_path, "r") as f:
             code = f.read()
     except FileNotFoundError:
         print(f"Error: Input file '{input_file_path}' not found.")
-        sys.exit(1)
-
-    lexer.input(code)
-    tokens_output_path = f"{output_prefix}_tokens.txt"
-    with open(tokens_output_path, "w") as f:
-        # Create a clone of the lexer for token output, as it's an iterator
-        lexer_clone = lexer.clone()
-        while True:
-            tok = lexer_clone.token()
-            if not tok:
-                break
-            # Calculate column
-            last_cr = code.rfind("\n", 0, tok.lexpos)
-            if last_cr < 0:
-                last_cr = 0
-            col = tok.lexpos - last_cr
-            f.write(
-                f"{tok.type:<10}: {tok.value:<20} line {tok.lineno:<5} column {col}\n"
-            )
-    print(f"Tokens saved to {tokens_output_path}")
+        return 1
 
-    ast = parser.parse(code, lexer=lexer)
+    if cache is None:
+        outputs = compile_source(code, stats=stats, **options)
+    else:
+        outputs = compile_cached(code, cache, stats=stats, **options)
+    phase = stats.phase if stats is not None else no_phase
+    with phase("write"):
+        write_outputs(output_prefix, outputs)
+    if stats is not None:
+        stats.count("source_bytes", len(code.encode()))
+    return 0
 
-    if ast:
 
-        dot_output_path = f"{output_prefix}.dot"
-        with open(dot_output_path, "w") as f:
-            generate_dot(ast, f)
-        print(f"AST .dot file saved to {dot_output_path}")
+def run_compile(
+    input_file_path,
+    output_prefix,
+    cache=None,
+    stream=False,
+    write_dot=False,
+    stats_file=None,
+    stats_memory=True,
+    profile_file=None,
+    **options,
+):
+    """
+    Compiles a file as the command line does, with the options of
+    ``cli_options.run_options``: statement by statement with ``stream``
+    (the cache is not used then), and writing the stats or the cProfile
+    profile of the compile to ``stats_file`` or ``profile_file``. Returns
+    the exit status.
+    """
+    stats = None
+    if stats_file:
+        stats = Instrumentation(trace_memory=stats_memory)
+        stats.start()
+    profiler = cProfile.Profile() if profile_file else None
+    if profiler is not None:
+        profiler.enable()
 
-        visitor = ASTVisitor()
-        visitor.visit(ast)
+    if stream:
+        from streaming import compile_stream
 
-        symbol_table_output_path = f"{output_prefix}_symbol_table.txt"
-        with open(symbol_table_output_path, "w") as f:
-            f.write(visitor.symbol_table.to_string())
-        print(f"Symbol table saved to {symbol_table_output_path}")
-
-        tac_output_path = f"{output_prefix}.tac"
-        with open(tac_output_path, "w") as f:
-            f.write(f"{visitor.symbol_table.total_var_size}\n")
-            f.write(
-                f"{visitor.symbol_table.temp_var_count * 8}\n"
-            )  # Assuming 8 bytes per temp
-            for i, line in enumerate(visitor.tac_code):
-                f.write(f"{i:03d}: {line}\n")
-        print(f"TAC code saved to {tac_output_path}")
+        status = compile_stream(
+            input_file_path, output_prefix, write_dot=write_dot, stats=stats, **options
+        )
     else:
-        print("Parsing failed. No output files generated.")
+        status = compile_file(
+            input_file_path, output_prefix, cache=cache, stats=stats, **options
+        )
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profile_file)
+        print(f"Profile saved to {profile_file}")
+    if stats is not None:
+        stats.stop()
+        stats.write_json(stats_file)
+        print(stats.summary())
+        print(f"Stats saved to {stats_file}")
+    return status
+
+
+def open_cache(args):
+    """Returns the ``CompileCache`` selected by the options, or None."""
+    if args.cache_dir is None:
+        return None
+    return CompileCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        usage="python main.py [--lexer {ply,dfa}] [--no-fold] [--no-temp-reuse] [-O] "
+        "[--peephole] [--peephole-patterns LIST] [--bytecode] [--cache-dir DIR] "
+        "[--stats FILE] [--profile FILE] "
+        "[--stream] "
+        "<input_file> <output_file_prefix>"
+    )
+    arg_parser.add_argument("input_file")
+    arg_parser.add_argument("output_file_prefix")
+    add_compiler_options(arg_parser)
+    add_run_options(arg_parser)
+    args = arg_parser.parse_args()
+
+    sys.exit(
+        run_compile(
+            args.input_file,
+            args.output_file_prefix,
+            cache=open_cache(args),
+            **run_options(args),
+            **compiler_options(args),
+        )
+    )
@@ -0,0 +1,152 @@
+"""
+Compile-time evaluation of TAC operators on constant operands.
+
+Integer DIV truncates toward zero and MOD takes the sign of the dividend
+(Julia's ``rem``); relational operators yield 1 or 0. ``BIN_OPS`` holds
+these semantics, so a runtime executing the generated TAC agrees with
+what was folded. The typed operators of ``TYPED_OPS`` compute the same
+on operands of a single type.
+"""
+import math
+import operator
+
+NUMBER_TYPES = (int, float)
+
+# Source operators and the TAC operators they compile to
+BIN_OP_MAP = {
+    "+": "ADD",
+    "-": "SUB",
+    "*": "MUL",
+    "/": "DIV",
+    "%": "MOD",
+    "==": "EQ",
+    "!=": "NE",
+    "<": "LT",
+    "<=": "LE",
+    ">": "GT",
+    ">=": "GE",
+}
+ASSIGN_OP_MAP = {"+=": "ADD", "-=": "SUB", "*=": "MUL", "/=": "DIV"}
+
+
+def is_constant(value):
+    """True for numeric literal operands, as opposed to locations and strings."""
+    return value.__class__ in NUMBER_TYPES
+
+
+def truncate_divide(left, right):
+    """Integer division, truncating toward zero."""
+    quotient = abs(left) // abs(right)
+    return quotient if (left < 0) == (right < 0) else -quotient
+
+
+def truncate_remainder(left, right):
+    """Integer remainder, with the sign of ``left``."""
+    result = abs(left) % abs(right)
+    return -result if left < 0 else result
+
+
+def divide(left, right):
+    if left.__class__ is int and right.__class__ is int:
+        return truncate_divide(left, right)
+    return left / right
+
+
+def remainder(left, right):
+    if left.__class__ is int and right.__class__ is int:
+        return truncate_remainder(left, right)
+    return math.fmod(left, right)
+
+
+def _relational(compare):
+    return lambda left, right: int(compare(left, right))
+
+
+BIN_OPS = {
+    "ADD": operator.add,
+    "SUB": operator.sub,
+    "MUL": operator.mul,
+    "DIV": divide,
+    "MOD": remainder,
+    "EQ": _relational(operator.eq),
+    "NE": _relational(operator.ne),
+    "LT": _relational(operator.lt),
+    "LE": _relational(operator.le),
+    "GT": _relational(operator.gt),
+    "GE": _relational(operator.ge),
+}
+
+# The relational operators, each mapped to the one that holds exactly when
+# it does not, NaN aside: with a NaN operand both are false
+NEGATED_RELATIONS = {
+    "EQ": "NE",
+    "NE": "EQ",
+    "LT": "GE",
+    "GE": "LT",
+    "LE": "GT",
+    "GT": "LE",
+}
+RELATIONAL_OPS = frozenset(NEGATED_RELATIONS)
+
+# Operators specialized for operands that are both integers (I<op>) or
+# both floats (F<op>), mapped to the generic operator each one computes
+TYPED_OPS = {prefix + op: op for prefix in ("I", "F") for op in BIN_OPS}
+
+
+def evaluate_bin_op(op, left, right):
+    """Computes ``left op right``, or returns None if it cannot be folded."""
+    func = BIN_OPS.get(op)
+    if func is None:
+        return None
+    try:
+        return func(left, right)
+    except (ZeroDivisionError, OverflowError, ValueError):
+        # Division by zero, or a float overflow (e.g. fmod of an infinity):
+        # left for run time
+        return None
+
+
+def coerce(value, type):
+    """Converts a folded constant to the representation of ``type``."""
+    return float(value) if type == "Float" else value
+
+
+def fold_bin_op(op, left, right, result_type):
+    """
+    Folds ``left op right`` for ``(value/location, type)`` operands.
+
+    Returns the folded ``(value/location, type)`` result, or None when an
+    instruction has to be emitted. Both-constant operands are evaluated;
+    otherwise the identities ``x + 0``, ``x - 0``, ``x * 1``, ``x / 1`` and
+    ``x * 0`` are applied to Integer operands. They do not hold for every
+    Float: ``inf * 0`` is NaN and ``-0.0 + 0`` is ``0.0``.
+    """
+    left_val, left_type = left
+    right_val, right_type = right
+    left_constant = is_constant(left_val)
+    right_constant = is_constant(right_val)
+
+    if left_constant and right_constant:
+        value = evaluate_bin_op(op, left_val, right_val)
+        if value is None:
+            return None
+        return coerce(value, result_type), result_type
+
+    if result_type != "Integer":
+        return None
+    if right_constant:
+        operand, operand_type, constant = left, left_type, right_val
+    elif left_constant and op in ("ADD", "MUL"):
+        operand, operand_type, constant = right, right_type, left_val
+    else:
+        return None
+
+    if operand_type != "Integer":
+        return None
+    if constant == 0 and op == "MUL":
+        return 0, result_type
+    if constant == 0 and op in ("ADD", "SUB"):
+        return operand
+    if constant == 1 and op in ("MUL", "DIV"):
+        return operand
+    return None
@@ -5,14 +5,40 @@ class SymbolTable:
         self.symbols["global"] = {}
         self.total_var_size = 0
         self.temp_var_count = 0
+        self.reindex()
+
+    def reindex(self):
+        """
+        Rebuilds the index ``lookup`` uses from ``symbols`` and
+        ``scope_stack``, after they were set directly.
+        """
+        # The scopes of the stack defining each name, innermost last, and
+        # the names each entry of the stack added to that
+        self._visible = {}
+        self._added = []
+        for scope in self.scope_stack:
+            self._index_scope(scope)
+
+    def _index_scope(self, name):
+        added = list(self.symbols[name])
+        for symbol in added:
+            self._visible.setdefault(symbol, []).append(name)
+        self._added.append(added)
 
     def enter_scope(self, name):
         self.scope_stack.append(name)
         if name not in self.symbols:
             self.symbols[name] = {}
+        self._index_scope(name)
 
     def exit_scope(self):
-        self.scope_stack.pop()
+        name = self.scope_stack.pop()
+        for symbol in self._added.pop():
+            self._visible[symbol].pop()
+        if name in self.scope_stack:
+            # A scope of the same name is open further out and shares the
+            # symbols this one added
+            self.reindex()
 
     def add_symbol(self, name, type):
         current_scope = self.scope_stack[-1]
@@ -21,16 +47,25 @@ class SymbolTable:
                 "type": type,
                 "size": 8,
                 "offset": self.total_var_size,
+                "location": f"{self.total_var_size:03d}(SP)",
+                # Assigned in a function body, so any call may change it
+                "pinned": False,
             }
             self.total_var_size += 8
+            self._visible.setdefault(name, []).append(current_scope)
+            self._added[-1].append(name)
             return True
         return False
 
+    def lookup(self, name):
+        """Returns the scope that defines ``name`` and its symbol, or (None, None)."""
+        scopes = self._visible.get(name)
+        if not scopes:
+            return None, None
+        return scopes[-1], self.symbols[scopes[-1]][name]
+
     def get_symbol(self, name):
-        for scope_name in reversed(self.scope_stack):
-            if name in self.symbols[scope_name]:
-                return self.symbols[scope_name][name]
-        return None
+        return self.lookup(name)[1]
 
     def new_temp(self):
         temp_name = f"t{self.temp_var_count}"
@@ -0,0 +1,575 @@
+"""
+Static types of variables, so that the TAC can be typed.
+
+A variable's type is tracked through the program: an assignment gives it
+the type of the value assigned, and where paths join, after an ``if`` and
+at the head of a ``while``, the types it has on each incoming path are
+joined. Integer joined with Float is Float: the paths on which it holds
+an integer convert it with ``ITOF`` before the join. Any other mix of
+types is Any.
+
+Operations on two numbers are specialized (``IADD`` on integers, ``FADD``
+on floats, see ``semantic.folding.TYPED_OPS``), an integer operand being
+converted when the other one is a float. Operations on Any values, such
+as function parameters, keep the generic opcode and dispatch on the values
+at run time. A function body runs whenever the function is called, so in
+it the variables of enclosing scopes are Any, and the ones it assigns are
+Any once it is defined: they are pinned, and stay Any when they are
+assigned again, since any call may change them. Calls return Any.
+
+``TypeInference`` computes the types at the joins of a statement before
+its code is generated, going round loop bodies until the types at their
+head settle. Only the variables a loop may read before assigning them
+take part in that (``variable_flow``), and a loop entered again with the
+types it was last entered with is not gone round again, so that nested
+loops stay linear in their depth.
+"""
+from .folding import ASSIGN_OP_MAP, BIN_OP_MAP, NEGATED_RELATIONS, RELATIONAL_OPS
+
+NUMERIC_TYPES = ("Integer", "Float")
+LITERAL_TYPES = {"integer": "Integer", "float": "Float", "string": "String"}
+
+
+def join(left, right):
+    """The type of a value of type ``left`` or ``right`` (None: no value yet)."""
+    if left == right or right is None:
+        return left
+    if left is None:
+        return right
+    if left in NUMERIC_TYPES and right in NUMERIC_TYPES:
+        return "Float"
+    return "Any"
+
+
+def value_type(type):
+    """The type a variable gets from a value of expression type ``type``."""
+    return "Any" if type is None or type == "Undefined" else type
+
+
+def operand_type(left, right):
+    """
+    The type both operands of an operation are converted to, or None when
+    the operation has to dispatch on their values.
+    """
+    if left in NUMERIC_TYPES and right in NUMERIC_TYPES:
+        return "Float" if "Float" in (left, right) else "Integer"
+    return None
+
+
+def result_type(op, left, right):
+    """The type of ``left op right`` for operands of these types."""
+    if op in RELATIONAL_OPS:
+        return "Integer"
+    return operand_type(left, right) or "Any"
+
+
+def negated_relation(op, left, right):
+    """
+    The relational operator true exactly when ``left op right`` is false,
+    for operands of these types, or None. Ordered comparisons that may see
+    a float have none, since a NaN makes both ``a < b`` and ``a >= b``
+    false.
+    """
+    if op == "EQ" or op == "NE" or left == right and left in ("Integer", "String"):
+        return NEGATED_RELATIONS[op]
+    return None
+
+
+def typed_opcode(op, type):
+    """The opcode of ``op`` on two operands of numeric type ``type``."""
+    return ("I" if type == "Integer" else "F") + op
+
+
+class AssignedNames:
+    """
+    The names assigned in the body of each function definition, in source
+    order, with those of the definitions nested in it. Called with a
+    ``function_def`` node, it walks the body once, working out the names
+    of the nested definitions on the way and keeping them, so that the
+    definitions of a nesting are not walked again for each level.
+    """
+
+    def __init__(self):
+        self._names = {}
+
+    def __call__(self, function):
+        names = self._names.get(function)
+        if names is not None:
+            return names
+        # The names of each definition entered and not yet left
+        frames = []
+        stack = [function]
+        while stack:
+            node = stack.pop()
+            if node.__class__ is tuple:
+                # The end of a definition: its body is done
+                names = self._names[node[0]] = list(frames.pop())
+                if frames:
+                    frames[-1].update(dict.fromkeys(names))
+                continue
+            if node is None:
+                continue
+            if node.type == "function_def":
+                names = self._names.get(node)
+                if names is not None:
+                    frames[-1].update(dict.fromkeys(names))
+                    continue
+                frames.append({})
+                stack.append((node,))
+                stack.append(node.children[2])
+                continue
+            if node.type == "assign":
+                frames[-1][node.children[0].leaf] = None
+            stack.extend(reversed(node.children))
+        return self._names[function]
+
+    def clear(self):
+        self._names.clear()
+
+
+def nonlocal_assignments(node, names, symbol_table, resolve):
+    """
+    The variables of enclosing scopes that the body of the function
+    definition ``node`` assigns, given the ``names`` it assigns (see
+    ``AssignedNames``), as the keys ``resolve`` maps their names to (None
+    for names not defined outside the function).
+    """
+    local = set(symbol_table.symbols.get(node.children[0].leaf, ()))
+    local.update(param.leaf for param in node.children[1].children)
+    keys = []
+    for name in names:
+        if name not in local:
+            key = resolve(name)
+            if key is not None:
+                keys.append(key)
+    return keys
+
+
+# Statements whose variable flow ``variable_flow`` follows
+STATEMENTS = frozenset(
+    (
+        "statement_list",
+        "assign",
+        "expression_statement",
+        "return",
+        "if_statement",
+        "elseif",
+        "else",
+        "while_loop",
+        "function_def",
+    )
+)
+
+
+# The flow of a missing statement
+_NO_FLOW = ({}, frozenset(), {})
+
+
+def _reads(node, scope, keys):
+    """Adds the keys of the variables expression ``node`` reads to ``keys``."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        if node.type == "identifier":
+            keys[scope, node.leaf] = None
+        else:
+            stack.extend(node.children)
+    return keys
+
+
+def _sequence(flows):
+    """The flow of statements with these flows, run one after the other."""
+    exposed = {}
+    defined = set()
+    assigned = {}
+    for reads, defs, writes in flows:
+        if defined:
+            exposed.update({key: None for key in reads if key not in defined})
+        else:
+            exposed.update(reads)
+        defined |= defs
+        assigned.update(writes)
+    return exposed, defined, assigned
+
+
+def variable_flow(node, scope, table_names, assigned_names):
+    """
+    Follows the variables of scope ``scope`` through statement ``node``,
+    with the names the functions defined in it assign (``AssignedNames``).
+    Returns ``assigned``, mapping each ``while_loop`` to the keys of the
+    variables assigned in it, ``exposed``, mapping each loop to those of
+    them it may read before assigning them (the only ones whose types at
+    its head the loop depends on), and ``tabled``, the keys assigned in
+    ``node`` of ``table_names``. The keys are dicts used as ordered sets.
+    """
+    assigned = {}
+    exposed = {}
+    tabled = set()
+    # Per statement: the variables read before they are assigned, those
+    # always assigned and those assigned
+    flows = {}
+    stack = [(node, False)]
+    while stack:
+        node, ready = stack.pop()
+        kind = node.type
+        children = node.children
+        if not ready and kind not in ("assign", "expression_statement", "return"):
+            if kind != "function_def":
+                stack.append((node, True))
+                stack.extend(
+                    (child, False)
+                    for child in children
+                    if child is not None and child.type in STATEMENTS
+                )
+                continue
+        if kind == "assign":
+            name = children[0].leaf
+            key = (scope, name)
+            if name in table_names:
+                tabled.add(key)
+            reads = {key: None} if node.leaf != "=" else {}
+            flow = (_reads(children[1], scope, reads), {key}, {key: None})
+        elif kind == "expression_statement" or kind == "return":
+            flow = (_reads(children[0], scope, {}), frozenset(), {})
+        elif kind == "function_def":
+            # Its name, and the variables its body assigns, which may be
+            # those of this scope
+            writes = dict.fromkeys(
+                (scope, name) for name in assigned_names(node)
+            )
+            writes[scope, children[0].leaf] = None
+            flow = ({}, frozenset(), writes)
+        elif kind == "while_loop":
+            condition = (_reads(children[0], scope, {}), frozenset(), {})
+            body = flows.pop(children[1], _NO_FLOW)
+            reads, _, writes = _sequence((condition, body))
+            assigned[node] = writes
+            exposed[node] = {key: None for key in reads if key in writes}
+            flow = (reads, frozenset(), writes)
+        elif kind == "if_statement" or kind == "elseif":
+            condition = (_reads(children[0], scope, {}), frozenset(), {})
+            flow = _sequence((condition, flows.pop(children[1], _NO_FLOW)))
+            if kind == "if_statement":
+                branches = [flow] + [flows.pop(clause) for clause in children[2:]]
+                reads = {}
+                writes = {}
+                for branch in branches:
+                    reads.update(branch[0])
+                    writes.update(branch[2])
+                defs = frozenset()
+                if children[-1].type == "else":
+                    defs = set.intersection(*(set(branch[1]) for branch in branches))
+                flow = (reads, defs, writes)
+        else:
+            # A statement list, or the body of an else
+            flow = _sequence(flows.pop(child) for child in children if child)
+        flows[node] = flow
+    return assigned, exposed, tabled
+
+
+class TypeInference:
+    """
+    Computes the types at the joins of a statement, from the types the
+    variables of ``symbol_table`` have before it. ``infer`` returns
+    ``joins``, which maps each ``if_statement`` and ``while_loop`` node to
+    the types of the variables assigned in it, keyed by ``(scope, name)``:
+    their types after the ``if``, or at the head of the ``while`` (and so
+    after it). Function definitions are not entered; their bodies are
+    inferred when they are compiled.
+
+    Like ``ASTVisitor``, it runs off an explicit work stack, so nesting
+    depth is not limited by Python's recursion limit. ``types`` holds the
+    types assigned so far, over those of the symbol table.
+    ``assigned_names`` is the ``AssignedNames`` of the compile.
+    """
+
+    def __init__(self, symbol_table, assigned_names):
+        self.symbol_table = symbol_table
+        self.assigned_names = assigned_names
+        self.scope = symbol_table.scope_stack[-1]
+        # Variables assigned in the statement that are not in the table yet
+        self.created = set()
+        self.types = {}
+        # Whether ``types`` is also held as the types of some path, and so
+        # has to be copied before it is changed
+        self._shared = False
+        self.joins = {}
+        # Variables pinned to Any by the functions defined in the statement
+        self.pinned = set()
+        # The types each loop was last entered with, and after it for them
+        self._loops = {}
+        # See ``variable_flow``, for the loops visited so far
+        self._assigned = {}
+        self._exposed = {}
+        self._tabled = set()
+        self._work = []
+        self._handlers = {
+            "statement_list": self.visit_statement_list,
+            "assign": self.visit_assign,
+            "if_statement": self.visit_if_statement,
+            "while_loop": self.visit_while_loop,
+            "function_def": self.visit_function_def,
+        }
+
+    def resolve(self, name):
+        """The key of variable ``name`` seen from the current scope, or None."""
+        # Variables are only created in the scope of the statement
+        if (self.scope, name) in self.created:
+            return self.scope, name
+        scope = self.symbol_table.lookup(name)[0]
+        return None if scope is None else (scope, name)
+
+    def type_of(self, key, types):
+        """The type of variable ``key`` in ``types``, or None if it has none."""
+        type = types.get(key)
+        if type is None:
+            symbol = self.symbol_table.symbols.get(key[0], {}).get(key[1])
+            if symbol is not None:
+                type = symbol["type"]
+        return type
+
+    def set_type(self, key, type):
+        if self._shared:
+            self.types = dict(self.types)
+            self._shared = False
+        self.types[key] = type
+
+    def expression_type(self, node):
+        kind = node.type
+        if kind == "identifier":
+            return self.variable_type(node.leaf)
+        if kind in LITERAL_TYPES:
+            return LITERAL_TYPES[kind]
+        types = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.__class__ is str:
+                # An operator, once both of its operands are typed
+                right = types.pop()
+                types.append(result_type(node, types.pop(), right))
+                continue
+            kind = node.type
+            if kind == "bin_op":
+                stack.append(BIN_OP_MAP.get(node.leaf) or node.leaf.upper())
+                stack.append(node.children[1])
+                stack.append(node.children[0])
+            elif kind == "unary_op":
+                # Compiled as 0 SUB operand
+                types.append("Integer")
+                stack.append("SUB")
+                stack.append(node.children[0])
+            elif kind == "identifier":
+                types.append(self.variable_type(node.leaf))
+            else:
+                types.append(LITERAL_TYPES.get(kind, "Any"))
+        return types[0]
+
+    def variable_type(self, name):
+        """The type of a read of variable ``name``."""
+        type = self.types.get((self.scope, name))
+        if type is not None:
+            return type
+        key = self.resolve(name)
+        if key is None or key[0] != self.scope:
+            return "Any"
+        return value_type(self.type_of(key, self.types))
+
+    def infer(self, node):
+        """Infers the types in statement ``node``; returns ``joins``."""
+        work = self._work = [node]
+        handlers = self._handlers
+        while work:
+            item = work.pop()
+            if item.__class__ is tuple:
+                step, arg = item
+                step(arg)
+            elif item is not None:
+                handler = handlers.get(item.type)
+                if handler is not None:
+                    handler(item)
+        return self.joins
+
+    def visit_statement_list(self, node, start=0):
+        # Assignments are inferred on the spot. At a compound statement, the
+        # rest of the list waits on the work stack until it is done.
+        children = node.children
+        handlers = self._handlers
+        for i in range(start, len(children)):
+            child = children[i]
+            if child is None:
+                continue
+            if child.type == "assign":
+                self.visit_assign(child)
+            elif child.type in handlers:
+                if i + 1 < len(children):
+                    self._work.append((self.resume_statement_list, (node, i + 1)))
+                self._work.append(child)
+                return
+
+    def resume_statement_list(self, position):
+        self.visit_statement_list(*position)
+
+    def visit_assign(self, node):
+        name = node.children[0].leaf
+        key = self.resolve(name)
+        if key is None:
+            key = (self.scope, name)
+            self.created.add(key)
+        elif key[0] != self.scope:
+            return  # Stays Any in a function body
+        elif self.is_pinned(key):
+            return
+        type = self.expression_type(node.children[1])
+        if node.leaf != "=":
+            current = self.type_of(key, self.types) or type
+            type = result_type(ASSIGN_OP_MAP[node.leaf], value_type(current), type)
+        self.set_type(key, value_type(type))
+
+    def visit_if_statement(self, node):
+        bodies = [node.children[1]]
+        falls_through = True
+        for clause in node.children[2:]:
+            if clause.type == "elseif":
+                bodies.append(clause.children[1])
+            elif clause.type == "else" and falls_through:
+                bodies.append(clause.children[0])
+                falls_through = False
+        bodies.reverse()
+        # Every branch starts from the types before the if
+        self._shared = True
+        branches = (node, self.types, [], bodies, falls_through)
+        self._work.extend(((self.exit_branch, branches), bodies.pop()))
+
+    def exit_branch(self, branches):
+        node, before, outs, bodies, falls_through = branches
+        outs.append(self.types)
+        self.types = before
+        self._shared = True
+        if bodies:
+            self._work.extend(((self.exit_branch, branches), bodies.pop()))
+            return
+        paths = outs + [before] if falls_through else outs
+        changed = set()
+        for out in outs:
+            if out is not before:
+                changed.update(key for key, _ in out.items() - before.items())
+        joined = {}
+        for key in sorted(changed):
+            previous = self.type_of(key, before)
+            if any(self.type_of(key, out) != previous for out in outs):
+                type = None
+                for path in paths:
+                    type = join(type, self.type_of(key, path))
+                joined[key] = type
+        self.joins[node] = joined
+        if joined:
+            self.types = {**before, **joined}
+            self._shared = False
+
+    def joined_with(self, types, others, keys):
+        """
+        Returns ``types`` with the types of ``keys`` joined with those they
+        have in ``others``: a new dict if any changes, else ``types``.
+        """
+        changes = {}
+        for key in keys:
+            current = self.type_of(key, types)
+            joined = join(current, self.type_of(key, others))
+            if joined != current:
+                changes[key] = joined
+        return {**types, **changes} if changes else types
+
+    def visit_while_loop(self, node):
+        if node not in self._exposed:
+            # The outermost loop: follow the variables through it first
+            table_names = self.symbol_table.symbols.get(self.scope, {})
+            assigned, exposed, tabled = variable_flow(
+                node, self.scope, table_names, self.assigned_names
+            )
+            self._assigned.update(assigned)
+            self._exposed.update(exposed)
+            self._tabled |= tabled
+        entry = self.types
+        last = self._loops.get(node)
+        if last is not None and last[0] == entry:
+            # Entered with the same types as last time: nothing changes
+            self.types = last[1]
+            self._shared = True
+            return
+        header = entry
+        if last is not None:
+            # Going round an enclosing loop again: start from the last types
+            header = self.joined_with(entry, last[1], self._exposed[node])
+        self._shared = True
+        loop = {"node": node, "before": entry, "header": header}
+        self.schedule_body(loop)
+
+    def schedule_body(self, loop):
+        """Infers the body of ``loop`` from the types at its head."""
+        body = loop["node"].children[1]
+        self._work.extend(
+            ((self.exit_while_loop, loop), body, (self.enter_loop, loop))
+        )
+
+    def enter_loop(self, loop):
+        self.types = loop["header"]
+        self._shared = True
+
+    def exit_while_loop(self, loop):
+        node = loop["node"]
+        exposed = self._exposed[node]
+        out = self.types
+        header = self.joined_with(loop["header"], out, exposed)
+        if header is not loop["header"]:
+            loop["header"] = header
+            self.schedule_body(loop)
+            return
+        # The other variables the loop assigns have the type they have
+        # before it joined with the one they have after its body, unless
+        # the loop creates them
+        before = loop["before"]
+        assigned = self._assigned[node].keys()
+        keys = set(exposed)
+        keys.update(before.keys() & assigned, self._tabled & assigned)
+        after = {}
+        joined = {}
+        for key in sorted(keys):
+            previous = self.type_of(key, before)
+            out_type = self.type_of(key, out)
+            if key in exposed:
+                type = self.type_of(key, header)
+            else:
+                type = join(previous, out_type)
+            if type != out_type:
+                after[key] = type
+            # Nothing to do at the joins for a variable created in the loop
+            # that keeps its type round it
+            if previous is None and out_type == type:
+                continue
+            if type != previous or out_type != type:
+                joined[key] = type
+        after = {**out, **after} if after else out
+        self.joins[node] = joined
+        self._loops[node] = (before, after)
+        self.types = after
+        self._shared = True
+
+    def is_pinned(self, key):
+        if key in self.pinned:
+            return True
+        symbol = self.symbol_table.symbols.get(key[0], {}).get(key[1])
+        return symbol is not None and symbol["pinned"]
+
+    def visit_function_def(self, node):
+        key = (self.scope, node.children[0].leaf)
+        if key[1] not in self.symbol_table.symbols[self.scope]:
+            self.created.add(key)
+        self.set_type(key, "Function")
+        names = self.assigned_names(node)
+        for key in nonlocal_assignments(node, names, self.symbol_table, self.resolve):
+            self.pinned.add(key)
+            if key[0] == self.scope:
+                self.set_type(key, "Any")
@@ -1,12 +1,95 @@
 # compiler/semantic/visitor.py
+import inspect
+
+from .folding import ASSIGN_OP_MAP, BIN_OP_MAP, fold_bin_op, is_constant
 from .symbol_table import SymbolTable
+from .types import (
+    RELATIONAL_OPS,
+    AssignedNames,
+    TypeInference,
+    negated_relation,
+    nonlocal_assignments,
+    operand_type,
+    typed_opcode,
+    value_type,
+)
+
+_dispatch_tables = {}
+
+
+def dispatch_table(cls):
+    """Maps each node kind to its ``visit_<kind>`` function, once per class."""
+    table = _dispatch_tables.get(cls)
+    if table is None:
+        table = {
+            name[len("visit_") :]: func
+            for name, func in inspect.getmembers(cls, inspect.isfunction)
+            if name.startswith("visit_")
+        }
+        _dispatch_tables[cls] = table
+    return table
 
 
 class ASTVisitor:
-    def __init__(self):
+    """
+    Semantic analysis and TAC generation over the AST.
+
+    Traversal is iterative: ``visit`` pops work items off an explicit stack
+    and dispatches nodes through a per-class table of ``visit_*`` methods,
+    so tree depth is not limited by Python's recursion limit. A work item is
+    either a node or a ``(continuation, argument, nargs)`` step, called with
+    the results of the last ``nargs`` visits.
+
+    Expressions produce a ``(value/location, type)`` result, which is pushed
+    on a value stack for the step that consumes it. Statements produce no
+    result (their handlers return None). Kinds in ``LEAF_KINDS`` return
+    their result directly and are evaluated inline by ``schedule_children``
+    instead of going through the work stack.
+
+    With ``fold_constants`` enabled, constant subexpressions are evaluated
+    at compile time and simple identities are applied (see ``folding``).
+    Branches that a constant condition makes unreachable are still analysed
+    for their symbols, but the code they emit is discarded.
+
+    The type of each symbol is its type at the current point of the
+    program, so operations on numbers get typed opcodes. Where paths join,
+    the types ``TypeInference`` computed for the join are applied, after
+    converting the variables that become floats (see ``types``).
+
+    A condition comparing two values compiles to one jump on the negated
+    comparison, ``if a ILE 0 goto L``, unless a NaN could make the negation
+    differ from "not".
+
+    A call evaluates its arguments, passes them with ``param`` and stores
+    the value of the function in a temp: ``t := call f 2``. The function
+    pops them into its parameters with ``pop_param`` and hands its value
+    back with ``return``. Its ``func_end`` lists its variables, which the
+    VM saves around each call so that recursion works.
+    """
+
+    LEAF_KINDS = ("integer", "float", "string", "identifier")
+
+    def __init__(self, line_index=None, fold_constants=True):
         self.symbol_table = SymbolTable()
         self.tac_code = []
         self.label_count = 0
+        self.line_index = line_index
+        self.fold_constants = fold_constants
+        self._dead_marks = []
+        self._joins = {}  # Types at the joins of the statement being compiled
+        # Kept for the statement being compiled, as the joins are
+        self._assigned_names = AssignedNames()
+        self._dispatch = dispatch_table(type(self))
+        self._leaves = {kind: self._dispatch[kind] for kind in self.LEAF_KINDS}
+        self._work = []
+        self._values = []
+
+    def location_of(self, node):
+        """Formats the source position of a node for diagnostics, if known."""
+        if self.line_index is None or node.lexpos is None:
+            return ""
+        line, column = self.line_index.position(node.lexpos)
+        return f" at line {line}, column {column}"
 
     def new_label(self):
         label = f"L{self.label_count}"
@@ -19,12 +102,149 @@ class ASTVisitor:
         self.symbol_table.temp_var_count += 1
         return f"{offset:03d}(Rx)"
 
+    def constant_condition(self, cond_result):
+        """Returns True/False for a condition known at compile time, else None."""
+        if self.fold_constants and is_constant(cond_result):
+            return bool(cond_result)
+        return None
+
+    def begin_dead_code(self, mark=None):
+        """
+        Starts an unreachable region: the code and temps it emits are dropped
+        by the matching ``end_dead_code``. ``mark`` is a ``(code length, temp
+        count)`` pair to rewind to, by default the current position.
+        """
+        if mark is None:
+            mark = (len(self.tac_code), self.symbol_table.temp_var_count)
+        self._dead_marks.append(mark)
+
+    def end_dead_code(self, _=None):
+        length, temp_count = self._dead_marks.pop()
+        del self.tac_code[length:]
+        self.symbol_table.temp_var_count = temp_count
+
+    def discard_result(self, _, result):
+        pass  # Consumes the value of an expression in an unreachable region
+
+    def variable_key(self, name):
+        """The ``(scope, name)`` key of the variable ``name`` refers to, or None."""
+        scope, symbol = self.symbol_table.lookup(name)
+        return None if symbol is None else (scope, name)
+
+    def joined_types(self, node):
+        """
+        The types of the variables assigned in ``node``, an ``if`` or a
+        ``while``, where its paths join. The outermost statement infers
+        those of the statements nested in it.
+        """
+        types = self._joins.pop(node, None)
+        if types is None:
+            joins = TypeInference(self.symbol_table, self._assigned_names).infer(node)
+            types = joins.pop(node)
+            self._joins.update(joins)
+        return types
+
+    def symbol_types(self, types):
+        """The current types of the variables keyed in ``types``."""
+        symbols = self.symbol_table.symbols
+        current = {}
+        for scope, name in types:
+            symbol = symbols[scope].get(name)
+            current[scope, name] = None if symbol is None else symbol["type"]
+        return current
+
+    def set_types(self, types):
+        symbols = self.symbol_table.symbols
+        for (scope, name), type in types.items():
+            symbol = symbols[scope].get(name)
+            if symbol is not None and type is not None:
+                symbol["type"] = type
+
+    def join_types(self, types):
+        """
+        Ends a path into a join: converts the integer variables that the
+        join makes floats, then gives the variables their joined ``types``.
+        """
+        symbols = self.symbol_table.symbols
+        for (scope, name), type in types.items():
+            symbol = symbols[scope].get(name)
+            if symbol is None:
+                continue
+            if type == "Float" and symbol["type"] == "Integer":
+                location = symbol["location"]
+                self.tac_code.append(f"{location} := ITOF {location}")
+            symbol["type"] = type
+
+    def warn_mismatches(self, node, before, types):
+        """Warns about the variables of type ``before`` that a join makes Any."""
+        for key, type in types.items():
+            if type == "Any" and before[key] in ("Integer", "Float", "String"):
+                print(
+                    f"Warning: Type mismatch for '{key[1]}'{self.location_of(node)}. "
+                    f"It may hold a {before[key]} or another type, so it is typed Any."
+                )
+
     def visit(self, node):
-        if node is None:
-            return None, None  # Return value/location and type
-        method_name = f"visit_{node.type}"
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+        saved = self._work, self._values
+        work = self._work = [node]
+        values = self._values = []
+        dispatch = self._dispatch
+        generic = type(self).generic_visit
+
+        while work:
+            item = work.pop()
+            if item.__class__ is tuple:
+                continuation, arg, nargs = item
+                if nargs == 1:
+                    result = continuation(arg, values.pop())
+                elif nargs:
+                    args = values[-nargs:]
+                    del values[-nargs:]
+                    result = continuation(arg, *args)
+                else:
+                    result = continuation(arg)
+            elif item is None:
+                result = (None, None)  # Return value/location and type
+            else:
+                result = dispatch.get(item.type, generic)(self, item)
+            if result is not None:
+                values.append(result)
+
+        result = values.pop() if values else (None, None)
+        self._work, self._values = saved
+        if not saved[0]:
+            # The outermost visit: drop what was kept for its nodes
+            self._assigned_names.clear()
+        return result
+
+    def schedule(self, *items):
+        """Pushes nodes and continuation steps to be run in the given order."""
+        self._work.extend(reversed(items))
+
+    def schedule_children(self, node, continuation, children=None):
+        """
+        Visits the expressions in ``children`` (by default all children of
+        ``node``) in order, then calls ``continuation(node, *results)``.
+        Leading leaf children are evaluated on the spot, so if every child
+        is a leaf the continuation runs at once and its result is returned.
+        """
+        if children is None:
+            children = node.children
+        leaves = self._leaves
+        results = []
+        for child in children:
+            handler = leaves.get(child.type) if child is not None else None
+            if handler is None:
+                break
+            results.append(handler(self, child))
+        else:
+            return continuation(node, *results)
+
+        self._values.extend(results)
+        work = self._work
+        work.append((continuation, node, len(children)))
+        work.extend(reversed(children[len(results) :]))
+        return None
 
     def generic_visit(self, node):
         for child in node.children:
@@ -32,149 +252,371 @@ class ASTVisitor:
         return None, None
 
     def visit_program(self, node):
-        self.visit(node.children[0])
-        return None, None
+        self._work.append(node.children[0])
 
     def visit_statement_list(self, node):
-        for stmt in node.children:
-            self.visit(stmt)
-        return None, None
+        self._work.extend(reversed(node.children))
 
     def visit_expression_statement(self, node):
-        self.visit(node.children[0])
-        return None, None
+        return self.schedule_children(node, self.exit_expression_statement)
+
+    def exit_expression_statement(self, node, expr_result):
+        pass  # The value of an expression statement is discarded
 
     def visit_assign(self, node):
-        var_name = node.children[0].leaf
-        expr_location, expr_type = self.visit(node.children[1])
+        return self.schedule_children(node, self.exit_assign, node.children[1:])
 
-        symbol = self.symbol_table.get_symbol(var_name)
+    def exit_assign(self, node, expr_result):
+        var_name = node.children[0].leaf
+        table = self.symbol_table
+        scope, symbol = table.lookup(var_name)
         if not symbol:
-            # First, add the symbol to the table.
-            self.symbol_table.add_symbol(var_name, expr_type)
-            # Then, retrieve the newly created symbol object.
-            symbol = self.symbol_table.get_symbol(var_name)
-        elif symbol["type"] != expr_type and expr_type is not None:
-            print(
-                f"Warning: Type mismatch for '{var_name}'. Assigning new type {expr_type}."
-            )
-            symbol["type"] = expr_type
-
-        var_location = f"{symbol['offset']:03d}(SP)"
+            table.add_symbol(var_name, value_type(expr_result[1]))
+            scope, symbol = table.lookup(var_name)
+        # In a function body, variables of enclosing scopes stay Any
+        local = scope == table.scope_stack[-1]
+        var_location = symbol["location"]
 
         op = node.leaf
-        if op == "=":
-            self.tac_code.append(f"{var_location} := {expr_location}")
-        else:  # For +=, -=, etc.
-            op_map = {"+=": "ADD", "-=": "SUB", "*=": "MUL", "/=": "DIV"}
-            temp_reg = self.new_temp_location()
-            self.tac_code.append(
-                f"{temp_reg} := {var_location} {op_map[op]} {expr_location}"
+        if op != "=":  # For +=, -=, etc.
+            var_type = symbol["type"] if local else "Any"
+            expr_result = self.operation(
+                ASSIGN_OP_MAP[op], (var_location, var_type), expr_result
             )
-            self.tac_code.append(f"{var_location} := {temp_reg}")
+            if expr_result[0] == var_location:
+                return  # x += 0 and friends fold to the variable itself
 
-        return None, None
+        expr_location, expr_type = expr_result
+        self.tac_code.append(f"{var_location} := {expr_location}")
+        if local and not symbol["pinned"]:
+            symbol["type"] = value_type(expr_type)
 
     def visit_if_statement(self, node):
+        types = self.joined_types(node)
+        before = self.symbol_types(types)
         end_label = self.new_label()
         clauses = node.children
 
         if_clause = (clauses[0], clauses[1])
-        elseif_clauses = [c for c in clauses[2:] if c.type == "elseif"]
-        else_clause = next((c for c in clauses[2:] if c.type == "else"), None)
-
-        has_following_clauses = elseif_clauses or else_clause
+        elseif_clauses = []
+        else_clause = None
+        for clause in clauses[2:]:
+            if clause.type == "elseif":
+                elseif_clauses.append(clause)
+            elif clause.type == "else" and else_clause is None:
+                else_clause = clause
+
+        # Without an else, the path through no clause needs one of its own
+        # if it has to convert variables to the types after the if
+        has_else = else_clause is not None or any(
+            type == "Float" and before[key] == "Integer" for key, type in types.items()
+        )
+        has_following_clauses = elseif_clauses or has_else
         next_clause_label = self.new_label() if has_following_clauses else end_label
 
-        cond_result, _ = self.visit(if_clause[0])
-        self.tac_code.append(f"if_false {cond_result} goto {next_clause_label}")
-        self.visit(if_clause[1])
-        self.tac_code.append(f"goto {end_label}")
-
-        if has_following_clauses:
-            self.tac_code.append(f"{next_clause_label}:")
-
+        # "taken" is set once a clause condition folds to true: every clause
+        # after it is unreachable. "jumps" records whether any code jumps to
+        # the end label, which is omitted otherwise. Each clause starts from
+        # the types "before" the if and ends converting to the joined "types".
+        chain = {
+            "end_label": end_label,
+            "taken": False,
+            "jumps": False,
+            "before": before,
+            "types": types,
+            "node": node,
+        }
+        steps = [
+            (self.enter_clause, (chain, *if_clause, next_clause_label), 0),
+        ]
         for i, elseif in enumerate(elseif_clauses):
             is_last_elseif = i == len(elseif_clauses) - 1
-            has_else = else_clause is not None
-            next_clause_label = (
-                self.new_label() if not (is_last_elseif and not has_else) else end_label
+            ends_chain = is_last_elseif and not has_else
+            steps.append((self.enter_elseif, (chain, elseif, ends_chain), 0))
+
+        if has_else:
+            body = else_clause.children[0] if else_clause else None
+            steps.append((self.enter_else, (chain, body), 0))
+
+        steps.append((self.exit_if_statement, chain, 0))
+        self.schedule(*steps)
+
+    def enter_elseif(self, clause):
+        # The clause label is allocated only once the previous clauses have
+        # been visited, so labels keep the order of a depth-first traversal.
+        chain, elseif, ends_chain = clause
+        next_clause_label = chain["end_label"] if ends_chain else self.new_label()
+        self.enter_clause((chain, *elseif.children, next_clause_label))
+
+    def enter_clause(self, clause):
+        chain, cond, body, _ = clause
+        self.set_types(chain["before"])
+        if chain["taken"]:
+            self.begin_dead_code()
+            self.schedule(
+                cond, (self.discard_result, None, 1), body, (self.end_dead_code, None, 0)
             )
-
-            cond_result, _ = self.visit(elseif.children[0])
-            self.tac_code.append(f"if_false {cond_result} goto {next_clause_label}")
-            self.visit(elseif.children[1])
-            self.tac_code.append(f"goto {end_label}")
-
-            if next_clause_label != end_label:
+            return
+        self.schedule(
+            self.condition(cond),
+            (self.branch_clause, clause, 1),
+            body,
+            (self.exit_clause, clause, 0),
+        )
+
+    def branch_clause(self, clause, cond):
+        chain, _, _, next_clause_label = clause
+        cond_result, _ = cond
+        constant = self.constant_condition(cond_result)
+        if constant is None:
+            self.jump_unless(cond_result, next_clause_label)
+            chain["jumps"] = True
+        elif constant:
+            chain["taken"] = True
+        else:
+            self.begin_dead_code()
+        chain["constant"] = constant
+
+    def exit_clause(self, clause):
+        chain, _, _, next_clause_label = clause
+        constant = chain.pop("constant")
+        if constant is False:
+            self.end_dead_code()
+            return
+        self.join_types(chain["types"])
+        if constant is None:
+            self.tac_code.append(f"goto {chain['end_label']}")
+            if next_clause_label != chain["end_label"]:
                 self.tac_code.append(f"{next_clause_label}:")
-
-        if else_clause:
-            self.visit(else_clause.children[0])
-
-        self.tac_code.append(f"{end_label}:")
-        return None, None
+        # A constant-true clause falls through to the end of the chain
+
+    def enter_else(self, clause):
+        chain, body = clause  # No body for the path through no clause
+        self.set_types(chain["before"])
+        if chain["taken"]:
+            if body is not None:
+                self.begin_dead_code()
+                self.schedule(body, (self.end_dead_code, None, 0))
+        elif body is not None:
+            self.schedule(body, (self.join_types, chain["types"], 0))
+        else:
+            self.join_types(chain["types"])
+
+    def exit_if_statement(self, chain):
+        if chain["jumps"]:
+            self.tac_code.append(f"{chain['end_label']}:")
+        self.set_types(chain["types"])
+        self.warn_mismatches(chain["node"], chain["before"], chain["types"])
 
     def visit_while_loop(self, node):
+        # Entering the loop is one of the paths into the join at its head
+        types = self.joined_types(node)
+        self.warn_mismatches(node, self.symbol_types(types), types)
+        self.join_types(types)
         start_label = self.new_label()
         end_label = self.new_label()
 
+        loop = {
+            "start_label": start_label,
+            "end_label": end_label,
+            "mark": (len(self.tac_code), self.symbol_table.temp_var_count),
+            "types": types,
+        }
         self.tac_code.append(f"{start_label}:")
-        cond_result, _ = self.visit(node.children[0])
-        self.tac_code.append(f"if_false {cond_result} goto {end_label}")
-        self.visit(node.children[1])
-        self.tac_code.append(f"goto {start_label}")
-        self.tac_code.append(f"{end_label}:")
-        return None, None
+        self.schedule(
+            self.condition(node.children[0]),
+            (self.branch_while_loop, loop, 1),
+            node.children[1],
+            (self.exit_while_loop, loop, 0),
+        )
+
+    def branch_while_loop(self, loop, cond):
+        cond_result, _ = cond
+        constant = self.constant_condition(cond_result)
+        if constant is None:
+            self.jump_unless(cond_result, loop["end_label"])
+        elif not constant:
+            # The loop never runs: drop it from its start label on
+            self.begin_dead_code(loop["mark"])
+        loop["constant"] = constant
+
+    def exit_while_loop(self, loop):
+        if loop["constant"] is False:
+            self.end_dead_code()
+            self.set_types(loop["types"])
+            return
+        self.join_types(loop["types"])
+        self.tac_code.append(f"goto {loop['start_label']}")
+        if loop["constant"] is None:
+            self.tac_code.append(f"{loop['end_label']}:")
 
     def visit_function_def(self, node):
         func_name = node.children[0].leaf
+        params = node.children[1].children
         self.symbol_table.add_symbol(func_name, "Function")
+        symbol = self.symbol_table.get_symbol(func_name)
+        symbol["type"] = "Function"
+        symbol["params"] = len(params)
+        # The body runs whenever the function is called: what it assigns
+        # in enclosing scopes may hold anything once it is defined
+        nonlocal_keys = nonlocal_assignments(
+            node, self._assigned_names(node), self.symbol_table, self.variable_key
+        )
         self.symbol_table.enter_scope(func_name)
 
         self.tac_code.append(f"func_begin {func_name}")
 
-        for param in node.children[1].children:
+        for param in params:
             param_name = param.leaf
             self.symbol_table.add_symbol(param_name, "Any")
-            self.tac_code.append(f"pop_param {param_name}")
-
-        self.visit(node.children[2])  # Function body
-        self.tac_code.append(f"func_end {func_name}")
+            param_location = self.symbol_table.get_symbol(param_name)["location"]
+            self.tac_code.append(f"pop_param {param_location}")
+
+        # Function body
+        self.schedule(
+            node.children[2],
+            (self.exit_function_def, (func_name, nonlocal_keys), 0),
+        )
+
+    def exit_function_def(self, function):
+        func_name, nonlocal_keys = function
+        # The variables of the function, which the VM saves around each call
+        symbols = self.symbol_table.symbols
+        frame = [symbol["location"] for symbol in symbols[func_name].values()]
+        self.tac_code.append(" ".join(("func_end", func_name, *frame)))
         self.symbol_table.exit_scope()
-        return None, None
+        for scope, name in nonlocal_keys:
+            symbol = symbols[scope].get(name)
+            if symbol is not None:
+                symbol["type"] = "Any"
+                symbol["pinned"] = True
+
+    def visit_return(self, node):
+        return self.schedule_children(node, self.exit_return)
+
+    def exit_return(self, node, value):
+        if len(self.symbol_table.scope_stack) == 1:
+            print(f"Error: 'return' outside of a function{self.location_of(node)}.")
+            return
+        self.tac_code.append(f"return {value[0]}")
+
+    def visit_call(self, node):
+        return self.schedule_children(node, self.exit_call)
+
+    def exit_call(self, node, *args):
+        name = node.leaf
+        symbol = self.symbol_table.get_symbol(name)
+        if symbol is None:
+            print(f"Error: Function '{name}'{self.location_of(node)} not defined.")
+            return name, "Undefined"
+        if symbol["type"] != "Function":
+            print(f"Error: '{name}'{self.location_of(node)} is not a function.")
+            return name, "Undefined"
+        if len(args) != symbol["params"]:
+            print(
+                f"Error: Function '{name}'{self.location_of(node)} takes "
+                f"{symbol['params']} arguments, not {len(args)}."
+            )
+        for value, _ in args:
+            self.tac_code.append(f"param {value}")
+        temp_location = self.new_temp_location()
+        self.tac_code.append(f"{temp_location} := call {name} {len(args)}")
+        return temp_location, "Any"
 
     def visit_bin_op(self, node):
-        op_map = {
-            "+": "ADD",
-            "-": "SUB",
-            "*": "MUL",
-            "/": "DIV",
-            "%": "MOD",
-            "==": "EQ",
-            "!=": "NE",
-            "<": "LT",
-            "<=": "LE",
-            ">": "GT",
-            ">=": "GE",
-        }
-        op = op_map.get(node.leaf, node.leaf.upper())
-
-        left_val, left_type = self.visit(node.children[0])
-        right_val, right_type = self.visit(node.children[1])
-
+        return self.schedule_children(node, self.exit_bin_op)
+
+    def exit_bin_op(self, node, left, right):
+        op = BIN_OP_MAP.get(node.leaf) or node.leaf.upper()
+        return self.operation(op, left, right)
+
+    def operation(self, op, left, right):
+        """
+        Emits ``left op right`` for ``(value/location, type)`` operands and
+        returns its result. Operations on two numbers get the opcode typed
+        for them, an integer operand being converted if the other is a float.
+        """
+        left_type = left[1]
+        right_type = right[1]
+        common_type = operand_type(left_type, right_type)
+        op_type = "Integer" if op in RELATIONAL_OPS else common_type or "Any"
+
+        if self.fold_constants:
+            folded = fold_bin_op(op, left, right, op_type)
+            if folded is not None:
+                return folded
+
+        op, left_val, right_val = self.typed_operation(op, left, right, common_type)
         temp_location = self.new_temp_location()
-
-        result_type = "Float" if "Float" in (left_type, right_type) else "Integer"
-
         self.tac_code.append(f"{temp_location} := {left_val} {op} {right_val}")
-        return temp_location, result_type
+        return temp_location, op_type
+
+    def typed_operation(self, op, left, right, common_type):
+        """
+        Returns the opcode and operands of ``left op right``, the operands
+        converted to ``common_type`` (see ``types.operand_type``).
+        """
+        left_val, left_type = left
+        right_val, right_type = right
+        if common_type is not None:
+            if left_type != common_type:
+                left_val = self.to_float(left_val)
+            if right_type != common_type:
+                right_val = self.to_float(right_val)
+            op = typed_opcode(op, common_type)
+        return op, left_val, right_val
+
+    def to_float(self, value):
+        """Converts an integer operand to a float."""
+        if is_constant(value):
+            return float(value)
+        temp_location = self.new_temp_location()
+        self.tac_code.append(f"{temp_location} := ITOF {value}")
+        return temp_location
+
+    def condition(self, cond):
+        """
+        The work item evaluating the condition ``cond`` of an ``if`` or a
+        ``while`` for ``jump_unless``: a comparison is left for the jump to
+        make, when a single relational operator tests its negation.
+        """
+        if cond.type == "bin_op" and BIN_OP_MAP.get(cond.leaf) in RELATIONAL_OPS:
+            return (self.visit_comparison, cond, 0)
+        return cond
+
+    def visit_comparison(self, node):
+        return self.schedule_children(node, self.exit_comparison)
+
+    def exit_comparison(self, node, left, right):
+        op = BIN_OP_MAP[node.leaf]
+        left_type = left[1]
+        right_type = right[1]
+        negated = negated_relation(op, left_type, right_type)
+        if negated is None or self.fold_constants and (
+            is_constant(left[0]) and is_constant(right[0])
+        ):
+            return self.operation(op, left, right)
+        # The value is the comparison for the jump: (opcode, left, right)
+        common_type = operand_type(left_type, right_type)
+        return self.typed_operation(negated, left, right, common_type), "Integer"
+
+    def jump_unless(self, cond_result, label):
+        """Emits a jump to ``label`` taken when the condition is false."""
+        if cond_result.__class__ is tuple:
+            op, left_val, right_val = cond_result
+            self.tac_code.append(f"if {left_val} {op} {right_val} goto {label}")
+        else:
+            self.tac_code.append(f"if_false {cond_result} goto {label}")
 
     def visit_unary_op(self, node):
-        operand_val, operand_type = self.visit(node.children[0])
-        temp_location = self.new_temp_location()
-        self.tac_code.append(f"{temp_location} := 0 SUB {operand_val}")
-        return temp_location, operand_type
+        return self.schedule_children(node, self.exit_unary_op)
+
+    def exit_unary_op(self, node, operand):
+        operand_val, operand_val_type = operand
+        if self.fold_constants and is_constant(operand_val):
+            # What the emitted 0 SUB x computes: 0.0 rather than -0.0 for 0.0
+            return 0 - operand_val, operand_val_type
+        return self.operation("SUB", (0, "Integer"), operand)
 
     def visit_integer(self, node):
         return node.leaf, "Integer"
@@ -186,10 +628,13 @@ class ASTVisitor:
         return node.leaf, "String"
 
     def visit_identifier(self, node):
-        symbol = self.symbol_table.get_symbol(node.leaf)
+        scope, symbol = self.symbol_table.lookup(node.leaf)
         if not symbol:
-            print(f"Error: Variable '{node.leaf}' not defined.")
+            print(
+                f"Error: Variable '{node.leaf}'{self.location_of(node)} not defined."
+            )
             return node.leaf, "Undefined"
-
-        location = f"{symbol['offset']:03d}(SP)"
-        return location, symbol["type"]
+        if scope != self.symbol_table.scope_stack[-1]:
+            # A variable of an enclosing scope, read in a function body
+            return symbol["location"], "Any"
+        return symbol["location"], symbol["type"]
@@ -0,0 +1,134 @@
+"""
+Persistent compile server.
+
+Keeps the lexer, the parser tables and the compiler imported in one
+long-running process and serves compile requests over a Unix socket, so
+each compile skips interpreter startup and table loading. Requests are
+handled one at a time (the lexer and parser objects are shared).
+
+Protocol: the client sends one JSON object on a single line and gets one
+JSON line back, then the connection is closed.
+
+    {"command": "compile", "cwd": ..., "input_file": ..., "output_file_prefix": ...,
+     "options": {...compile_source options...}, "cache": [dir, bytes] | null,
+     "run": {...cli_options.run_options...}}
+    -> {"status": 0, "log": "...everything main.py would have printed..."}
+
+    {"command": "ping"} / {"command": "stop"} -> {"status": 0, "log": ""}
+
+A compile runs in the client's working directory ``cwd``, so relative
+paths and the printed messages are the same as with main.py. The run
+options (--stream, --stats, --profile) apply to the compile done in the
+server: the stats and the profile are those of the server process.
+
+Usage: python server.py [--socket PATH]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import traceback
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from main import run_compile
+from utils.compile_cache import CompileCache
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"jlc-{os.getuid()}.sock")
+
+
+class CompileHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            response = self.server.dispatch(request)
+        except Exception:
+            response = {"status": 1, "log": traceback.format_exc()}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class CompileServer(socketserver.UnixStreamServer):
+    def __init__(self, path):
+        super().__init__(path, CompileHandler)
+        self.caches = {}
+        self.compiles = 0
+        self.stopping = False
+
+    def serve(self):
+        """Handles requests one at a time until a "stop" request."""
+        while not self.stopping:
+            self.handle_request()
+
+    def dispatch(self, request):
+        command = request.get("command")
+        if command == "ping":
+            return {"status": 0, "log": ""}
+        if command == "stop":
+            self.stopping = True
+            return {"status": 0, "log": ""}
+        if command != "compile":
+            return {"status": 1, "log": f"Error: Unknown command '{command}'.\n"}
+
+        cache = None
+        if request.get("cache"):
+            directory, max_bytes = request["cache"]
+            cache = self.caches.get(directory)
+            if cache is None:
+                cache = self.caches[directory] = CompileCache(directory, max_bytes)
+
+        os.chdir(request["cwd"])
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            status = run_compile(
+                request["input_file"],
+                request["output_file_prefix"],
+                cache=cache,
+                **request.get("run", {}),
+                **request["options"],
+            )
+        self.compiles += 1
+        return {"status": status, "log": log.getvalue()}
+
+
+def socket_in_use(path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(usage="python server.py [--socket PATH]")
+    arg_parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        help=f"Unix socket to listen on (default: {DEFAULT_SOCKET})",
+    )
+    args = arg_parser.parse_args()
+
+    if os.path.exists(args.socket):
+        if socket_in_use(args.socket):
+            print(f"Error: A server is already listening on {args.socket}.")
+            sys.exit(1)
+        os.remove(args.socket)  # Left behind by a server that did not exit cleanly
+
+    # Exit through the finally block below on SIGTERM too, removing the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server = CompileServer(args.socket)
+    print(f"Compile server listening on {args.socket}")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(args.socket)
+        print(f"Compile server stopped after {server.compiles} compiles")
@@ -0,0 +1,227 @@
+"""
+Streaming compilation in bounded memory.
+
+``compile_stream`` writes the same output files as ``main.compile_file``,
+but never holds the whole program: the source is lexed a chunk at a time
+(see ``TokenReader``) and each top-level statement is compiled as soon as
+the parser reduces it in ``p_statement_list``. Its TAC, and optionally its
+.dot nodes, are written out and the subtree is dropped before the next
+statement is parsed. Memory then depends on the size of the largest
+statement and on the number of symbols, not on the length of the source.
+
+The .tac header (the frame sizes) is only known at the end, so the
+instructions go to a temporary file that is copied after the header.
+The .tacb file (``--bytecode``) is assembled from the finished .tac, so
+it does hold the whole TAC in memory, though never the source or its AST.
+A syntax error fails the compile: PLY's error recovery may drop
+statements that were already written out.
+"""
+import contextlib
+import os
+import shutil
+import tempfile
+
+from lexer.token_stream import TokenReader
+from main import (
+    LEXERS,
+    OUTPUTS,
+    format_bytecode,
+    format_instructions,
+    format_tac_header,
+    format_tokens,
+)
+from semantic.visitor import ASTVisitor
+from syntactic import parser as grammar
+from syntactic.ast_nodes import Node
+from syntactic.tables import load_parser
+from tac.allocator import allocate_temps
+from tac.inline import Inliner
+from tac.instructions import format_code, parse_code
+from tac.optimize import optimize as optimize_tac, temp_slots
+from tac.peephole import Peephole, report as peephole_report
+from tac.vm import read_tac_file
+from utils.dot_generator import DotWriter
+from utils.instrumentation import no_phase
+
+
+class StreamCompiler:
+    """
+    Compiles each top-level statement as the parser reduces it, writing
+    numbered TAC lines to ``tac_file`` and drawing the statement with
+    ``dot`` (a ``DotWriter`` already past ``begin_program``), if given.
+    With ``reuse_temps``, temp slots are allocated per statement, which
+    matches allocating the whole program since temps never live across
+    top-level statements. With ``optimize``, each statement is optimized on
+    its own, so nothing is propagated from one statement to the next, but
+    calls inline the small functions earlier statements defined. The
+    ``peephole`` patterns also run per statement, so none matches across
+    two statements; the ``removed`` counts add up over the program.
+    """
+
+    def __init__(
+        self,
+        tac_file,
+        dot=None,
+        fold_constants=True,
+        reuse_temps=True,
+        optimize=False,
+        peephole=(),
+    ):
+        self.tac_file = tac_file
+        self.dot = dot
+        self.reuse_temps = reuse_temps
+        self.optimize = optimize
+        self.inliner = Inliner() if optimize else None
+        self.peephole = Peephole(peephole) if peephole else None
+        self.visitor = ASTVisitor(fold_constants=fold_constants)
+        self.statements = 0
+        self.instructions = 0
+        self.temp_slots = 0
+        self.errors = 0
+        # The main parser, except that top-level statements are compiled
+        # and dropped instead of collected
+        self._parser = load_parser(grammar)
+        for production in self._parser.productions:
+            if production.func == "p_statement_list":
+                production.callable = self._statement_list
+        self._parser.errorfunc = self._syntax_error
+
+    @property
+    def temp_count(self):
+        if self.reuse_temps:
+            return self.temp_slots
+        return self.visitor.symbol_table.temp_var_count
+
+    def parse(self, reader):
+        """Parses and compiles everything ``reader`` lexes; True on success."""
+        self.visitor.line_index = reader.line_index
+        ast = self._parser.parse(lexer=reader)
+        return ast is not None and not self.errors
+
+    def _statement_list(self, p):
+        # Only the statement list of the program sits on an empty stack
+        if len(p.stack) > 1:
+            grammar.p_statement_list(p)
+            return
+        self.compile_statement(p[len(p) - 1])
+        p[0] = p[1] if len(p) == 3 else Node("statement_list", [])
+
+    def _syntax_error(self, p):
+        self.errors += 1
+        grammar.p_error(p)
+
+    def compile_statement(self, node):
+        visitor = self.visitor
+        visitor.visit(node)
+        tac_code = visitor.tac_code
+        if self.peephole is not None:
+            tac_code = format_code(self.peephole.run(parse_code(tac_code)))
+        if self.optimize:
+            tac_code = optimize_tac(tac_code, self.inliner)[0]
+            table = visitor.symbol_table
+            table.temp_var_count = max(table.temp_var_count, temp_slots(tac_code))
+        if self.reuse_temps:
+            tac_code, slots = allocate_temps(tac_code)
+            self.temp_slots = max(self.temp_slots, slots)
+            visitor.symbol_table.temp_var_count = 0
+        self.tac_file.write(format_instructions(tac_code, self.instructions))
+        self.instructions += len(tac_code)
+        visitor.tac_code = []
+        if self.dot is not None:
+            self.dot.add_statement(node)
+        self.statements += 1
+
+
+def compile_stream(
+    input_file_path,
+    output_prefix,
+    lexer="ply",
+    fold_constants=True,
+    reuse_temps=True,
+    optimize=False,
+    peephole=(),
+    dot_limits=None,
+    write_dot=False,
+    bytecode=False,
+    stats=None,
+):
+    """
+    Compiles a source file statement by statement and writes its outputs,
+    as ``main.compile_file`` does. The .dot file is only written with
+    ``write_dot`` and the .tacb file with ``bytecode``. Returns the exit
+    status: 1 if the file cannot be read.
+    """
+    try:
+        source = open(input_file_path, "r")
+    except FileNotFoundError:
+        print(f"Error: Input file '{input_file_path}' not found.")
+        return 1
+
+    paths = {suffix: f"{output_prefix}{suffix}" for suffix, _ in OUTPUTS}
+    written = {".dot": write_dot, ".tacb": False}
+    phase = stats.phase if stats is not None else no_phase
+    with contextlib.ExitStack() as files:
+        files.enter_context(source)
+        tokens_file = files.enter_context(open(paths["_tokens.txt"], "w"))
+        tac_body = files.enter_context(tempfile.TemporaryFile("w+"))
+        dot = None
+        if write_dot:
+            dot_file = files.enter_context(open(paths[".dot"], "w"))
+            dot = DotWriter(dot_file, **(dot_limits or {}))
+            dot.begin_program()
+
+        def dump_tokens(tokens):
+            tokens_file.write(format_tokens(tokens, reader.line_index))
+
+        reader = TokenReader(LEXERS[lexer], source, dump_tokens)
+        compiler = StreamCompiler(
+            tac_body, dot, fold_constants, reuse_temps, optimize, peephole
+        )
+        with phase("stream compile"):
+            parsed = compiler.parse(reader)
+        if parsed:
+            if dot is not None:
+                dot.end_program()
+            symbols = compiler.visitor.symbol_table
+            with phase("write"):
+                with open(paths["_symbol_table.txt"], "w") as f:
+                    f.write(symbols.to_string())
+                with open(paths[".tac"], "w") as f:
+                    header = format_tac_header(
+                        symbols.total_var_size, compiler.temp_count
+                    )
+                    f.write(header)
+                    tac_body.seek(0)
+                    shutil.copyfileobj(tac_body, f)
+            if bytecode:
+                with phase("bytecode"):
+                    var_size, temp_size, tac_code = read_tac_file(paths[".tac"])
+                    data = format_bytecode(var_size, temp_size // 8, tac_code)
+                if data is not None:
+                    with open(paths[".tacb"], "wb") as f:
+                        f.write(data)
+                    written[".tacb"] = True
+
+    if stats is not None:
+        stats.count("source_bytes", os.path.getsize(input_file_path))
+        stats.count("tokens", reader.count)
+        stats.count("statements", compiler.statements)
+        stats.count("tac_instructions", compiler.instructions)
+        stats.count("temp_slots", compiler.temp_count)
+        stats.count("labels", compiler.visitor.label_count)
+        if compiler.peephole is not None:
+            for name, count in compiler.peephole.removed.items():
+                stats.count(f"peephole_{name.replace('-', '_')}", count)
+
+    if compiler.peephole is not None:
+        print(peephole_report(compiler.peephole.removed))
+    print(f"Tokens saved to {paths['_tokens.txt']}")
+    if not parsed:
+        if write_dot:
+            os.remove(paths[".dot"])
+        print("Parsing failed. No output files generated.")
+        return 0
+    for suffix, description in OUTPUTS[1:]:
+        if written.get(suffix, True):
+            print(f"{description} saved to {paths[suffix]}")
+    return 0
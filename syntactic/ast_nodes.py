@@ -1,10 +1,13 @@
 class Node:
     """Base class for AST nodes."""
 
-    def __init__(self, type, children=None, leaf=None):
+    # Slotted to keep large trees compact. Fixed-arity nodes are built with
+    # children tuples and leaves share the empty tuple; only list-like nodes
+    # (statement_list, param_list, if_statement) keep growable lists.
+    __slots__ = ("type", "children", "leaf", "lexpos")
+
+    def __init__(self, type, children=None, leaf=None, lexpos=None):
         self.type = type
-        if children:
-            self.children = children
-        else:
-            self.children = []
+        self.children = children if children is not None else ()
         self.leaf = leaf
+        self.lexpos = lexpos
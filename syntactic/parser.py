@@ -1,12 +1,18 @@
-import ply.yacc as yacc
+import sys
+
 from lexer.lexer import tokens
 from .ast_nodes import Node
+from .tables import load_parser
 
 
 precedence = (
     ("left", "PLUS", "MINUS"),
     ("left", "TIMES", "DIVIDE", "MOD"),
     ("right", "UMINUS"),
+    # A name followed by "(" on the same line is a call, even where the "("
+    # could start the next statement. A "(" starting a line is LINE_LPAREN,
+    # which never continues a call.
+    ("left", "LPAREN"),
 )
 
 
@@ -15,9 +21,9 @@ def p_program(p):
     | empty"""
 
     if p[1] is None:
-        p[0] = Node("program", [Node("statement_list", [])])
+        p[0] = Node("program", (Node("statement_list", []),))
     else:
-        p[0] = Node("program", [p[1]])
+        p[0] = Node("program", (p[1],))
 
 
 def p_statement_list(p):
@@ -38,6 +44,7 @@ def p_statement(p):
     | if_statement
     | while_statement
     | function_def_statement
+    | return_statement
     | expression_statement"""
 
     p[0] = p[1]
@@ -45,7 +52,7 @@ def p_statement(p):
 
 def p_expression_statement(p):
     "expression_statement : expression"
-    p[0] = Node("expression_statement", [p[1]])
+    p[0] = Node("expression_statement", (p[1],))
 
 
 def p_assignment_statement(p):
@@ -54,7 +61,12 @@ def p_assignment_statement(p):
     | ID MINUS_ASSIGN expression
     | ID TIMES_ASSIGN expression
     | ID DIVIDE_ASSIGN expression"""
-    p[0] = Node("assign", [Node("identifier", leaf=p[1]), p[3]], p[2])
+    p[0] = Node(
+        "assign",
+        (Node("identifier", leaf=p[1], lexpos=p.lexpos(1)), p[3]),
+        p[2],
+        lexpos=p.lexpos(1),
+    )
 
 
 def p_if_statement(p):
@@ -64,7 +76,7 @@ def p_if_statement(p):
         children.extend(p[4])
     if p[5]:
         children.append(p[5])
-    p[0] = Node("if_statement", children)
+    p[0] = Node("if_statement", children, lexpos=p.lexpos(1))
 
 
 def p_else_if_clauses_opt(p):
@@ -84,7 +96,7 @@ def p_else_if_clauses(p):
 
 def p_else_if_clause(p):
     "else_if_clause : ELSEIF expression statement_list"
-    p[0] = Node("elseif", [p[2], p[3]])
+    p[0] = Node("elseif", (p[2], p[3]))
 
 
 def p_else_clause_opt(p):
@@ -95,17 +107,17 @@ def p_else_clause_opt(p):
 
 def p_else_clause(p):
     "else_clause : ELSE statement_list"
-    p[0] = Node("else", [p[2]])
+    p[0] = Node("else", (p[2],))
 
 
 def p_while_statement(p):
     "while_statement : WHILE expression statement_list END"
-    p[0] = Node("while_loop", [p[2], p[3]])
+    p[0] = Node("while_loop", (p[2], p[3]), lexpos=p.lexpos(1))
 
 
 def p_function_def_statement(p):
     "function_def_statement : FUNCTION ID LPAREN param_list_opt RPAREN statement_list END"
-    p[0] = Node("function_def", [Node("identifier", leaf=p[2]), p[4], p[6]])
+    p[0] = Node("function_def", (Node("identifier", leaf=p[2]), p[4], p[6]))
 
 
 def p_param_list_opt(p):
@@ -124,6 +136,11 @@ def p_param_list(p):
         p[0] = Node("param_list", [Node("param", leaf=p[1])])
 
 
+def p_return_statement(p):
+    "return_statement : RETURN expression"
+    p[0] = Node("return", (p[2],), lexpos=p.lexpos(1))
+
+
 def p_expression_binop(p):
     """expression : expression PLUS expression
     | expression MINUS expression
@@ -136,19 +153,41 @@ def p_expression_binop(p):
     | expression LE expression
     | expression GT expression
     | expression GE expression"""
-    p[0] = Node("bin_op", [p[1], p[3]], p[2])
+    p[0] = Node("bin_op", (p[1], p[3]), p[2])
 
 
 def p_expression_uminus(p):
     "expression : MINUS expression %prec UMINUS"
-    p[0] = Node("unary_op", [p[2]], "-")
+    p[0] = Node("unary_op", (p[2],), "-")
 
 
 def p_expression_group(p):
-    "expression : LPAREN expression RPAREN"
+    """expression : LPAREN expression RPAREN
+    | LINE_LPAREN expression RPAREN"""
     p[0] = p[2]
 
 
+def p_expression_call(p):
+    "expression : ID LPAREN arg_list_opt RPAREN"
+    p[0] = Node("call", tuple(p[3]), p[1], lexpos=p.lexpos(1))
+
+
+def p_arg_list_opt(p):
+    """arg_list_opt : arg_list
+    | empty"""
+    p[0] = p[1] if p[1] else []
+
+
+def p_arg_list(p):
+    """arg_list : arg_list COMMA expression
+    | expression"""
+    if len(p) == 4:
+        p[1].append(p[3])
+        p[0] = p[1]
+    else:
+        p[0] = [p[1]]
+
+
 def p_expression_term(p):
     """expression : INTEGER
     | FLOAT
@@ -162,7 +201,7 @@ def p_expression_term(p):
     elif token.type == "STRING":
         p[0] = Node("string", leaf=p[1])
     elif token.type == "ID":
-        p[0] = Node("identifier", leaf=p[1])
+        p[0] = Node("identifier", leaf=p[1], lexpos=p.lexpos(1))
 
 
 def p_empty(p):
@@ -172,9 +211,16 @@ def p_empty(p):
 
 def p_error(p):
     if p:
-        print(f"Syntax error at '{p.value}' (type: {p.type}) on line {p.lineno}")
+        line_index = getattr(p.lexer, "line_index", None)
+        if line_index is not None:
+            line, column = line_index.position(p.lexpos)
+            print(
+                f"Syntax error at '{p.value}' (type: {p.type}) on line {line}, column {column}"
+            )
+        else:
+            print(f"Syntax error at '{p.value}' (type: {p.type}) on line {p.lineno}")
     else:
         print("Syntax error at EOF")
 
 
-parser = yacc.yacc()
+parser = load_parser(sys.modules[__name__])
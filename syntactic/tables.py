@@ -0,0 +1,101 @@
+"""
+Ahead-of-time LALR table build and fast startup loading.
+
+Build the tables after changing the grammar with:
+
+    python -m syntactic.tables
+
+This generates the LALR tables once and serializes them with ``marshal`` to
+``parsetab.bin``. At startup ``load_parser`` unmarshals the action/goto
+tables directly into PLY's ``LRParser``, skipping grammar reflection,
+validation and the rebuild of the table dicts, and never writes into the
+source tree. If the file is missing or was built for a different grammar,
+the tables are generated in memory instead.
+"""
+import hashlib
+import marshal
+import os
+import sys
+
+import ply.yacc as yacc
+
+TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parsetab.bin")
+TABLES_FORMAT = 1
+
+
+def grammar_signature(module):
+    """Hashes the precedence, tokens and rule docstrings (in definition order)."""
+    rules = sorted(
+        (
+            getattr(module, name)
+            for name in dir(module)
+            if name.startswith("p_") and name != "p_error"
+        ),
+        key=lambda func: func.__code__.co_firstlineno,
+    )
+    parts = [repr(module.precedence), " ".join(module.tokens)]
+    parts.extend(" ".join((func.__doc__ or "").split()) for func in rules)
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+def build_tables(module, path=TABLES_PATH):
+    """Generates the LALR tables for ``module`` and writes them to ``path``."""
+    parser = yacc.yacc(module=module, debug=False, write_tables=False)
+    productions = tuple(
+        (str(p), p.name, p.len, p.func, os.path.basename(p.file or ""), p.line or 0)
+        for p in parser.productions
+    )
+    tables = (
+        TABLES_FORMAT,
+        grammar_signature(module),
+        parser.action,
+        parser.goto,
+        productions,
+    )
+    with open(path, "wb") as f:
+        marshal.dump(tables, f)
+    return parser
+
+
+def read_tables(module, path=TABLES_PATH):
+    """Returns an ``LRTable`` loaded from ``path``, or None if missing or stale."""
+    try:
+        with open(path, "rb") as f:
+            version, signature, action, goto, productions = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != TABLES_FORMAT or signature != grammar_signature(module):
+        return None
+
+    lr = yacc.LRTable()
+    lr.lr_method = "LALR"
+    lr.lr_action = action
+    lr.lr_goto = goto
+    lr.lr_productions = [yacc.MiniProduction(*p) for p in productions]
+    return lr
+
+
+def load_parser(module, path=TABLES_PATH):
+    """Creates the parser for ``module`` from the prebuilt tables when possible."""
+    lr = read_tables(module, path)
+    if lr is None:
+        print(
+            "Warning: parser tables are missing or out of date; "
+            "run 'python -m syntactic.tables' to rebuild them.",
+            file=sys.stderr,
+        )
+        return yacc.yacc(
+            module=module, debug=False, write_tables=False, errorlog=yacc.NullLogger()
+        )
+
+    lr.bind_callables(vars(module))
+    return yacc.LRParser(lr, module.p_error)
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from syntactic import parser as grammar
+
+    build_tables(grammar)
+    print(f"Parser tables saved to {TABLES_PATH}")
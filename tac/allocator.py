@@ -0,0 +1,96 @@
+"""
+Temp slot reuse for generated TAC.
+
+``ASTVisitor.new_temp_location`` hands out a fresh ``NNN(Rx)`` slot for
+every intermediate value. ``allocate_temps`` computes the live range of
+each temp from block-level liveness and runs a linear scan over the ranges,
+mapping temps whose ranges do not overlap onto the same slot. The temp
+frame then only needs as many slots as there are temps live at once.
+"""
+import heapq
+
+from .cfg import build_blocks, liveness
+from .instructions import is_temp, parse_code
+
+
+def live_ranges(instructions):
+    """Maps each temp to the ``[first, last]`` instruction indices it is live at."""
+    blocks = build_blocks(instructions)
+    live_out = liveness(instructions, blocks, is_temp)
+    ranges = {}
+
+    def extend(temp, i):
+        bounds = ranges.get(temp)
+        if bounds is None:
+            ranges[temp] = [i, i]
+        else:
+            if i < bounds[0]:
+                bounds[0] = i
+            if i > bounds[1]:
+                bounds[1] = i
+
+    # Ranges are spans, so only the ends matter: the defs and uses inside a
+    # block, plus the block bounds for temps live on entry or on exit.
+    for block in blocks:
+        live = set(live_out[block.index])
+        for temp in live:
+            extend(temp, block.end - 1)
+        for i in range(block.end - 1, block.start - 1, -1):
+            instr = instructions[i]
+            dest = instr.dest
+            if dest is not None and is_temp(dest):
+                live.discard(dest)
+                extend(dest, i)
+            for operand in instr.operands:
+                if is_temp(operand):
+                    live.add(operand)
+                    extend(operand, i)
+        for temp in live:
+            extend(temp, block.start)
+    return ranges
+
+
+def assign_slots(ranges):
+    """
+    Linear scan: walks the ranges by start and gives each temp the lowest
+    slot whose previous owner is dead. A range ending where another starts
+    can share its slot, since an instruction reads its operands before
+    writing its destination. Returns ``(slot per temp, slot count)``.
+    """
+    slots = {}
+    free = []
+    active = []  # Heap of (end, slot)
+    slot_count = 0
+    for temp, (start, end) in sorted(ranges.items(), key=lambda item: item[1]):
+        while active and active[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(active)[1])
+        if free:
+            slot = heapq.heappop(free)
+        else:
+            slot = slot_count
+            slot_count += 1
+        slots[temp] = slot
+        heapq.heappush(active, (end, slot))
+    return slots, slot_count
+
+
+def allocate_temps(tac_code):
+    """
+    Rewrites the temps of ``tac_code`` (a list of TAC lines) onto reused
+    slots. Returns the new code and the number of temp slots it needs.
+    """
+    instructions = parse_code(tac_code)
+    slots, slot_count = assign_slots(live_ranges(instructions))
+    locations = {temp: f"{slot * 8:03d}(Rx)" for temp, slot in slots.items()}
+
+    code = []
+    for line, instr in zip(tac_code, instructions):
+        if "(Rx)" in line:
+            if instr.dest in locations:
+                instr.dest = locations[instr.dest]
+            instr.operands = tuple(
+                locations.get(operand, operand) for operand in instr.operands
+            )
+            line = instr.format()
+        code.append(line)
+    return code, slot_count
@@ -0,0 +1,502 @@
+"""
+Binary bytecode for TAC programs, the compact form of a .tac file.
+
+``assemble`` resolves TAC text once: every operand becomes an index into
+the memory of ``tac.vm`` (``[SP variables | Rx temps | constants]``) and
+every jump the index of the instruction it goes to. The file holds, after
+a header with the frame sizes and the length of each section:
+
+* the ``dest``, ``a`` and ``b`` operands of each instruction, as int16, or
+  int32 when an index does not fit;
+* the lines of the .tac file that hold labels, as uint32, so that the
+  labels and the line numbers errors are reported at come back;
+* the constant pool: an int64, float64 or string (offset and length in
+  the string data) per constant, which follow the temps in memory;
+* the functions: where each one starts, its name and the variables its
+  ``func_end`` lists (see ``tac.vm``), as int32;
+* one opcode byte per instruction (the index of its name in
+  ``OPCODE_NAMES``), a kind byte per constant, then the string data.
+
+All numbers are little-endian. ``load`` maps a file with ``mmap`` and
+reads the sections in place, without parsing any text. ``disassemble``
+turns bytecode back into TAC: the same instructions at the same line
+numbers, with the labels named ``L0``, ``L1``, ... and the constants
+written in their shortest form.
+
+Usage: python -m tac.bytecode <input> <output>
+(a .tac file is assembled, a bytecode file disassembled)
+"""
+import argparse
+import ast
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+from .instructions import COMPARE_JUMPS, CONVERSIONS, KNOWN_OPCODES, Instruction, parse
+
+MAGIC = b"TACB"
+BYTECODE_FORMAT = 1
+
+# Opcode byte <-> TAC opcode; labels have none
+OPCODE_NAMES = tuple(sorted((KNOWN_OPCODES - {"label"}) | {"call"}))
+OPCODE_CODES = {name: code for code, name in enumerate(OPCODE_NAMES)}
+
+# Magic, format, variable and temp sizes in bytes and operand size, then
+# the number of instructions, labels, constants, functions, func_end
+# variables and bytes of string data
+HEADER = struct.Struct("<4sIIIIIIIIII")
+# Start (-1 for a func_end without func_begin), name offset and length,
+# first func_end variable and count (-1 without func_end)
+FUNCTION = struct.Struct("<iIIii")
+CONSTANT_SIZE = 8
+
+# Constant kinds; integers beyond 64 bits are kept as their digits
+INTEGER, FLOAT, STRING, BIG_INTEGER = range(4)
+
+
+class TACRuntimeError(Exception):
+    pass
+
+
+def parse_constant(text):
+    if text.startswith('"'):
+        return ast.literal_eval(text)
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def format_constant(value):
+    """The TAC text of a constant, as ``parse_constant`` reads it."""
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    return repr(value)
+
+
+class Bytecode:
+    """
+    A resolved program: ``opcodes`` holds a code per instruction and
+    ``operands`` three ints per instruction. ``labels`` are the TAC lines
+    holding labels, ``constants`` the values of the constant pool and
+    ``functions`` ``(name, start, frame)`` tuples, with ``frame`` None for
+    a function without ``func_end``.
+    """
+
+    def __init__(
+        self, var_size, temp_size, opcodes, operands, labels, constants, functions
+    ):
+        self.var_size = var_size
+        self.temp_size = temp_size
+        self.opcodes = opcodes
+        self.operands = operands
+        self.labels = labels
+        self.constants = constants
+        self.functions = functions
+        self._label_keys = None
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def line(self, index):
+        """The TAC line of instruction ``index``."""
+        if self._label_keys is None:
+            # Label i has this many instructions before it
+            self._label_keys = [line - i for i, line in enumerate(self.labels)]
+        return index + bisect_right(self._label_keys, index)
+
+    def to_bytes(self):
+        """Serializes the program in the format ``from_buffer`` reads."""
+        strings = bytearray()
+        kinds = bytearray()
+        pool = []
+
+        def add_string(text):
+            data = text.encode("utf-8", "surrogatepass")
+            offset = len(strings)
+            strings.extend(data)
+            return offset, len(data)
+
+        for value in self.constants:
+            if isinstance(value, str):
+                kinds.append(STRING)
+                pool.append(struct.pack("<II", *add_string(value)))
+            elif isinstance(value, float):
+                kinds.append(FLOAT)
+                pool.append(struct.pack("<d", value))
+            elif -(1 << 63) <= value < 1 << 63:
+                kinds.append(INTEGER)
+                pool.append(struct.pack("<q", value))
+            else:
+                kinds.append(BIG_INTEGER)
+                pool.append(struct.pack("<II", *add_string(str(value))))
+
+        frames = array("i")
+        functions = []
+        for name, start, frame in self.functions:
+            offset, length = add_string(name)
+            if frame is None:
+                functions.append(FUNCTION.pack(start, offset, length, 0, -1))
+            else:
+                functions.append(
+                    FUNCTION.pack(start, offset, length, len(frames), len(frame))
+                )
+                frames.extend(frame)
+
+        operands = self.operands
+        small = -(1 << 15) <= min(operands, default=0)
+        small = small and max(operands, default=0) < 1 << 15
+        operands = array("h" if small else "i", operands)
+        header = HEADER.pack(
+            MAGIC,
+            BYTECODE_FORMAT,
+            self.var_size,
+            self.temp_size,
+            operands.itemsize,
+            len(self.opcodes),
+            len(self.labels),
+            len(self.constants),
+            len(self.functions),
+            len(frames),
+            len(strings),
+        )
+        return b"".join(
+            (
+                header,
+                _little_endian(operands),
+                _little_endian(array("I", self.labels)),
+                *pool,
+                *functions,
+                _little_endian(frames),
+                self.opcodes,
+                kinds,
+                strings,
+            )
+        )
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """
+        Reads a program from ``buffer`` (bytes or an mmap). The opcodes,
+        operands and labels stay views of it.
+        """
+        view = memoryview(buffer)
+        if len(view) < HEADER.size or view[: len(MAGIC)] != MAGIC:
+            raise TACRuntimeError("Not a bytecode file")
+        (
+            _,
+            version,
+            var_size,
+            temp_size,
+            operand_size,
+            count,
+            label_count,
+            constant_count,
+            function_count,
+            frame_size,
+            string_size,
+        ) = HEADER.unpack_from(view)
+        if version != BYTECODE_FORMAT:
+            raise TACRuntimeError(f"Unsupported bytecode format {version}")
+        if operand_size not in (2, 4):
+            raise TACRuntimeError(f"Unsupported operand size {operand_size}")
+
+        sizes = (
+            3 * operand_size * count,
+            4 * label_count,
+            CONSTANT_SIZE * constant_count,
+            FUNCTION.size * function_count,
+            4 * frame_size,
+            count,
+            constant_count,
+            string_size,
+        )
+        if HEADER.size + sum(sizes) != len(view):
+            raise TACRuntimeError("Truncated bytecode file")
+        sections = []
+        offset = HEADER.size
+        for size in sizes:
+            sections.append(view[offset : offset + size])
+            offset += size
+        operands, labels, pool, table, frames, opcodes, kinds, strings = sections
+        operands = _native(operands, "h" if operand_size == 2 else "i")
+        labels = _native(labels, "I")
+        frames = _native(frames, "i")
+        if count and max(opcodes) >= len(OPCODE_NAMES):
+            raise TACRuntimeError(f"Unknown opcode {max(opcodes)}")
+
+        def string(offset, length):
+            return str(strings[offset : offset + length], "utf-8", "surrogatepass")
+
+        constants = []
+        for i, kind in enumerate(kinds):
+            value = pool[i * CONSTANT_SIZE : (i + 1) * CONSTANT_SIZE]
+            if kind == INTEGER:
+                constants.append(struct.unpack("<q", value)[0])
+            elif kind == FLOAT:
+                constants.append(struct.unpack("<d", value)[0])
+            elif kind == STRING:
+                constants.append(string(*struct.unpack("<II", value)))
+            else:
+                constants.append(int(string(*struct.unpack("<II", value))))
+
+        functions = []
+        for start, name, length, first, frame_count in FUNCTION.iter_unpack(table):
+            frame = None
+            if frame_count >= 0:
+                frame = tuple(frames[first : first + frame_count])
+            functions.append((string(name, length), start, frame))
+
+        return cls(
+            var_size, temp_size, opcodes, operands, labels, constants, functions
+        )
+
+    def disassemble(self):
+        """Returns the program as TAC lines, labels included."""
+        var_count = self.var_size // 8
+        constants_start = var_count + self.temp_size // 8
+
+        def operand(index):
+            if index < var_count:
+                return f"{index * 8:03d}(SP)"
+            if index < constants_start:
+                return f"{(index - var_count) * 8:03d}(Rx)"
+            return format_constant(self.constants[index - constants_start])
+
+        # Jumps go to the last label before their target
+        targets = {}
+        for i, line in enumerate(self.labels):
+            targets[line - i] = f"L{i}"
+        names = {start + 1: name for name, start, _ in self.functions if start >= 0}
+
+        code = []
+        labels = iter(self.labels)
+        next_label = next(labels, None)
+        operands = self.operands
+        for i, code_byte in enumerate(self.opcodes):
+            while next_label == len(code):
+                code.append(f"L{len(code) - i}:")
+                next_label = next(labels, None)
+            opcode = OPCODE_NAMES[code_byte]
+            dest, a, b = operands[3 * i : 3 * i + 3]
+            if opcode == "goto":
+                instr = Instruction(opcode, label=targets[dest])
+            elif opcode == "if_false":
+                instr = Instruction(opcode, None, (operand(a),), targets[dest])
+            elif opcode in COMPARE_JUMPS:
+                instr = Instruction(
+                    opcode, None, (operand(a), operand(b)), targets[dest]
+                )
+            elif opcode == "func_begin":
+                instr = Instruction(opcode, None, (self.functions[a][0],))
+            elif opcode == "func_end":
+                name, _, frame = self.functions[a]
+                frame = tuple(operand(slot) for slot in frame or ())
+                instr = Instruction(opcode, None, (name, *frame))
+            elif opcode == "call":
+                dest = None if dest < 0 else operand(dest)
+                instr = Instruction(opcode, dest, (names[a], str(b)))
+            elif opcode == "param" or opcode == "return":
+                instr = Instruction(opcode, None, (operand(a),))
+            elif opcode == "pop_param":
+                instr = Instruction(opcode, operand(dest))
+            elif opcode == ":=" or opcode in CONVERSIONS:
+                instr = Instruction(opcode, operand(dest), (operand(a),))
+            else:
+                instr = Instruction(opcode, operand(dest), (operand(a), operand(b)))
+            code.append(instr.format())
+        while next_label is not None:
+            code.append(f"L{len(code) - len(self.opcodes)}:")
+            next_label = next(labels, None)
+        return code
+
+
+def _little_endian(numbers):
+    if sys.byteorder == "little":
+        return numbers
+    swapped = array(numbers.typecode, numbers)
+    swapped.byteswap()
+    return swapped
+
+
+def _native(view, typecode):
+    """``view`` as ints of ``typecode``, in place on little-endian machines."""
+    if sys.byteorder == "little":
+        return view.cast(typecode)
+    numbers = array(typecode, view.tobytes())
+    numbers.byteswap()
+    return numbers
+
+
+def assemble(tac_code, var_size=None, temp_size=None):
+    """
+    Resolves ``tac_code`` (TAC lines) into ``Bytecode``. ``var_size`` and
+    ``temp_size`` are the frame sizes in bytes from the .tac header; by
+    default they are derived from the highest offsets used.
+    """
+    instructions = [parse(line) for line in tac_code]
+    # Labels are not executed: each resolves to the index of the next
+    # instruction
+    targets = {}
+    labels = array("I")
+    for i, instr in enumerate(instructions):
+        if instr.opcode == "label":
+            targets[instr.label] = i - len(labels)
+            labels.append(i)
+
+    offsets = {"SP": [], "Rx": []}
+    for instr in instructions:
+        for operand in (instr.dest, *instr.operands):
+            if operand is not None and operand.endswith(("(SP)", "(Rx)")):
+                offsets[operand[-3:-1]].append(int(operand[:-4]))
+    if var_size is None:
+        var_size = max(offsets["SP"], default=-8) + 8
+    if temp_size is None:
+        temp_size = max(offsets["Rx"], default=-8) + 8
+    var_count = var_size // 8
+    temp_count = temp_size // 8
+
+    constant_slots = {}
+    constants = []
+
+    def resolve(operand, index):
+        if operand.endswith("(SP)"):
+            slot = int(operand[:-4]) // 8
+            if slot < var_count:
+                return slot
+        elif operand.endswith("(Rx)"):
+            slot = int(operand[:-4]) // 8
+            if slot < temp_count:
+                return var_count + slot
+        else:
+            slot = constant_slots.get(operand)
+            if slot is None:
+                try:
+                    value = parse_constant(operand)
+                except (ValueError, SyntaxError):
+                    raise TACRuntimeError(
+                        f"Unknown operand '{operand}' in instruction {index:03d}"
+                    ) from None
+                slot = var_count + temp_count + len(constants)
+                constant_slots[operand] = slot
+                constants.append(value)
+            return slot
+        raise TACRuntimeError(
+            f"Location '{operand}' in instruction {index:03d} is outside the frame"
+        )
+
+    def target(label, index):
+        if label not in targets:
+            raise TACRuntimeError(
+                f"Undefined label '{label}' in instruction {index:03d}"
+            )
+        return targets[label]
+
+    # Function starts by name, and the functions being defined
+    starts = {}
+    functions = []
+    open_functions = []
+    opcodes = bytearray()
+    operands = array("i")
+    for i, instr in enumerate(instructions):
+        opcode = instr.opcode
+        if opcode == "label":
+            continue
+        if opcode not in OPCODE_CODES:
+            raise TACRuntimeError(f"Unknown instruction '{instr.format()}'")
+        dest = a = b = 0
+        if instr.is_jump():
+            dest = target(instr.label, i)
+            if opcode != "goto":
+                a = resolve(instr.operands[0], i)
+                if opcode != "if_false":
+                    b = resolve(instr.operands[1], i)
+        elif opcode == "func_begin":
+            # The destination is the instruction after func_end, where
+            # execution skips the body outside of a call
+            a = len(functions)
+            starts[instr.operands[0]] = len(opcodes) + 1
+            functions.append([instr.operands[0], len(opcodes), None])
+            open_functions.append(a)
+        elif opcode == "func_end":
+            frame = tuple(resolve(operand, i) for operand in instr.operands[1:])
+            if open_functions:
+                a = open_functions.pop()
+                operands[3 * functions[a][1]] = len(opcodes) + 1
+                functions[a][2] = frame
+            else:
+                a = len(functions)
+                functions.append([instr.operands[0], -1, frame])
+        elif opcode == "call":
+            # The destination (-1 for none), the start of the function and
+            # the number of arguments
+            name, count = instr.operands
+            if name not in starts:
+                raise TACRuntimeError(
+                    f"Undefined function '{name}' in instruction {i:03d}"
+                )
+            dest = -1 if instr.dest is None else resolve(instr.dest, i)
+            a = starts[name]
+            b = int(count)
+        elif opcode == "param" or opcode == "return":
+            a = resolve(instr.operands[0], i)
+        else:
+            dest = resolve(instr.dest, i)
+            a = resolve(instr.operands[0], i) if instr.operands else 0
+            b = resolve(instr.operands[1], i) if len(instr.operands) > 1 else 0
+        opcodes.append(OPCODE_CODES[opcode])
+        operands.extend((dest, a, b))
+
+    functions = [tuple(function) for function in functions]
+    return Bytecode(
+        var_size, temp_size, opcodes, operands, labels, constants, functions
+    )
+
+
+def load(path):
+    """Maps the bytecode file at ``path`` into memory."""
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            raise TACRuntimeError("Not a bytecode file") from None
+    return Bytecode.from_buffer(buffer)
+
+
+def is_bytecode_file(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+if __name__ == "__main__":
+    from .vm import read_tac_file
+
+    arg_parser = argparse.ArgumentParser(
+        usage="python -m tac.bytecode <input> <output>"
+    )
+    arg_parser.add_argument("input")
+    arg_parser.add_argument("output")
+    args = arg_parser.parse_args()
+
+    try:
+        if is_bytecode_file(args.input):
+            bytecode = load(args.input)
+            with open(args.output, "w") as f:
+                f.write(f"{bytecode.var_size}\n{bytecode.temp_size}\n")
+                for i, line in enumerate(bytecode.disassemble()):
+                    f.write(f"{i:03d}: {line}\n")
+        else:
+            var_size, temp_size, code = read_tac_file(args.input)
+            bytecode = assemble(code, var_size, temp_size)
+            with open(args.output, "wb") as f:
+                f.write(bytecode.to_bytes())
+    except FileNotFoundError:
+        print(f"Error: Input file '{args.input}' not found.")
+        sys.exit(1)
+    except TACRuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"{len(bytecode)} instructions written to {args.output}")
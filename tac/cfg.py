@@ -0,0 +1,333 @@
+"""
+Basic blocks and control flow edges over parsed TAC instructions.
+
+A block starts at the first instruction, at every label and ``func_end``
+and after every jump, ``return`` or function boundary. Function bodies are
+emitted inline, so the block holding ``func_begin`` has two successors:
+the body and the matching ``func_end``, which goes on to the code after
+it. A block ending in ``return`` has none. Calls do not end blocks: they
+come back to the next instruction. ``ControlFlowGraph`` adds the label to
+block index, dominators and natural loops used by the optimization passes.
+"""
+from .instructions import COMPARE_JUMPS
+
+
+class BasicBlock:
+    """Instructions ``start`` (inclusive) to ``end`` (exclusive) of the code."""
+
+    __slots__ = ("index", "start", "end", "successors", "predecessors")
+
+    def __init__(self, index, start, end):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.successors = []
+        self.predecessors = []
+
+    def __repr__(self):
+        return f"BasicBlock({self.index}, {self.start}, {self.end})"
+
+
+BLOCK_ENDS = (
+    frozenset(("goto", "if_false", "return", "func_begin", "func_end"))
+    | COMPARE_JUMPS
+)
+
+
+def build_blocks(instructions):
+    """Splits ``instructions`` into basic blocks and links their edges."""
+    leaders = {0} if instructions else set()
+    for i, instr in enumerate(instructions):
+        if instr.opcode == "label" or instr.opcode == "func_end":
+            leaders.add(i)
+        if instr.opcode in BLOCK_ENDS:
+            leaders.add(i + 1)
+    leaders.discard(len(instructions))
+    starts = sorted(leaders)
+
+    blocks = []
+    block_at = {}
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else len(instructions)
+        blocks.append(BasicBlock(index, start, end))
+        block_at[start] = index
+
+    label_blocks = {
+        instr.label: block_at[i]
+        for i, instr in enumerate(instructions)
+        if instr.opcode == "label"
+    }
+    function_ends = _function_ends(instructions)
+
+    for block in blocks:
+        last = instructions[block.end - 1]
+        targets = []
+        if last.is_jump():
+            if last.label in label_blocks:
+                targets.append(label_blocks[last.label])
+        if last.opcode == "func_begin":
+            # The body may end in a return, which does not reach func_end
+            end = function_ends.get(block.end - 1, len(instructions))
+            if end in block_at:
+                targets.append(block_at[end])
+        falls_through = last.opcode != "goto" and last.opcode != "return"
+        if falls_through and block.end in block_at:
+            targets.append(block_at[block.end])
+        for target in dict.fromkeys(targets):
+            block.successors.append(blocks[target])
+            blocks[target].predecessors.append(block)
+
+    return blocks
+
+
+def _function_ends(instructions):
+    """Maps the index of each ``func_begin`` to its matching ``func_end``."""
+    ends = {}
+    open_functions = []
+    for i, instr in enumerate(instructions):
+        if instr.opcode == "func_begin":
+            open_functions.append(i)
+        elif instr.opcode == "func_end" and open_functions:
+            ends[open_functions.pop()] = i
+    return ends
+
+
+class ControlFlowGraph:
+    """
+    The basic blocks of ``instructions`` with ``labels``, mapping each label
+    to the index of the block it starts. ``entries`` are the blocks control
+    can enter from outside: the first block and every function body.
+    """
+
+    def __init__(self, instructions):
+        self.instructions = instructions
+        self.blocks = build_blocks(instructions)
+        block_at = {block.start: block.index for block in self.blocks}
+        self.labels = {
+            instr.label: block_at[i]
+            for i, instr in enumerate(instructions)
+            if instr.opcode == "label"
+        }
+        self.entries = [0] if self.blocks else []
+        for block in self.blocks:
+            if block.start and instructions[block.start - 1].opcode == "func_begin":
+                self.entries.append(block.index)
+
+    def reachable(self):
+        """
+        Returns the indices of the blocks reachable from the first one.
+        Function bodies are reached through the edge from their ``func_begin``.
+        """
+        seen = set(self.entries[:1])
+        pending = list(seen)
+        while pending:
+            for successor in self.blocks[pending.pop()].successors:
+                if successor.index not in seen:
+                    seen.add(successor.index)
+                    pending.append(successor.index)
+        return seen
+
+    def reverse_postorder(self):
+        """
+        Returns the indices of the blocks reachable from an entry, each after
+        its predecessors except along loop back edges.
+        """
+        order = []
+        seen = set()
+        for entry in self.entries:
+            if entry in seen:
+                continue
+            seen.add(entry)
+            stack = [(entry, iter(self.blocks[entry].successors))]
+            while stack:
+                index, successors = stack[-1]
+                for successor in successors:
+                    if successor.index not in seen:
+                        seen.add(successor.index)
+                        stack.append(
+                            (successor.index, iter(successor.successors))
+                        )
+                        break
+                else:
+                    stack.pop()
+                    order.append(index)
+        order.reverse()
+        return order
+
+    def dominators(self):
+        """
+        Maps each block reachable from an entry to its immediate dominator,
+        or to None for the entries themselves (Cooper, Harvey and Kennedy's
+        iterative algorithm, with the entries below a virtual root).
+        """
+        order = self.reverse_postorder()
+        # Postorder numbers; the virtual root (None) comes last
+        number = {index: len(order) - i for i, index in enumerate(order)}
+        number[None] = len(order) + 1
+        idom = {entry: None for entry in self.entries}
+        entries = set(self.entries)
+
+        def intersect(a, b):
+            while a != b:
+                while number[a] < number[b]:
+                    a = idom[a]
+                while number[b] < number[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for index in order:
+                if index in entries:
+                    continue
+                processed = [
+                    predecessor.index
+                    for predecessor in self.blocks[index].predecessors
+                    if predecessor.index in idom
+                ]
+                new = processed[0]
+                for other in processed[1:]:
+                    new = intersect(other, new)
+                if index not in idom or idom[index] != new:
+                    idom[index] = new
+                    changed = True
+        return idom
+
+    def natural_loops(self):
+        """
+        Maps the header of each natural loop to the set of its blocks. A back
+        edge jumps to a block that dominates its source; its loop is the
+        header and the blocks that reach the back edge without going
+        through the header.
+        """
+        # Only edges going back in reverse postorder can be back edges
+        rank = {index: i for i, index in enumerate(self.reverse_postorder())}
+        retreating = [
+            (block.index, successor.index)
+            for block in self.blocks
+            if block.index in rank
+            for successor in block.successors
+            if rank[successor.index] <= rank[block.index]
+        ]
+        if not retreating:
+            return {}
+        idom = self.dominators()
+        loops = {}
+        for source, header in retreating:
+            dominator = source
+            while dominator is not None and dominator != header:
+                dominator = idom[dominator]
+            if dominator is None:
+                continue
+            body = loops.setdefault(header, {header})
+            pending = [source]
+            while pending:
+                index = pending.pop()
+                if index not in body and index in idom:
+                    body.add(index)
+                    pending.extend(p.index for p in self.blocks[index].predecessors)
+        return loops
+
+
+def exit_blocks(instructions, blocks):
+    """
+    Returns the indices of the blocks after which the program may end or a
+    function return: those ending in ``return`` or ``func_end`` and those
+    that continue past the last instruction.
+    """
+    function_ends = _function_ends(instructions)
+    exits = []
+    for block in blocks:
+        last = instructions[block.end - 1]
+        if last.opcode == "return":
+            exits.append(block.index)
+            continue
+        if last.opcode == "goto":
+            continue
+        if last.opcode == "func_begin":
+            after = function_ends.get(block.end - 1, len(instructions)) + 1
+        else:
+            after = block.end
+        if last.opcode == "func_end" or after >= len(instructions):
+            exits.append(block.index)
+    return exits
+
+
+def liveness(instructions, blocks, tracked, live_at_exit=()):
+    """
+    Computes the operands live on exit from each block, for the operands
+    selected by the ``tracked`` predicate. ``live_at_exit`` are read after
+    the program ends or a function returns, on exit from ``exit_blocks``.
+    Returns a list of sets indexed like ``blocks``.
+    """
+    masks, bits = live_masks(instructions, blocks, tracked, live_at_exit)
+    operands = list(bits)
+    result = []
+    for mask in masks:
+        live = set()
+        while mask:
+            low = mask & -mask
+            live.add(operands[low.bit_length() - 1])
+            mask ^= low
+        result.append(live)
+    return result
+
+
+def live_masks(instructions, blocks, tracked, live_at_exit=()):
+    """
+    ``liveness`` with the sets as bit masks: returns the masks of the
+    operands live on exit from each block and the bit of each operand.
+    Cheaper when most operands are live at once.
+    """
+    bits = {}
+
+    def bit(operand):
+        mask = bits.get(operand)
+        if mask is None:
+            mask = bits[operand] = 1 << len(bits)
+        return mask
+
+    uses = []
+    defs = []
+    for block in blocks:
+        used = 0
+        defined = 0
+        for i in range(block.end - 1, block.start - 1, -1):
+            instr = instructions[i]
+            dest = instr.dest
+            if dest is not None and tracked(dest):
+                mask = bit(dest)
+                defined |= mask
+                used &= ~mask
+            for operand in instr.operands:
+                if tracked(operand):
+                    used |= bit(operand)
+        uses.append(used)
+        defs.append(defined)
+
+    live_in = list(uses)
+    live_out = [0] * len(blocks)
+    if live_at_exit:
+        exit_mask = 0
+        for operand in live_at_exit:
+            exit_mask |= bit(operand)
+        for index in exit_blocks(instructions, blocks):
+            live_out[index] = exit_mask
+    pending = list(blocks)
+    queued = [True] * len(blocks)
+    while pending:
+        block = pending.pop()
+        queued[block.index] = False
+        out = live_out[block.index]
+        for successor in block.successors:
+            out |= live_in[successor.index]
+        live_out[block.index] = out
+        new_in = uses[block.index] | (out & ~defs[block.index])
+        if new_in != live_in[block.index]:
+            live_in[block.index] = new_in
+            for predecessor in block.predecessors:
+                if not queued[predecessor.index]:
+                    queued[predecessor.index] = True
+                    pending.append(predecessor)
+    return live_out, bits
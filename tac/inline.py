@@ -0,0 +1,197 @@
+"""
+Inlining of small functions at their calls.
+
+``Inliner.run`` walks the code in order. A call runs the last definition
+of its function before it (see ``tac.vm``), so each ``func_begin`` forgets
+the body kept for its name, and at its ``func_end`` the body is kept when
+the function may be inlined: it has at most ``max_size`` instructions
+besides its ``pop_param``, defines no function, does not call itself and
+sets each of its variables before reading it. Functions defined before it
+are all it can call otherwise, so inlining always ends.
+
+A call ``t := call f n`` of a kept function, right after its ``n``
+``param`` instructions, is replaced by a copy of the body: the arguments
+are copied into the parameters, the temps and labels of the body get new
+names, and each ``return v`` becomes ``t := v`` and a jump to the end of
+the copy. Falling off the end gives ``t := 0``, as ``func_end`` does.
+The copy reads and writes the same variables as the call did. A call
+then gives the variables of the function back the values they had before
+it, while the copy leaves them set. Only the function reads them, so the
+values left over are never seen as long as it sets them first: a body
+that may read one of its variables before setting it, as ``y`` in
+``if x > 0 y = 1 end return y``, is not kept.
+
+Kept bodies carry over from one ``run`` to the next, so that a statement
+compiled on its own (``--stream``) inlines the functions defined by the
+statements before it.
+"""
+from .cfg import build_blocks, liveness
+from .instructions import Instruction, is_temp
+
+# Most instructions in an inlined function body, besides its pop_param
+INLINE_LIMIT = 16
+
+
+class Inliner:
+    """
+    Inlines calls of the functions of at most ``max_size`` instructions.
+    ``bodies`` holds the instructions kept for each function, ``calls`` the
+    functions each of them calls and ``callers`` the other way round.
+    """
+
+    def __init__(self, max_size=INLINE_LIMIT):
+        self.max_size = max_size
+        self.bodies = {}
+        self.calls = {}
+        self.callers = {}
+        self.expansions = 0
+
+    def run(self, instructions):
+        """Returns the instructions with calls inlined, and how many were."""
+        self._instructions = instructions
+        # The first temp offset free for the copies, found at the first one
+        self._next_temp = None
+        code = []
+        # Name, index in ``code`` and whether it may be inlined, per
+        # function being defined
+        functions = []
+        inlined = 0
+        for instr in instructions:
+            opcode = instr.opcode
+            if opcode == "func_begin":
+                self.forget(instr.operands[0])
+                if functions:
+                    functions[-1][2] = False
+                functions.append([instr.operands[0], len(code), True])
+            elif opcode == "func_end" and functions:
+                name, start, inlinable = functions.pop()
+                if inlinable:
+                    self.keep(name, code[start + 1 :], instr.operands[1:])
+            elif opcode == "call" and self.expand(code, instr):
+                inlined += 1
+                continue
+            code.append(instr)
+        return code, inlined
+
+    def forget(self, name):
+        """Drops the body of ``name``, and those of the functions calling it."""
+        for dropped in (name, *self.callers.pop(name, ())):
+            self.bodies.pop(dropped, None)
+            for called in self.calls.pop(dropped, ()):
+                if called in self.callers:
+                    self.callers[called].discard(dropped)
+
+    def keep(self, name, body, variables):
+        """
+        Keeps ``body`` for inlining if it is small, does not call itself and
+        sets ``variables``, those its ``func_end`` lists, before reading them.
+        """
+        called = {instr.operands[0] for instr in body if instr.opcode == "call"}
+        size = sum(1 for instr in body if instr.opcode != "pop_param")
+        if name in called or size > self.max_size:
+            return
+        if _reads_unset(body, set(variables)):
+            return
+        self.bodies[name] = [
+            Instruction(instr.opcode, instr.dest, instr.operands, instr.label)
+            for instr in body
+        ]
+        self.calls[name] = called
+        for function in called:
+            self.callers.setdefault(function, set()).add(name)
+
+    def expand(self, code, call):
+        """
+        Appends the body of the function ``call`` calls to ``code`` in place
+        of the call and of its ``param`` instructions. Returns False, and
+        leaves ``code`` alone, if it cannot.
+        """
+        name, count = call.operands
+        body = self.bodies.get(name)
+        if body is None:
+            return False
+        count = int(count)
+        params = []
+        for instr in body:
+            if instr.opcode != "pop_param":
+                break
+            params.append(instr.dest)
+        args = code[len(code) - count :] if count else []
+        if (
+            len(params) != count
+            or len(args) != count
+            or any(instr.opcode != "param" for instr in args)
+        ):
+            return False
+        values = [instr.operands[0] for instr in args]
+        # A parameter must not be set before the argument it is read for
+        if any(param in values[i + 1 :] for i, param in enumerate(params)):
+            return False
+        del code[len(code) - count :]
+        if self._next_temp is None:
+            self._next_temp = 8 + max(
+                (
+                    int(operand[:-4])
+                    for instr in self._instructions
+                    for operand in (instr.dest, *instr.operands)
+                    if operand is not None and is_temp(operand)
+                ),
+                default=-8,
+            )
+        for param, value in zip(params, values):
+            code.append(Instruction(":=", param, (value,)))
+
+        self.expansions += 1
+        suffix = f"_{self.expansions}"
+        end_label = f"{name}_return{suffix}"
+        temps = {}
+
+        def rename(operand):
+            if not is_temp(operand):
+                return operand
+            temp = temps.get(operand)
+            if temp is None:
+                temp = temps[operand] = f"{self._next_temp:03d}(Rx)"
+                self._next_temp += 8
+            return temp
+
+        instructions = body[len(params) :]
+        returns = False
+        for i, instr in enumerate(instructions):
+            if instr.opcode == "return":
+                if call.dest is not None:
+                    value = rename(instr.operands[0])
+                    code.append(Instruction(":=", call.dest, (value,)))
+                if i < len(instructions) - 1:
+                    code.append(Instruction("goto", label=end_label))
+                    returns = True
+                continue
+            code.append(
+                Instruction(
+                    instr.opcode,
+                    None if instr.dest is None else rename(instr.dest),
+                    tuple(rename(operand) for operand in instr.operands),
+                    None if instr.label is None else instr.label + suffix,
+                )
+            )
+        if not instructions or instructions[-1].opcode != "return":
+            if call.dest is not None:
+                code.append(Instruction(":=", call.dest, ("0",)))
+        if returns:
+            code.append(Instruction("label", label=end_label))
+        return True
+
+
+def _reads_unset(body, variables):
+    """Whether ``body`` may read one of ``variables`` before setting it."""
+    if not body or not variables:
+        return False
+    tracked = variables.__contains__
+    blocks = build_blocks(body)
+    live = liveness(body, blocks, tracked)[0]
+    first = blocks[0]
+    for instr in reversed(body[first.start : first.end]):
+        if instr.dest is not None and tracked(instr.dest):
+            live.discard(instr.dest)
+        live.update(operand for operand in instr.operands if tracked(operand))
+    return bool(live)
@@ -0,0 +1,187 @@
+"""
+Structured view of the three-address code lines emitted by ``ASTVisitor``.
+
+The visitor produces TAC as text, one instruction per line:
+
+    L0:                         label
+    goto L0                     jump
+    if_false 000(Rx) goto L1    conditional jump
+    if 000(SP) ILE 0 goto L1    jump on a comparison
+    000(SP) := 5                copy
+    000(Rx) := 000(SP) ADD 1    binary operation
+    000(Rx) := ITOF 000(SP)     conversion
+    pop_param 016(SP)           parameter (writes its location)
+    000(Rx) := call f 2         call of f with the last 2 params
+    param 000(SP)               argument of the next call
+    return 000(Rx)              return from a function
+    func_end f 008(SP)          end of f, with the variables of its scope
+    func_begin f                any other "opcode operand..." line
+
+``parse`` turns a line into an ``Instruction`` and ``Instruction.format``
+turns it back into the exact same text, so passes over the TAC can work
+on operands without caring about the layout of each form.
+"""
+import re
+
+from semantic.folding import BIN_OPS, RELATIONAL_OPS, TYPED_OPS
+
+# String literals may contain spaces, so they are kept as a single token.
+_TOKEN = re.compile(r'"(?:[^\\"]|\\.)*"|\S+')
+
+# Conversions, with one operand
+CONVERSIONS = frozenset(("ITOF",))
+
+# Instructions that compute ``dest`` from their operands alone
+OPERATIONS = frozenset(BIN_OPS) | frozenset(TYPED_OPS) | CONVERSIONS
+
+# Jumps on a comparison of their two operands: "if_" and the relational
+# operator, generic or typed, whose result they jump on
+COMPARE_JUMPS = frozenset(
+    "if_" + op for op in OPERATIONS if TYPED_OPS.get(op, op) in RELATIONAL_OPS
+)
+
+# Opcodes whose reads and writes are all in ``dest`` and ``operands``. A
+# call is not one of them: the function may read or change any variable.
+KNOWN_OPCODES = (
+    frozenset(
+        (
+            ":=",
+            "label",
+            "goto",
+            "if_false",
+            "pop_param",
+            "param",
+            "return",
+            "func_begin",
+            "func_end",
+        )
+    )
+    | OPERATIONS
+    | COMPARE_JUMPS
+)
+
+
+def is_temp(operand):
+    """True for temporary locations such as ``016(Rx)``."""
+    # Literals and names cannot end this way (string literals end in a quote)
+    return operand.endswith("(Rx)")
+
+
+def is_variable(operand):
+    """True for variable locations such as ``016(SP)``."""
+    return operand.endswith("(SP)")
+
+
+def is_location(operand):
+    return operand.endswith(("(SP)", "(Rx)"))
+
+
+def generic_opcode(opcode):
+    """The generic operator a typed opcode (``IADD``, ``FDIV``...) computes."""
+    return TYPED_OPS.get(opcode, opcode)
+
+
+def may_fail(instr):
+    """
+    True for operations that may raise at run time: untyped ones, whose
+    operands may not support the operator (``1 < "a"``), and divisions
+    whose divisor is not a non-zero constant.
+    """
+    if instr.opcode in BIN_OPS:
+        return True
+    opcode = generic_opcode(instr.opcode)
+    if opcode != "DIV" and opcode != "MOD":
+        return False
+    divisor = instr.operands[1]
+    if is_location(divisor):
+        return True
+    try:
+        return float(divisor) == 0
+    except ValueError:
+        return True
+
+
+class Instruction:
+    """
+    One TAC instruction. ``opcode`` is ``"label"``, ``"goto"``,
+    ``"if_false"``, ``"if_"`` and the operator for jumps on a comparison
+    (``if_ILE``), ``":="`` for copies, the operator name (``ADD``, ``LT``,
+    ``IADD``, ...) for binary operations, ``ITOF`` for conversions, or the
+    leading word of any other line.
+    ``dest`` is the location written, if any, ``operands`` the values read
+    and ``label`` the label defined or jumped to. The operands of a call
+    are the function name and the number of arguments.
+    """
+
+    __slots__ = ("opcode", "dest", "operands", "label")
+
+    def __init__(self, opcode, dest=None, operands=(), label=None):
+        self.opcode = opcode
+        self.dest = dest
+        self.operands = operands
+        self.label = label
+
+    def is_jump(self):
+        opcode = self.opcode
+        return opcode == "goto" or opcode == "if_false" or opcode in COMPARE_JUMPS
+
+    def format(self):
+        opcode = self.opcode
+        if opcode == "label":
+            return f"{self.label}:"
+        if opcode == "goto":
+            return f"goto {self.label}"
+        if opcode == "if_false":
+            return f"if_false {self.operands[0]} goto {self.label}"
+        if opcode in COMPARE_JUMPS:
+            left, right = self.operands
+            return f"if {left} {opcode[3:]} {right} goto {self.label}"
+        if opcode == ":=":
+            return f"{self.dest} := {self.operands[0]}"
+        if opcode == "pop_param":
+            return f"pop_param {self.dest}"
+        if opcode == "call" and self.dest is not None:
+            return f"{self.dest} := call {' '.join(self.operands)}"
+        if opcode in CONVERSIONS:
+            return f"{self.dest} := {opcode} {self.operands[0]}"
+        if self.dest is not None:
+            left, right = self.operands
+            return f"{self.dest} := {left} {opcode} {right}"
+        return " ".join((opcode, *self.operands))
+
+    def __repr__(self):
+        return f"Instruction({self.format()!r})"
+
+
+def parse(line):
+    """Parses one line of TAC text into an ``Instruction``."""
+    parts = _TOKEN.findall(line) if '"' in line else line.split()
+    if len(parts) >= 3 and parts[1] == ":=":
+        if len(parts) == 3:
+            return Instruction(":=", parts[0], (parts[2],))
+        if len(parts) == 4:
+            return Instruction(parts[2], parts[0], (parts[3],))
+        if parts[2] == "call":
+            return Instruction("call", parts[0], tuple(parts[3:]))
+        return Instruction(parts[3], parts[0], (parts[2], parts[4]))
+    if len(parts) == 1 and line.endswith(":"):
+        return Instruction("label", label=line[:-1])
+    if parts[0] == "goto":
+        return Instruction("goto", label=parts[1])
+    if parts[0] == "if_false":
+        return Instruction("if_false", operands=(parts[1],), label=parts[3])
+    if parts[0] == "if":
+        return Instruction(
+            "if_" + parts[2], operands=(parts[1], parts[3]), label=parts[5]
+        )
+    if parts[0] == "pop_param":
+        return Instruction("pop_param", parts[1])
+    return Instruction(parts[0], operands=tuple(parts[1:]))
+
+
+def parse_code(lines):
+    return [parse(line) for line in lines]
+
+
+def format_code(instructions):
+    return [instr.format() for instr in instructions]
@@ -0,0 +1,296 @@
+"""
+Loop optimizations over the natural loops of generated TAC.
+
+A ``while`` loop compiles to its start label, the condition, the body and
+a ``goto`` back to the label, so it is a natural loop whose header block
+starts with that label. Code that should run once before the loop goes in
+the preheader: right before the header label, where control falls in from
+the code before the loop. Loops entered any other way are left alone, as
+are loops holding instructions other than copies, operations and jumps.
+
+* ``hoist_invariants`` moves operations whose operands the loop does not
+  change out to the preheader, so that they run once;
+* ``reduce_strength`` replaces ``t := i MUL k``, for an integer induction
+  variable ``i`` stepped by a constant and a constant ``k``, with a copy
+  of a new temp that starts at ``i * k`` and is stepped next to ``i``.
+
+Both return the new instructions and how many they moved or replaced.
+"""
+from collections import Counter
+
+from .cfg import ControlFlowGraph, liveness
+from .instructions import (
+    KNOWN_OPCODES,
+    OPERATIONS,
+    Instruction,
+    generic_opcode,
+    is_location,
+    is_temp,
+    may_fail,
+)
+
+# Multiplications an integer induction variable can be in
+INTEGER_MULS = ("MUL", "IMUL")
+
+
+class Loop:
+    """
+    A natural loop: ``blocks`` are the indices of its blocks, ``start`` the
+    index of the header label, where the preheader code goes, ``exits``
+    the blocks outside the loop it can jump to and ``writes`` how many
+    times each location is written in it.
+    """
+
+    __slots__ = ("header", "blocks", "start", "exits", "writes")
+
+    def __init__(self, header, blocks, start, exits, writes):
+        self.header = header
+        self.blocks = blocks
+        self.start = start
+        self.exits = exits
+        self.writes = writes
+
+
+def find_loops(instructions, graph):
+    """Returns the loops of ``graph`` that have a preheader, innermost first."""
+    loops = []
+    for header, body in graph.natural_loops().items():
+        block = graph.blocks[header]
+        label = instructions[block.start]
+        if header == 0 or label.opcode != "label":
+            continue
+        # The only way in must be falling through from the block before,
+        # and the preheader code must come before the whole loop (blocks
+        # are numbered in code order)
+        if min(body) != header:
+            continue
+        outside = [p for p in block.predecessors if p.index not in body]
+        before = instructions[block.start - 1]
+        if (
+            len(outside) != 1
+            or outside[0].index != header - 1
+            or before.opcode in ("goto", "func_begin", "func_end")
+            or before.is_jump()
+            and before.label == label.label
+        ):
+            continue
+        writes = Counter()
+        known = True
+        for index in body:
+            loop_block = graph.blocks[index]
+            for instr in instructions[loop_block.start : loop_block.end]:
+                if instr.opcode not in KNOWN_OPCODES:
+                    known = False
+                if instr.dest is not None:
+                    writes[instr.dest] += 1
+        if not known:
+            continue
+        exits = {
+            successor.index
+            for index in body
+            for successor in graph.blocks[index].successors
+            if successor.index not in body
+        }
+        loops.append(Loop(header, body, block.start, exits, writes))
+    loops.sort(key=lambda loop: len(loop.blocks))
+    return loops
+
+
+def _live_in(instructions, block, live_out):
+    """The temps live on entry to ``block``, given those live on exit."""
+    live = set(live_out[block.index])
+    for i in range(block.end - 1, block.start - 1, -1):
+        instr = instructions[i]
+        if instr.dest is not None:
+            live.discard(instr.dest)
+        live.update(op for op in instr.operands if is_temp(op))
+    return live
+
+
+def _invariants(instructions, graph, loop, live_out):
+    """Returns the indices of the instructions of ``loop`` to hoist, in order."""
+    # A hoisted temp must not carry a value into the loop or out of it
+    outside = _live_in(instructions, graph.blocks[loop.header], live_out)
+    for index in loop.exits:
+        outside |= _live_in(instructions, graph.blocks[index], live_out)
+    writes = loop.writes
+    hoisted = []
+    hoisted_dests = set()
+    indices = [
+        i
+        for index in sorted(loop.blocks)
+        for i in range(graph.blocks[index].start, graph.blocks[index].end)
+    ]
+    changed = True
+    while changed:
+        changed = False
+        for i in indices:
+            instr = instructions[i]
+            dest = instr.dest
+            if (
+                dest is None
+                or dest in hoisted_dests
+                or not is_temp(dest)
+                or (instr.opcode != ":=" and instr.opcode not in OPERATIONS)
+                or writes[dest] != 1
+                or dest in outside
+                or may_fail(instr)
+            ):
+                continue
+            if all(
+                not is_location(op) and not op.startswith('"')
+                or is_location(op)
+                and (writes[op] == 0 or op in hoisted_dests)
+                for op in instr.operands
+            ):
+                hoisted.append(i)
+                hoisted_dests.add(dest)
+                changed = True
+    return hoisted
+
+
+def _rebuild(instructions, before, after=None, moved=()):
+    """
+    Returns ``instructions`` with the instructions listed in ``before`` and
+    ``after`` (dicts from an index to a list) inserted around that index,
+    and those at the indices in ``moved`` dropped.
+    """
+    after = after or {}
+    code = []
+    for i, instr in enumerate(instructions):
+        code.extend(before.get(i, ()))
+        if i not in moved:
+            code.append(instr)
+        code.extend(after.get(i, ()))
+    return code
+
+
+def hoist_invariants(instructions):
+    # Every loop is handled on the same graph, inner loops first. An
+    # instruction also invariant in an outer loop goes before that one.
+    graph = ControlFlowGraph(instructions)
+    live_out = liveness(instructions, graph.blocks, is_temp)
+    owner = {}
+    hoisted_by = []
+    for loop in find_loops(instructions, graph):
+        hoisted = _invariants(instructions, graph, loop, live_out)
+        for i in hoisted:
+            owner[i] = loop.start
+        hoisted_by.append((loop.start, hoisted))
+    if not owner:
+        return instructions, 0
+    preheaders = {
+        start: [instructions[i] for i in hoisted if owner[i] == start]
+        for start, hoisted in hoisted_by
+    }
+    return _rebuild(instructions, preheaders, moved=owner), len(owner)
+
+
+def _integer(operand):
+    """The value of an integer literal operand, or None."""
+    if is_location(operand):
+        return None
+    try:
+        return int(operand)
+    except ValueError:
+        return None
+
+
+def _induction_variables(instructions, graph, loop):
+    """
+    Maps the basic induction variables of ``loop`` to the index of their
+    only update, ``i := i ADD c`` or ``i := i SUB c`` with an integer ``c``.
+    Only variables set to an integer right before the loop qualify, so
+    that ``i`` and the temps derived from it stay integers.
+    """
+    updates = {}
+    for index in loop.blocks:
+        block = graph.blocks[index]
+        for i in range(block.start, block.end):
+            instr = instructions[i]
+            dest = instr.dest
+            opcode = generic_opcode(instr.opcode)
+            if opcode not in ("ADD", "SUB") or loop.writes[dest] != 1:
+                continue
+            left, right = instr.operands
+            if left == dest and _integer(right) is not None:
+                updates[dest] = i
+            elif opcode == "ADD" and right == dest and _integer(left) is not None:
+                updates[dest] = i
+
+    initial = {}
+    before = graph.blocks[loop.header - 1]
+    for instr in instructions[before.start : before.end]:
+        if instr.dest in updates:
+            initial[instr.dest] = (
+                instr.opcode == ":=" and _integer(instr.operands[0]) is not None
+            )
+    return {
+        variable: update
+        for variable, update in updates.items()
+        if initial.get(variable)
+    }
+
+
+def _step(instr):
+    """The signed constant an induction variable update adds."""
+    left, right = instr.operands
+    step = _integer(right if left == instr.dest else left)
+    return -step if generic_opcode(instr.opcode) == "SUB" else step
+
+
+def reduce_strength(instructions):
+    temp_offsets = [
+        int(operand[:-4])
+        for instr in instructions
+        for operand in (instr.dest, *instr.operands)
+        if operand is not None and is_temp(operand)
+    ]
+    next_offset = max(temp_offsets, default=-8) + 8
+    graph = ControlFlowGraph(instructions)
+    claimed = set()
+    preheaders = {}
+    steps = {}
+    for loop in find_loops(instructions, graph):
+        variables = _induction_variables(instructions, graph, loop)
+        # Multiplications of an induction variable by a constant into a temp,
+        # which copy propagation then replaces by the new temp
+        temps = {}
+        for index in loop.blocks:
+            block = graph.blocks[index]
+            for i in range(block.start, block.end):
+                instr = instructions[i]
+                opcode = instr.opcode
+                if (
+                    i in claimed
+                    or opcode not in INTEGER_MULS
+                    or not is_temp(instr.dest)
+                ):
+                    continue
+                left, right = instr.operands
+                if left in variables and _integer(right) is not None:
+                    key = (left, right, opcode)
+                elif right in variables and _integer(left) is not None:
+                    key = (right, left, opcode)
+                else:
+                    continue
+                if key not in temps:
+                    temps[key] = f"{next_offset:03d}(Rx)"
+                    next_offset += 8
+                    preheaders.setdefault(loop.start, []).append(
+                        Instruction(opcode, temps[key], key[:2])
+                    )
+                instructions[i] = Instruction(":=", instr.dest, (temps[key],))
+                claimed.add(i)
+        for (variable, factor, opcode), temp in temps.items():
+            update = variables[variable]
+            step = _step(instructions[update]) * int(factor)
+            # The new temp is stepped with the same typing as the product
+            prefix = opcode[: -len("MUL")]
+            opcode, step = ("ADD", step) if step >= 0 else ("SUB", -step)
+            steps.setdefault(update, []).append(
+                Instruction(prefix + opcode, temp, (temp, str(step)))
+            )
+    if not claimed:
+        return instructions, 0
+    return _rebuild(instructions, preheaders, steps), len(claimed)
@@ -0,0 +1,346 @@
+"""
+Optimization passes over the control flow graph of generated TAC.
+
+Each pass takes and returns a list of parsed instructions and reports how
+many instructions it removed:
+
+* ``thread_jumps`` retargets jumps to a label that only leads to another
+  ``goto``, drops jumps to the label right after them and labels no jump
+  uses;
+* ``remove_unreachable`` drops blocks that no path from the start of the
+  program or of a function body reaches;
+* ``propagate_copies`` replaces reads of the destination of a copy with
+  its source while both keep their values, and folds a copy of a temp
+  that dies into the instruction that computed the temp;
+* ``eliminate_dead_stores`` drops copies and operations whose destination
+  is never read afterwards, except divisions that may fail.
+
+``optimize`` first inlines the calls of small functions (``tac.inline``),
+then runs them, and the loop passes of ``tac.loops``, until none applies.
+Variables (``SP`` locations) are read by whoever runs the program, so
+they are live when it ends and when a function returns. Calls, and any
+other instructions than copies, operations, jumps, labels, parameters
+and function boundaries, are assumed to read every variable and to
+change any of them.
+"""
+from .cfg import ControlFlowGraph, live_masks, liveness
+from .inline import Inliner
+from .loops import hoist_invariants, reduce_strength
+from .instructions import (
+    KNOWN_OPCODES,
+    format_code,
+    is_location,
+    is_temp,
+    is_variable,
+    may_fail,
+    parse_code,
+)
+
+PASSES = (
+    "inlining",
+    "jump threading",
+    "unreachable code",
+    "copy propagation",
+    "dead stores",
+    "loop invariants",
+    "strength reduction",
+)
+
+
+def _is_store(instr):
+    """True for copies and operations, which only write ``dest``."""
+    return (
+        instr.dest is not None
+        and instr.opcode != "pop_param"
+        and instr.opcode in KNOWN_OPCODES
+    )
+
+
+def thread_jumps(instructions):
+    # The first instruction run after each label, past any other labels
+    targets = {}
+    pending = []
+    for instr in reversed(instructions):
+        if instr.opcode == "label":
+            targets[instr.label] = pending[-1] if pending else None
+        else:
+            pending.append(instr)
+
+    def final_label(label):
+        seen = {label}
+        while True:
+            instr = targets.get(label)
+            if instr is None or instr.opcode != "goto" or instr.label in seen:
+                return label
+            label = instr.label
+            seen.add(label)
+
+    for instr in instructions:
+        if instr.is_jump():
+            instr.label = final_label(instr.label)
+
+    # A jump to one of the labels that directly follow it goes nowhere
+    result = []
+    following = set()
+    for instr in reversed(instructions):
+        if instr.opcode == "label":
+            following.add(instr.label)
+            result.append(instr)
+            continue
+        if not (instr.is_jump() and instr.label in following):
+            result.append(instr)
+        following = set()
+    result.reverse()
+
+    used = {instr.label for instr in result if instr.is_jump()}
+    result = [
+        instr for instr in result if instr.opcode != "label" or instr.label in used
+    ]
+    return result, len(instructions) - len(result)
+
+
+def remove_unreachable(instructions):
+    graph = ControlFlowGraph(instructions)
+    reachable = graph.reachable()
+    if len(reachable) == len(graph.blocks):
+        return instructions, 0
+    code = []
+    for block in graph.blocks:
+        if block.index in reachable:
+            code.extend(instructions[block.start : block.end])
+    return code, len(instructions) - len(code)
+
+
+def _propagates(dest, source):
+    # Reads of a variable are not turned into reads of a temp, which would
+    # keep the temp alive longer and need more temp slots
+    return is_temp(dest) or not is_temp(source)
+
+
+def _transfer(instr, copies):
+    """Updates the available ``copies`` (dest -> source) past ``instr``."""
+    if instr.opcode not in KNOWN_OPCODES:
+        copies.clear()
+        return
+    dest = instr.dest
+    if dest is None:
+        return
+    for copy_dest, source in list(copies.items()):
+        if copy_dest == dest or source == dest:
+            del copies[copy_dest]
+    if instr.opcode == ":=":
+        source = instr.operands[0]
+        if source != dest and _propagates(dest, source):
+            copies[dest] = source
+
+
+def _forward_copies(instructions):
+    """Rewrites operands with the copies available at each instruction."""
+    graph = ControlFlowGraph(instructions)
+    blocks = graph.blocks
+    entries = set(graph.entries)
+    # None stands for "every copy", the identity of the intersection
+    copies_in = [{} if block.index in entries else None for block in blocks]
+    copies_out = [None] * len(blocks)
+    # Copies of locations a loop writes do not hold at its header. Dropping
+    # them up front, rather than once they come round the back edges, lets
+    # the sweeps in reverse postorder settle in two, however deep the loops.
+    loop_writes = {}
+    for header, body in graph.natural_loops().items():
+        written = set()
+        for index in body:
+            block = blocks[index]
+            for instr in instructions[block.start : block.end]:
+                if instr.opcode not in KNOWN_OPCODES:
+                    written = None
+                    break
+                if instr.dest is not None:
+                    written.add(instr.dest)
+            if written is None:
+                break
+        loop_writes[header] = written
+    order = graph.reverse_postorder()
+    changed = True
+    while changed:
+        changed = False
+        for index in order:
+            block = blocks[index]
+            copies = copies_in[index]
+            if index not in entries:
+                copies = None
+                for predecessor in block.predecessors:
+                    out = copies_out[predecessor.index]
+                    if out is None:
+                        continue
+                    if copies is None:
+                        copies = dict(out)
+                    else:
+                        copies = {
+                            dest: source
+                            for dest, source in copies.items()
+                            if out.get(dest) == source
+                        }
+                if copies and index in loop_writes:
+                    written = loop_writes[index]
+                    copies = {
+                        dest: source
+                        for dest, source in copies.items()
+                        if written is not None
+                        and dest not in written
+                        and source not in written
+                    }
+                copies_in[index] = copies
+            if copies is None:
+                continue
+            copies = dict(copies)
+            for i in range(block.start, block.end):
+                _transfer(instructions[i], copies)
+            if copies != copies_out[index]:
+                copies_out[index] = copies
+                changed = True
+
+    rewritten = 0
+    for block in blocks:
+        copies = dict(copies_in[block.index] or {})
+        for i in range(block.start, block.end):
+            instr = instructions[i]
+            # The operands of func_end name variables rather than read them
+            if copies and instr.opcode in KNOWN_OPCODES and instr.opcode != "func_end":
+                operands = tuple(copies.get(op, op) for op in instr.operands)
+                if operands != instr.operands:
+                    instr.operands = operands
+                    rewritten += 1
+            _transfer(instr, copies)
+    return rewritten
+
+
+def _coalesce_copies(instructions):
+    """
+    Turns ``t := <value>; x := t`` into ``x := <value>`` when the temp ``t``
+    is not read afterwards. Returns the indices of the copies removed.
+    """
+    graph = ControlFlowGraph(instructions)
+    live_out = liveness(instructions, graph.blocks, is_temp)
+    removed = set()
+    for block in graph.blocks:
+        live = set(live_out[block.index])
+        for i in range(block.end - 1, block.start - 1, -1):
+            instr = instructions[i]
+            if (
+                instr.opcode == ":="
+                and i > block.start
+                and is_temp(instr.operands[0])
+                and instr.operands[0] not in live
+            ):
+                previous = instructions[i - 1]
+                if _is_store(previous) and previous.dest == instr.operands[0]:
+                    previous.dest = instr.dest
+                    removed.add(i)
+                    continue
+            if instr.dest is not None:
+                live.discard(instr.dest)
+            live.update(op for op in instr.operands if is_temp(op))
+    return removed
+
+
+def propagate_copies(instructions):
+    removed = _coalesce_copies(instructions)
+    if removed:
+        instructions = [
+            instr for i, instr in enumerate(instructions) if i not in removed
+        ]
+    _forward_copies(instructions)
+    return instructions, len(removed)
+
+
+def eliminate_dead_stores(instructions):
+    graph = ControlFlowGraph(instructions)
+    # Block-level liveness cannot see what unknown instructions read, so
+    # stores to variables are then all kept
+    if any(instr.opcode not in KNOWN_OPCODES for instr in instructions):
+        tracked = is_temp
+        variables = ()
+    else:
+        tracked = is_location
+        variables = {
+            operand
+            for instr in instructions
+            for operand in (instr.dest, *instr.operands)
+            if operand is not None and is_variable(operand)
+        }
+    live_out, bits = live_masks(instructions, graph.blocks, tracked, variables)
+    code = []
+    for block in graph.blocks:
+        live = live_out[block.index]
+        kept = []
+        for i in range(block.end - 1, block.start - 1, -1):
+            instr = instructions[i]
+            dest = instr.dest
+            if dest is not None and tracked(dest):
+                mask = bits.get(dest, 0)
+                if _is_store(instr) and not may_fail(instr) and (
+                    not live & mask
+                    or instr.opcode == ":="
+                    and instr.operands[0] == dest
+                ):
+                    continue
+                live &= ~mask
+            for operand in instr.operands:
+                if tracked(operand):
+                    live |= bits[operand]
+            kept.append(instr)
+        kept.reverse()
+        code.extend(kept)
+    return code, len(instructions) - len(code)
+
+
+def optimize_instructions(instructions, max_rounds=10, inliner=None):
+    """
+    Inlines calls with ``inliner`` (by default a new ``Inliner``), then runs
+    the passes over ``instructions`` until none changes the code. Returns
+    the new instructions and the instructions each pass removed, or for
+    inlining, the calls inlined and for the loop passes (see
+    ``tac.loops``), the instructions moved out of loops and replaced.
+    """
+    removed = dict.fromkeys(PASSES, 0)
+    if inliner is None:
+        inliner = Inliner()
+    instructions, removed["inlining"] = inliner.run(instructions)
+    passes = (
+        ("copy propagation", propagate_copies),
+        ("dead stores", eliminate_dead_stores),
+        ("jump threading", thread_jumps),
+        ("unreachable code", remove_unreachable),
+        ("loop invariants", hoist_invariants),
+        ("strength reduction", reduce_strength),
+    )
+    for _ in range(max_rounds):
+        before = [instr.format() for instr in instructions]
+        for name, run in passes:
+            instructions, count = run(instructions)
+            removed[name] += count
+        if [instr.format() for instr in instructions] == before:
+            break
+    return instructions, removed
+
+
+def optimize(tac_code, inliner=None):
+    """
+    Optimizes ``tac_code`` (a list of TAC lines). Returns the new code and
+    the number of instructions each pass changed, keyed by ``PASSES``.
+    """
+    instructions, removed = optimize_instructions(
+        parse_code(tac_code), inliner=inliner
+    )
+    return format_code(instructions), removed
+
+
+def temp_slots(tac_code):
+    """Returns the number of temp slots ``tac_code`` addresses."""
+    offsets = [
+        int(operand[:-4])
+        for instr in parse_code(tac_code)
+        for operand in (instr.dest, *instr.operands)
+        if operand is not None and is_temp(operand)
+    ]
+    return max(offsets, default=-8) // 8 + 1
@@ -0,0 +1,179 @@
+"""
+Peephole optimization of the TAC emitted by ``ASTVisitor``.
+
+The code is read through a sliding window: each instruction is appended to
+the code kept so far, and the patterns are matched against the end of it,
+so that a rewrite can expose another one. The patterns are:
+
+* ``direct-store`` turns ``t := <operation>; x := t`` into
+  ``x := <operation>`` when nothing else reads the temp ``t``, as for
+  ``x += e``, compiled to ``t := x ADD e; x := t``;
+* ``jump-to-next`` drops a jump to a label that directly follows it, such
+  as the ``goto`` that ends the last clause of an ``if`` without ``else``;
+* ``redundant-copy`` drops copies that change nothing: ``x := x``, and
+  ``y := x`` right after ``x := y``. It also drops a copy that the next
+  instruction overwrites without reading it.
+
+Unlike the passes of ``tac.optimize`` (-O), they only look at neighbouring
+instructions, and need no control flow graph.
+"""
+from collections import Counter
+
+from semantic.folding import TYPED_OPS
+
+from .instructions import (
+    COMPARE_JUMPS,
+    KNOWN_OPCODES,
+    format_code,
+    is_temp,
+    parse_code,
+)
+
+PATTERNS = ("direct-store", "jump-to-next", "redundant-copy")
+
+
+def _is_store(instr):
+    """True for copies and operations, which only write ``dest``."""
+    return (
+        instr.dest is not None
+        and instr.opcode != "pop_param"
+        and instr.opcode in KNOWN_OPCODES
+    )
+
+
+def _is_removable_jump(instr):
+    """
+    True for jumps that do nothing but jump: not for comparisons of untyped
+    values, which may fail (``1 < "a"``).
+    """
+    opcode = instr.opcode
+    if opcode in COMPARE_JUMPS:
+        return opcode[len("if_") :] in TYPED_OPS
+    return opcode == "goto" or opcode == "if_false"
+
+
+class Peephole:
+    """
+    Runs the ``patterns`` (names from ``PATTERNS``) over parsed instructions.
+    ``removed`` counts the instructions each pattern removed.
+    """
+
+    def __init__(self, patterns=PATTERNS):
+        unknown = set(patterns) - set(PATTERNS)
+        if unknown:
+            names = ", ".join(sorted(unknown))
+            raise ValueError(f"Unknown peephole pattern(s): {names}")
+        self.patterns = frozenset(patterns)
+        self.removed = dict.fromkeys(PATTERNS, 0)
+
+    def run(self, instructions):
+        """Returns the optimized ``instructions``."""
+        # How many times each temp is read: a temp read only by the copy
+        # after it can be stored straight into the copy's destination
+        self._reads = Counter(
+            operand
+            for instr in instructions
+            for operand in instr.operands
+            if is_temp(operand)
+        )
+        code = []
+        for instr in instructions:
+            code.append(instr)
+            if instr.opcode == "label":
+                if "jump-to-next" in self.patterns:
+                    self._jump_to_next(code)
+            else:
+                self._collapse(code)
+        return code
+
+    def _collapse(self, code):
+        """Applies the store and copy patterns to the end of ``code``."""
+        patterns = self.patterns
+        removed = self.removed
+        while code:
+            last = code[-1]
+            if (
+                "redundant-copy" in patterns
+                and last.opcode == ":="
+                and last.operands[0] == last.dest
+            ):
+                # x := x
+                code.pop()
+                removed["redundant-copy"] += 1
+                continue
+            if len(code) < 2:
+                return
+            previous = code[-2]
+            if (
+                "direct-store" in patterns
+                and last.opcode == ":="
+                and _is_store(previous)
+                and previous.dest == last.operands[0]
+                and is_temp(previous.dest)
+                and self._reads[previous.dest] == 1
+            ):
+                # t := <operation>; x := t  ->  x := <operation>
+                self._reads[previous.dest] = 0
+                previous.dest = last.dest
+                code.pop()
+                removed["direct-store"] += 1
+                continue
+            if "redundant-copy" in patterns and previous.opcode == ":=":
+                if (
+                    last.opcode == ":="
+                    and last.dest == previous.operands[0]
+                    and last.operands[0] == previous.dest
+                ):
+                    # x := y; y := x: y already holds x
+                    code.pop()
+                    removed["redundant-copy"] += 1
+                    continue
+                if (
+                    last.dest == previous.dest
+                    and last.opcode in KNOWN_OPCODES
+                    and previous.dest not in last.operands
+                ):
+                    # x := y; x := <not x>: the copy is overwritten unread
+                    del code[-2]
+                    self._unread(previous)
+                    removed["redundant-copy"] += 1
+                    continue
+            return
+
+    def _unread(self, instr):
+        for operand in instr.operands:
+            if is_temp(operand):
+                self._reads[operand] -= 1
+
+    def _jump_to_next(self, code):
+        """Drops the jumps right before the labels that end ``code``."""
+        labels = set()
+        end = len(code)
+        while end and code[end - 1].opcode == "label":
+            end -= 1
+            labels.add(code[end].label)
+        while end and code[end - 1].is_jump() and code[end - 1].label in labels:
+            jump = code[end - 1]
+            if not _is_removable_jump(jump):
+                return
+            del code[end - 1]
+            end -= 1
+            self._unread(jump)
+            self.removed["jump-to-next"] += 1
+
+
+def peephole(tac_code, patterns=PATTERNS):
+    """
+    Runs the peephole ``patterns`` over ``tac_code`` (a list of TAC lines).
+    Returns the new code and the number of instructions each pattern
+    removed, keyed by ``PATTERNS``.
+    """
+    optimizer = Peephole(patterns)
+    code = optimizer.run(parse_code(tac_code))
+    return format_code(code), optimizer.removed
+
+
+def report(removed):
+    """The line reporting the instructions removed by each pattern."""
+    counts = ", ".join(f"{name} {count}" for name, count in removed.items())
+    return f"Peephole: removed {sum(removed.values())} instructions ({counts})"
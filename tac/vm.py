@@ -0,0 +1,357 @@
+"""
+Interpreter for the generated three-address code.
+
+A program is loaded once: labels are resolved to instruction indices and
+every operand is resolved to an index into a single preallocated memory
+list laid out as ``[SP variables | Rx temps | constants]``. Instructions
+become ``(opcode, dest, a, b)`` tuples of small integers, executed by a
+flat dispatch loop. Jumps keep their target index in ``dest``; jumps on
+a comparison compare ``a`` with ``b``. Typed opcodes run as their generic
+ones, since Python's operators dispatch on the values anyway, except for
+division and remainder, which then skip the check of the operand types.
+
+``param`` pushes an argument and ``call`` runs the last definition of the
+function before it in the code, whose ``pop_param`` take the arguments in
+order. ``return v``, or ``func_end`` with the value 0, comes back from it.
+A call saves the temps and the variables that ``func_end`` lists for the
+function, and restores them when it returns, so that it leaves those of
+its caller alone; other variables have a single location, shared by
+every call.
+
+The program is a .tac file, assembled on loading by ``tac.bytecode``, or
+a bytecode file written by it, which is mapped into memory instead.
+
+Usage: python -m tac.vm <program.tac|program.tacb> [--max-steps N]
+"""
+import argparse
+import math
+import sys
+
+from semantic.folding import (
+    TYPED_OPS,
+    divide,
+    remainder,
+    truncate_divide,
+    truncate_remainder,
+)
+
+from .bytecode import (
+    OPCODE_NAMES,
+    TACRuntimeError,
+    assemble,
+    is_bytecode_file,
+    load,
+)
+
+(
+    COPY,
+    ADD,
+    SUB,
+    MUL,
+    DIV,
+    MOD,
+    EQ,
+    NE,
+    LT,
+    LE,
+    GT,
+    GE,
+    IF_FALSE,
+    GOTO,
+    FUNC_BEGIN,
+    POP_PARAM,
+    FUNC_END,
+    IDIV,
+    FDIV,
+    IMOD,
+    FMOD,
+    ITOF,
+    IF_EQ,
+    IF_NE,
+    IF_LT,
+    IF_LE,
+    IF_GT,
+    IF_GE,
+    PARAM,
+    CALL,
+    RETURN,
+) = range(31)
+
+# Calls in progress at most, so that endless recursion fails cleanly
+MAX_CALL_DEPTH = 10000
+
+OPCODES = {
+    ":=": COPY,
+    "ADD": ADD,
+    "SUB": SUB,
+    "MUL": MUL,
+    "DIV": DIV,
+    "MOD": MOD,
+    "EQ": EQ,
+    "NE": NE,
+    "LT": LT,
+    "LE": LE,
+    "GT": GT,
+    "GE": GE,
+    "if_false": IF_FALSE,
+    "goto": GOTO,
+    "func_begin": FUNC_BEGIN,
+    "pop_param": POP_PARAM,
+    "func_end": FUNC_END,
+    "IDIV": IDIV,
+    "FDIV": FDIV,
+    "IMOD": IMOD,
+    "FMOD": FMOD,
+    "ITOF": ITOF,
+    "if_EQ": IF_EQ,
+    "if_NE": IF_NE,
+    "if_LT": IF_LT,
+    "if_LE": IF_LE,
+    "if_GT": IF_GT,
+    "if_GE": IF_GE,
+    "param": PARAM,
+    "call": CALL,
+    "return": RETURN,
+}
+OPCODES.update(
+    (typed, OPCODES[op])
+    for typed, op in TYPED_OPS.items()
+    if op != "DIV" and op != "MOD"
+)
+OPCODES.update(
+    ("if_" + typed, OPCODES["if_" + op])
+    for typed, op in TYPED_OPS.items()
+    if "if_" + op in OPCODES
+)
+# The VM opcode of each opcode byte of ``tac.bytecode``, for bytes.translate
+BYTECODE_OPCODES = bytes(OPCODES[name] for name in OPCODE_NAMES).ljust(256, b"\xff")
+
+
+def read_tac_file(path):
+    """Reads a .tac file into ``(variable size, temp size, code lines)``."""
+    with open(path, "r") as f:
+        var_size = int(f.readline())
+        temp_size = int(f.readline())
+        # Lines are numbered as "NNN: instruction"
+        code = [line.rstrip("\n").split(": ", 1)[1] for line in f if line.strip()]
+    return var_size, temp_size, code
+
+
+class TACMachine:
+    """
+    Loads TAC (``ASTVisitor.tac_code`` or the lines of a .tac file) and runs
+    it. ``var_size`` and ``temp_size`` are the frame sizes in bytes from the
+    .tac header; by default they are derived from the highest offsets used.
+    ``from_bytecode`` loads an assembled program instead.
+    """
+
+    def __init__(self, tac_code, var_size=None, temp_size=None):
+        self._load(assemble(tac_code, var_size, temp_size))
+
+    @classmethod
+    def from_bytecode(cls, bytecode):
+        """Loads a program from ``Bytecode`` (see ``tac.bytecode.load``)."""
+        machine = cls.__new__(cls)
+        machine._load(bytecode)
+        return machine
+
+    def _load(self, bytecode):
+        self.var_count = bytecode.var_size // 8
+        self.temp_count = bytecode.temp_size // 8
+        # Maps instruction indices back to the TAC lines for errors
+        self._bytecode = bytecode
+        operands = bytecode.operands
+        self.code = list(
+            zip(
+                bytes(bytecode.opcodes).translate(BYTECODE_OPCODES),
+                operands[0::3],
+                operands[1::3],
+                operands[2::3],
+            )
+        )
+        self.memory = [0] * (self.var_count + self.temp_count)
+        self.memory.extend(bytecode.constants)
+
+        self.functions = {}
+        # The locations saved around a call, by start of the function
+        self._frames = {}
+        temps = range(self.var_count, self.var_count + self.temp_count)
+        for name, start, frame in bytecode.functions:
+            if start >= 0:
+                self.functions[name] = start + 1
+                if frame is not None:
+                    self._frames[start + 1] = (*frame, *temps)
+
+        self.steps = 0
+        self._args = []
+        self._returns = []
+
+    def run(self, max_steps=None):
+        """Runs the program from the start; returns the instructions executed."""
+        return self._execute(0, max_steps)
+
+    def call(self, name, *args, max_steps=None):
+        """Runs function ``name`` with ``args``; returns the instructions executed."""
+        if name not in self.functions:
+            raise TACRuntimeError(f"Undefined function '{name}'")
+        self._args = list(reversed(args))
+        self._returns.append((len(self.code), -1, 0, (), ()))
+        return self._execute(self.functions[name], max_steps)
+
+    def variables(self):
+        """Maps each ``NNN(SP)`` location to its current value."""
+        return {f"{i * 8:03d}(SP)": self.memory[i] for i in range(self.var_count)}
+
+    def _execute(self, pc, max_steps):
+        code = self.code
+        mem = self.memory
+        args = self._args
+        returns = self._returns
+        frames = self._frames
+        end = len(code)
+        limit = max_steps if max_steps is not None else sys.maxsize
+        steps = 0
+        try:
+            while pc < end:
+                op, d, a, b = code[pc]
+                pc += 1
+                steps += 1
+                if op == COPY:
+                    mem[d] = mem[a]
+                elif op == ADD:
+                    mem[d] = mem[a] + mem[b]
+                elif op == IF_FALSE:
+                    if not mem[a]:
+                        pc = d
+                        if steps >= limit:
+                            break
+                elif op == GOTO:
+                    pc = d
+                    if steps >= limit:
+                        break
+                elif op == IF_LE:
+                    if mem[a] <= mem[b]:
+                        pc = d
+                        if steps >= limit:
+                            break
+                elif op == IF_GE:
+                    if mem[a] >= mem[b]:
+                        pc = d
+                        if steps >= limit:
+                            break
+                elif op == IF_LT:
+                    if mem[a] < mem[b]:
+                        pc = d
+                        if steps >= limit:
+                            break
+                elif op == IF_GT:
+                    if mem[a] > mem[b]:
+                        pc = d
+                        if steps >= limit:
+                            break
+                elif op == IF_NE:
+                    if mem[a] != mem[b]:
+                        pc = d
+                        if steps >= limit:
+                            break
+                elif op == IF_EQ:
+                    if mem[a] == mem[b]:
+                        pc = d
+                        if steps >= limit:
+                            break
+                elif op == SUB:
+                    mem[d] = mem[a] - mem[b]
+                elif op == LT:
+                    mem[d] = 1 if mem[a] < mem[b] else 0
+                elif op == GT:
+                    mem[d] = 1 if mem[a] > mem[b] else 0
+                elif op == LE:
+                    mem[d] = 1 if mem[a] <= mem[b] else 0
+                elif op == GE:
+                    mem[d] = 1 if mem[a] >= mem[b] else 0
+                elif op == EQ:
+                    mem[d] = 1 if mem[a] == mem[b] else 0
+                elif op == NE:
+                    mem[d] = 1 if mem[a] != mem[b] else 0
+                elif op == MUL:
+                    mem[d] = mem[a] * mem[b]
+                elif op == DIV:
+                    mem[d] = divide(mem[a], mem[b])
+                elif op == MOD:
+                    mem[d] = remainder(mem[a], mem[b])
+                elif op == ITOF:
+                    mem[d] = float(mem[a])
+                elif op == IDIV:
+                    mem[d] = truncate_divide(mem[a], mem[b])
+                elif op == FDIV:
+                    mem[d] = mem[a] / mem[b]
+                elif op == IMOD:
+                    mem[d] = truncate_remainder(mem[a], mem[b])
+                elif op == FMOD:
+                    mem[d] = math.fmod(mem[a], mem[b])
+                elif op == FUNC_BEGIN:
+                    pc = d
+                elif op == POP_PARAM:
+                    mem[d] = args.pop()
+                elif op == PARAM:
+                    args.append(mem[a])
+                elif op == CALL:
+                    if len(returns) >= MAX_CALL_DEPTH:
+                        raise TACRuntimeError(
+                            f"Call depth limit of {MAX_CALL_DEPTH} reached"
+                        )
+                    # The arguments are popped first to last
+                    base = len(args) - b
+                    args[base:] = reversed(args[base:])
+                    frame = frames.get(a, ())
+                    saved = [mem[slot] for slot in frame]
+                    returns.append((pc, d, base, frame, saved))
+                    pc = a
+                    if steps >= limit:
+                        break
+                elif op == RETURN or op == FUNC_END:
+                    if not returns:
+                        name = "return" if op == RETURN else "func_end"
+                        raise TACRuntimeError(f"{name} reached outside of a call")
+                    value = mem[a] if op == RETURN else 0
+                    pc, d, base, frame, saved = returns.pop()
+                    del args[base:]
+                    for slot, saved_value in zip(frame, saved):
+                        mem[slot] = saved_value
+                    if d >= 0:
+                        mem[d] = value
+        except (ArithmeticError, TypeError, ValueError, IndexError) as e:
+            line = self._bytecode.line(pc - 1)
+            raise TACRuntimeError(f"{e} in instruction {line:03d}") from None
+        finally:
+            self.steps += steps
+        if pc < end:
+            raise TACRuntimeError(f"Step limit of {max_steps} instructions reached")
+        return steps
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        usage="python -m tac.vm [--max-steps N] <program.tac|program.tacb>"
+    )
+    arg_parser.add_argument("program")
+    arg_parser.add_argument("--max-steps", type=int, default=None)
+    args = arg_parser.parse_args()
+
+    try:
+        if is_bytecode_file(args.program):
+            machine = TACMachine.from_bytecode(load(args.program))
+        else:
+            var_size, temp_size, code = read_tac_file(args.program)
+            machine = TACMachine(code, var_size, temp_size)
+        steps = machine.run(args.max_steps)
+    except FileNotFoundError:
+        print(f"Error: Input file '{args.program}' not found.")
+        sys.exit(1)
+    except TACRuntimeError as e:
+        print(f"Runtime error: {e}")
+        sys.exit(1)
+
+    for location, value in machine.variables().items():
+        print(f"{location} = {value!r}")
+    print(f"{steps} instructions executed")
@@ -0,0 +1,149 @@
+"""
+Content-addressed on-disk cache of compiler outputs.
+
+Entries are keyed by a hash of the source text, the compile options and the
+compiler version (the grammar signature plus the compiler's own source
+files), so editing the grammar or the compiler invalidates every entry.
+Each entry is one marshal file holding the output texts and the console
+log of the compile, which is replayed on a hit. Entries are evicted least
+recently used first (by mtime, refreshed on every hit) once the directory
+grows past ``max_bytes``, down to ``EVICT_TO`` of it. Rather than on
+every write, the directory is scanned when the cache is opened, when the
+running total of the entry sizes goes over the limit and after every
+``RESCAN_AFTER`` of it written. The total only sees the entries of other
+processes (batch workers) at a scan, so with N of them writing the
+directory stays within ``max_bytes * (1 + N * RESCAN_AFTER)``.
+"""
+import hashlib
+import marshal
+import os
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPILER_PACKAGES = ("lexer", "syntactic", "semantic", "tac", "utils")
+CACHE_FORMAT = 1
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Fraction of max_bytes the entries are evicted down to
+EVICT_TO = 0.9
+# Fraction of max_bytes written by this process between scans
+RESCAN_AFTER = 1 / 16
+
+_compiler_version = None
+
+
+def compiler_version():
+    """Hashes the grammar signature and the compiler sources, once per process."""
+    global _compiler_version
+    if _compiler_version is None:
+        from syntactic import parser as grammar
+        from syntactic.tables import grammar_signature
+
+        digest = hashlib.sha1(f"{CACHE_FORMAT}:{grammar_signature(grammar)}".encode())
+        paths = [os.path.join(ROOT, "main.py")]
+        for package in COMPILER_PACKAGES:
+            directory = os.path.join(ROOT, package)
+            paths.extend(
+                os.path.join(directory, name)
+                for name in sorted(os.listdir(directory))
+                if name.endswith(".py")
+            )
+        for path in paths:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        _compiler_version = digest.hexdigest()
+    return _compiler_version
+
+
+class CompileCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        # Bytes in the entries, as of the last scan plus the entries put since
+        self.size = sum(size for _, size, _ in self._scan())
+        self.written = 0  # Bytes put since the last scan
+
+    def key(self, code, options):
+        digest = hashlib.sha256(compiler_version().encode())
+        digest.update(repr(sorted(options.items())).encode())
+        digest.update(b"\0")
+        digest.update(code.encode())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def get(self, key):
+        """Returns the cached ``(outputs, log)`` for ``key``, or None."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = marshal.load(f)
+            os.utime(path)  # Mark as recently used
+        except (OSError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, outputs, log):
+        # Written to a temporary file first so concurrent readers (e.g. batch
+        # workers) never see a partial entry.
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            marshal.dump((outputs, log), f)
+            size = f.tell()
+        path = self.path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(temp_path, path)
+        self.size += size - replaced
+        self.written += size
+        if (
+            self.size > self.max_bytes
+            or self.written >= self.max_bytes * RESCAN_AFTER
+        ):
+            self.evict()
+
+    def _scan(self):
+        """Returns ``(mtime, size, path)`` for each entry in the directory."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".bin"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # Evicted by another process meanwhile
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """
+        Deletes least recently used entries, if the cache is over
+        ``max_bytes``, until it fits ``EVICT_TO`` of it.
+        """
+        entries = self._scan()
+        self.written = 0
+        total = self.size = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue  # Already evicted by another process
+            total -= size
+            self.evictions += 1
+        self.size = total
+
+    def stats(self):
+        return f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions"
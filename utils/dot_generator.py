@@ -1,57 +1,221 @@
-def generate_dot(node, dot_file):
-    """
-    Generates a .dot file from an AST for visualization, with color-coded nodes.
-    """
+from syntactic.ast_nodes import Node
 
-    color_map = {
-        "program": "gray",
-        "statement_list": "whitesmoke",
-        "assign": "lightblue",
-        "if_statement": "lightcoral",
-        "elseif": "lightsalmon",
-        "else": "lightpink",
-        "while_loop": "lightseagreen",
-        "function_def": "mediumpurple",
-        "param_list": "plum",
-        "bin_op": "palegreen",
-        "unary_op": "mediumaquamarine",
-        "identifier": "khaki",
-        "integer": "gold",
-        "float": "goldenrod",
-        "string": "orange",
-        "expression_statement": "azure",
-    }
+COLOR_MAP = {
+    "program": "gray",
+    "statement_list": "whitesmoke",
+    "assign": "lightblue",
+    "if_statement": "lightcoral",
+    "elseif": "lightsalmon",
+    "else": "lightpink",
+    "while_loop": "lightseagreen",
+    "function_def": "mediumpurple",
+    "param_list": "plum",
+    "call": "thistle",
+    "return": "orchid",
+    "bin_op": "palegreen",
+    "unary_op": "mediumaquamarine",
+    "identifier": "khaki",
+    "integer": "gold",
+    "float": "goldenrod",
+    "string": "orange",
+    "expression_statement": "azure",
+}
 
-    count = 0
+# Lines are collected and written in chunks of this many
+WRITE_BATCH = 4096
 
-    def get_id(n):
-        nonlocal count
-        if not hasattr(n, "id"):
-            n.id = count
+
+def subtree_size(node):
+    """Counts the nodes below ``node`` (excluding itself), iteratively."""
+    count = 0
+    stack = list(node.children)
+    while stack:
+        child = stack.pop()
+        if child is not None:
             count += 1
-        return n.id
+            stack.extend(child.children)
+    return count
 
-    def traverse(n):
-        if n is None:
-            return
 
-        node_id = get_id(n)
+class DotWriter:
+    """
+    Writes the .dot file of an AST for visualization, with color-coded nodes.
+
+    The tree is walked with an explicit stack, so depth is not limited by the
+    recursion limit, and lines are written to ``dot_file`` in batches. Node
+    ids are assigned in pre-order from a counter rather than stored on the
+    nodes. To keep huge trees renderable:
+
+    * ``max_depth``: nodes at this depth are drawn collapsed, labelled with
+      the number of nodes hidden below them;
+    * ``max_children``: only the first children of a wider node are drawn,
+      followed by a "... N more" placeholder;
+    * ``max_nodes``: once this many nodes were drawn, the children still
+      pending under each open node are summarized by one placeholder.
+
+    ``write`` draws a whole tree. For streaming, ``begin_program``,
+    ``add_statement`` and ``end_program`` draw a program one top-level
+    statement at a time, with the same output as ``write`` on the full AST.
+    """
+
+    def __init__(self, dot_file, max_depth=None, max_nodes=None, max_children=None):
+        self.dot_file = dot_file
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_children = max_children
+        self.lines = [
+            "digraph AST {\n",
+            '  node [shape=box, style="rounded,filled"];\n',
+        ]
+        self.next_id = 0
+        self.drawn = 0
+
+    def flush(self):
+        self.dot_file.write("".join(self.lines))
+        self.lines.clear()
+
+    def node_line(self, n, node_id, hidden=None):
+        """Formats a node; ``hidden`` is the node count of a collapsed subtree."""
         label = str(n.type)
         if n.leaf is not None:
             leaf_str = str(n.leaf).replace("\\", "\\\\").replace('"', '\\"')
             label += f"\\n{leaf_str}"
+        if hidden is not None:
+            label += f"\\n(+{hidden} nodes)"
+        color = COLOR_MAP.get(n.type, "lightgrey")
+        return f'  {node_id} [label="{label}", fillcolor="{color}"];\n'
+
+    def placeholder(self, parent_id, hidden):
+        node_id = self.next_id
+        self.next_id += 1
+        self.lines.append(f"  {parent_id} -> {node_id};\n")
+        self.lines.append(
+            f'  {node_id} [label="... {hidden} more", style=dashed, '
+            'fillcolor="white"];\n'
+        )
+
+    def open_frame(self, n, node_id, depth):
+        children = n.children
+        stop = len(children)
+        if self.max_children is not None and stop > self.max_children:
+            stop = self.max_children
+        # [children, next index, stop index, parent id, depth of the children]
+        return [children, 0, stop, node_id, depth + 1]
+
+    def draw_child(self, child, parent_id, depth):
+        """Draws ``child`` at ``depth``; returns its frame if its children follow."""
+        child_id = self.next_id
+        self.next_id += 1
+        self.drawn += 1
+        self.lines.append(f"  {parent_id} -> {child_id};\n")
+        collapsed = (
+            self.max_depth is not None
+            and depth >= self.max_depth
+            and len(child.children) > 0
+        )
+        if collapsed:
+            self.lines.append(self.node_line(child, child_id, subtree_size(child)))
+            return None
+        self.lines.append(self.node_line(child, child_id))
+        if child.children:
+            return self.open_frame(child, child_id, depth)
+        return None
 
-        color = color_map.get(n.type, "lightgrey")
+    def walk(self, stack):
+        """Draws the pending children of every frame on ``stack``."""
+        max_nodes = self.max_nodes
+        lines = self.lines
+        while stack:
+            frame = stack[-1]
+            children, index, stop, parent_id, depth = frame
+            if index == stop:
+                if stop < len(children):
+                    self.placeholder(parent_id, len(children) - stop)
+                stack.pop()
+                continue
+            if max_nodes is not None and self.drawn >= max_nodes:
+                self.placeholder(parent_id, len(children) - index)
+                stack.pop()
+                continue
 
-        dot_file.write(f'  {node_id} [label="{label}", fillcolor="{color}"];\n')
+            frame[1] = index + 1
+            child = children[index]
+            if child is None:
+                continue
+            child_frame = self.draw_child(child, parent_id, depth)
+            if child_frame is not None:
+                stack.append(child_frame)
+            if len(lines) >= WRITE_BATCH:
+                self.flush()
+
+    def write(self, node):
+        if node is not None:
+            self.lines.append(self.node_line(node, 0))
+            self.next_id = 1
+            self.drawn = 1
+            self.walk([self.open_frame(node, 0, 0)])
+        self.lines.append("}\n")
+        self.flush()
+
+    def begin_program(self):
+        """
+        Starts a streamed program: draws the ``program`` and ``statement_list``
+        nodes. Limits that would collapse or hide the statement list itself
+        (``max_depth`` or ``max_nodes`` below 2, or no children drawn) defer
+        it to ``end_program``.
+        """
+        self.lines.append(self.node_line(Node("program"), 0))
+        self.next_id = 1
+        self.drawn = 1
+        self.statements = 0
+        self.cut = None  # Index of the first statement hidden by a limit
+        self.hidden_nodes = 0  # Nodes below a deferred statement list
+        self.hides_list = (self.max_nodes is not None and self.max_nodes <= 1) or (
+            self.max_children is not None and self.max_children <= 0
+        )
+        self.deferred = self.hides_list or (
+            self.max_depth is not None and self.max_depth <= 1
+        )
+        if not self.deferred:
+            self.next_id = 2
+            self.drawn = 2
+            self.lines.append("  0 -> 1;\n")
+            self.lines.append(self.node_line(Node("statement_list"), 1))
+
+    def add_statement(self, node):
+        """Draws the next top-level statement of a streamed program."""
+        index = self.statements
+        self.statements += 1
+        if self.deferred:
+            self.hidden_nodes += subtree_size(node) + 1
+            return
+        if self.cut is None and (
+            (self.max_children is not None and index >= self.max_children)
+            or (self.max_nodes is not None and self.drawn >= self.max_nodes)
+        ):
+            self.cut = index
+        if self.cut is not None:
+            return
+        frame = self.draw_child(node, 1, 2)
+        if frame is not None:
+            self.walk([frame])
+        if len(self.lines) >= WRITE_BATCH:
+            self.flush()
 
-        for child in n.children:
-            child_id = get_id(child)
-            dot_file.write(f"  {node_id} -> {child_id};\n")
-            traverse(child)
+    def end_program(self):
+        if self.deferred:
+            if self.hides_list:
+                self.placeholder(0, 1)
+            else:
+                hidden = self.hidden_nodes if self.statements else None
+                self.lines.append("  0 -> 1;\n")
+                self.lines.append(self.node_line(Node("statement_list"), 1, hidden))
+        elif self.cut is not None:
+            self.placeholder(1, self.statements - self.cut)
+        self.lines.append("}\n")
+        self.flush()
 
-    dot_file.write("digraph AST {\n")
 
-    dot_file.write('  node [shape=box, style="rounded,filled"];\n')
-    traverse(node)
-    dot_file.write("}\n")
+def generate_dot(node, dot_file, max_depth=None, max_nodes=None, max_children=None):
+    """Writes the .dot file of the AST rooted at ``node`` (see ``DotWriter``)."""
+    DotWriter(dot_file, max_depth, max_nodes, max_children).write(node)
@@ -0,0 +1,86 @@
+"""
+Opt-in per-phase measurements for the compiler driver.
+
+``Instrumentation.phase(name)`` is a context manager recording the wall
+time, CPU time and (with ``trace_memory``) the tracemalloc peak of the code
+it wraps, measured above the memory already allocated when it starts.
+Counters are plain named integers. ``report()`` returns everything as a
+JSON-serializable dict.
+"""
+import contextlib
+import json
+import time
+import tracemalloc
+
+
+class Instrumentation:
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.counters = {}
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if self.trace_memory:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            record = self.phases.setdefault(
+                name, {"wall_seconds": 0.0, "cpu_seconds": 0.0}
+            )
+            record["wall_seconds"] += time.perf_counter() - wall
+            record["cpu_seconds"] += time.process_time() - cpu
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - current
+                record["peak_memory_bytes"] = max(
+                    record.get("peak_memory_bytes", 0), peak
+                )
+
+    def count(self, name, value):
+        self.counters[name] = value
+
+    def report(self):
+        return {
+            "phases": self.phases,
+            "total": {
+                "wall_seconds": sum(p["wall_seconds"] for p in self.phases.values()),
+                "cpu_seconds": sum(p["cpu_seconds"] for p in self.phases.values()),
+            },
+            "counters": self.counters,
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def summary(self):
+        """Formats the report as a small table for the console."""
+        lines = []
+        for name, record in self.phases.items():
+            line = (
+                f"  {name:<14} {record['wall_seconds'] * 1000:9.2f} ms wall "
+                f"{record['cpu_seconds'] * 1000:9.2f} ms CPU"
+            )
+            if "peak_memory_bytes" in record:
+                line += f" {record['peak_memory_bytes'] / 1024:10,.0f} KiB peak"
+            lines.append(line)
+        counters = ", ".join(f"{name} {value}" for name, value in self.counters.items())
+        lines.append(f"  {counters}")
+        return "\n".join(lines)
+
+
+def no_phase(name):
+    """Stand-in for ``Instrumentation.phase`` when measurements are off."""
+    return contextlib.nullcontext()